@@ -0,0 +1,193 @@
+import math
+import time
+from orderbook import MIN_PRICE, MAX_PRICE
+
+# Order book signals. Read-time signals cost nothing per delta and are computed off the book
+# when asked for (once per strategy evaluation, after conflation):
+#   imbalance    depth-weighted imbalance over the top `levels` cents of each side,
+#                weights falling linearly away from the best price (levels=1: best level only)
+#   microprice   best bid/ask weighted by the opposite side's size
+# Tracked signals are maintained from the same [price, qty] changes that update the book, so
+# they cost O(changed levels) per delta; they are only kept with tracking on (BOOK_SIGNALS_ENABLED):
+#   price_for_depth  worst price reached sweeping N contracts from the top (Fenwick tree per side;
+#                    without tracking it scans the book side instead)
+#   mid_ewma / volatility  time-decayed mid and mid-change volatility (cents per sqrt(second)),
+#                    on the frame clock passed to on_delta (recorded time in replays)
+
+RANKS = MAX_PRICE # price ranks 1..99 in the Fenwick tree
+TOP_STEP = 64 # highest power of two <= RANKS, for the top-down search
+
+class DepthTree:
+    # Fenwick tree over price ranks (rank 1 = 99c ... rank 99 = 1c), so prefix sums are the
+    # cumulative qty from the top of the side
+    __slots__ = ("tree", "total")
+
+    def __init__(self):
+        self.tree = [0] * (RANKS + 1)
+        self.total = 0
+
+    def add(self, price: int, delta: int):
+        tree = self.tree
+        i = 100 - price
+        while i <= RANKS:
+            tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def rebuild(self, levels):
+        # O(n) construction from a full side (snapshots)
+        tree = [0] * (RANKS + 1)
+        total = 0
+        for price in range(MIN_PRICE, MAX_PRICE + 1):
+            tree[100 - price] = levels[price]
+            total += levels[price]
+        for i in range(1, RANKS + 1):
+            j = i + (i & -i)
+            if j <= RANKS:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.total = total
+
+    def price_for_depth(self, contracts: int) -> int:
+        # Smallest rank whose prefix reaches `contracts`, as a price; 0 if the side is too thin
+        if contracts <= 0 or contracts > self.total:
+            return 0
+        tree = self.tree
+        pos = 0
+        remaining = contracts
+        step = TOP_STEP
+        while step:
+            nxt = pos + step
+            if nxt <= RANKS and tree[nxt] < remaining:
+                pos = nxt
+                remaining -= tree[nxt]
+            step >>= 1
+        return 100 - (pos + 1)
+
+class BookAnalytics:
+    # Signals for one OrderBook. With tracking, deltas go through apply_levels() (which also
+    # updates the book) and on_delta(), and the rolling stats only do work when the mid
+    # actually moves. Without it the owner applies deltas to the book directly.
+    __slots__ = ("book", "levels", "weights", "halflife", "tracking", "depth",
+                 "mid", "_mid_ewma", "_var_sum", "_time_sum", "_last_ts")
+
+    def __init__(self, book, levels: int = 5, halflife: float = 30.0, tracking: bool = True):
+        self.book = book
+        self.levels = max(1, levels)
+        # Integer weights (levels, levels - 1, ..., 1): band sums are exact and the
+        # imbalance ratio doesn't depend on scale
+        self.weights = [self.levels - k for k in range(self.levels)]
+        self.halflife = halflife
+        self.tracking = tracking
+        # Per side, indexed 0 = yes, 1 = no
+        self.depth = [DepthTree(), DepthTree()]
+        self.mid = None
+        self._mid_ewma = None # as of _last_ts
+        self._var_sum = 0.0
+        self._time_sum = 0.0
+        self._last_ts = None
+
+    def _band(self, book_side) -> int:
+        # Weighted qty in the top `levels` cents of a side
+        best = book_side.best
+        levels = book_side.levels
+        total = 0
+        if best:
+            for k, w in enumerate(self.weights):
+                p = best - k
+                if p < MIN_PRICE:
+                    break
+                total += w * levels[p]
+        return total
+
+    def on_snapshot(self, ts: float = None):
+        book = self.book
+        for i, book_side in enumerate((book.yes, book.no)):
+            self.depth[i].rebuild(book_side.levels)
+        self.on_delta(ts)
+
+    def apply_levels(self, side: str, changes):
+        # Applies [price, qty] changes to the book side and the signals in one pass
+        if not changes:
+            return
+        i = 0 if side == 'yes' else 1
+        book_side = self.book.yes if i == 0 else self.book.no
+        tree = self.depth[i]
+        nodes = tree.tree
+        total = 0
+        for price, qty in changes:
+            if price < MIN_PRICE or price > MAX_PRICE:
+                continue
+            new = qty if qty > 0 else 0
+            diff = new - book_side.set(price, qty)
+            if diff:
+                total += diff
+                r = 100 - price # DepthTree.add, inlined
+                while r <= RANKS:
+                    nodes[r] += diff
+                    r += r & -r
+        tree.total += total
+
+    def on_delta(self, ts: float = None):
+        # Rolling stats treat the mid as piecewise constant: only a change of mid costs anything
+        book = self.book
+        bid = book.yes.best
+        no_best = book.no.best
+        mid = (bid + 100 - no_best) / 2 if bid and no_best else None
+        if mid == self.mid:
+            return
+        ts = time.perf_counter() if ts is None else ts
+        if self.mid is not None and mid is not None and self._last_ts is not None:
+            dt = ts - self._last_ts
+            decay = math.exp(-dt * math.log(2) / self.halflife) if dt > 0 else 1.0
+            change = mid - self.mid
+            self._mid_ewma = self._mid_ewma * decay + self.mid * (1 - decay)
+            self._var_sum = self._var_sum * decay + change * change
+            self._time_sum = self._time_sum * decay + max(dt, 0.0)
+        elif mid is not None and self._mid_ewma is None:
+            self._mid_ewma = mid
+        self.mid = mid
+        self._last_ts = ts
+
+    @property
+    def imbalance(self) -> float:
+        yes = self._band(self.book.yes)
+        no = self._band(self.book.no)
+        total = yes + no
+        return (yes - no) / total if total > 0 else 0.0
+
+    @property
+    def microprice(self):
+        # Best bid/ask weighted by the opposite side's size; None while a side is empty
+        book = self.book
+        bid = book.yes.best
+        no_best = book.no.best
+        if not bid or not no_best:
+            return None
+        ask = 100 - no_best
+        bid_qty = book.yes.levels[bid]
+        ask_qty = book.no.levels[no_best]
+        return (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty)
+
+    def price_for_depth(self, side: str, contracts: int) -> int:
+        if not self.tracking:
+            return self.book.side(side).price_for_depth(contracts)
+        return self.depth[0 if side == 'yes' else 1].price_for_depth(contracts)
+
+    def _decay_to(self, ts: float):
+        dt = ts - self._last_ts if self._last_ts is not None else 0.0
+        return (math.exp(-dt * math.log(2) / self.halflife) if dt > 0 else 1.0), max(dt, 0.0)
+
+    def mid_ewma(self, ts: float = None):
+        if self._mid_ewma is None or self.mid is None:
+            return self._mid_ewma
+        decay, _ = self._decay_to(time.perf_counter() if ts is None else ts)
+        return self._mid_ewma * decay + self.mid * (1 - decay)
+
+    def volatility(self, ts: float = None) -> float:
+        # Mid-change standard deviation in cents per sqrt(second), decayed like the mid
+        decay, dt = self._decay_to(time.perf_counter() if ts is None else ts)
+        elapsed = self._time_sum * decay + dt
+        if elapsed <= 0:
+            return 0.0
+        return math.sqrt(self._var_sum * decay / elapsed)
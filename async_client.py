@@ -0,0 +1,138 @@
+import time
+import aiohttp
+from urllib.parse import urlparse
+from config import Config
+from client import OrderNotFound, order_not_found, order_payload, quote_key, amend_payload, decrease_payload, market_query, orders_query
+from signing import RequestSigner
+from event_log import events
+from metrics import metrics
+from scheduler import RequestScheduler, CANCEL, CREATE, READ
+
+class AsyncKalshiClient:
+    # Non-blocking counterpart of KalshiClient with the same method surface.
+    # All requests share one keep-alive connection pool bounded by HTTP_MAX_CONNECTIONS.
+    def __init__(self, config: Config, signer: RequestSigner = None, max_connections: int = None, timeout: float = None):
+        self.config = config
+        self.base_url = config.API_BASE_URL
+        self.base_path = urlparse(self.base_url).path
+        # Signatures are computed on the signer's worker pool, off the event loop
+        self.signer = signer or RequestSigner.from_config(config)
+        self.max_connections = max_connections or config.HTTP_MAX_CONNECTIONS
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout or config.HTTP_TIMEOUT_SECONDS,
+            connect=config.HTTP_CONNECT_TIMEOUT_SECONDS
+        )
+        self.session = None
+        # Exchange rate limits: requests are prioritised and throttled before they are signed
+        self.scheduler = None
+        if config.RATE_LIMIT_READS_PER_SECOND or config.RATE_LIMIT_WRITES_PER_SECOND:
+            self.scheduler = RequestScheduler(self._send, config.RATE_LIMIT_READS_PER_SECOND,
+                                              config.RATE_LIMIT_WRITES_PER_SECOND)
+
+    def _get_session(self):
+        # The session must be created inside a running event loop
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=30,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def request(self, method: str, endpoint: str, params=None, data=None, priority: int = None,
+                      cost: float = 1, key=None):
+        # priority defaults by method: DELETE = cancel, GET = read, anything else = create.
+        # cost is in rate-limit tokens; key lets a newer queued request replace this one.
+        if self.scheduler is None:
+            return await self._send(method, endpoint, params, data)
+        if priority is None:
+            priority = CANCEL if method == "DELETE" else READ if method == "GET" else CREATE
+        bucket = "read" if method == "GET" else "write"
+        return await self.scheduler.submit(priority, bucket, cost, key, method, endpoint, params, data)
+
+    def cancel_queued(self, key) -> bool:
+        # Withdraws a request still waiting for rate-limit tokens (its caller gets Superseded);
+        # False if it was already sent or never queued
+        return self.scheduler is not None and self.scheduler.supersede(key)
+
+    async def _send(self, method: str, endpoint: str, params=None, data=None):
+        url = f"{self.base_url}{endpoint}"
+        headers = await self.signer.auth_headers_async(method, self.base_path + endpoint)
+
+        session = self._get_session()
+        sent = 0
+        if metrics.enabled:
+            sent = time.perf_counter_ns()
+            metrics.since_origin("tick_to_trade", sent)
+        async with session.request(method, url, params=params, json=data, headers=headers) as response:
+            if sent:
+                received = time.perf_counter_ns()
+                metrics.observe("http_response", received - sent)
+                metrics.since_origin("tick_to_ack", received)
+            try:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+            except aiohttp.ClientResponseError as e:
+                events.error("api_error", method=method, endpoint=endpoint, status=e.status,
+                             response=await response.text())
+                if order_not_found(endpoint, e.status):
+                    raise OrderNotFound(f"{method} {endpoint}: order not found") from e
+                raise
+
+    async def get_market(self, ticker: str):
+        return await self.request("GET", f"/markets/{ticker}")
+
+    async def get_markets(self, limit: int = 100, status: str = "open", cursor: str = None, min_close_ts: int = None, max_close_ts: int = None,
+                          min_updated_ts: int = None):
+        params = market_query(limit, status, cursor, min_close_ts, max_close_ts, min_updated_ts)
+        return await self.request("GET", "/markets", params=params)
+
+    async def get_balance(self):
+        return await self.request("GET", "/portfolio/balance")
+
+    async def create_order(self, ticker: str, action: str, count: int, price: int, side: str = "yes"):
+        data = order_payload(ticker, action, count, price, side)
+        # A newer price for the same market side replaces a create still waiting in the queue
+        return await self.request("POST", "/portfolio/orders", data=data, key=quote_key([(ticker, side)]))
+
+    async def get_positions(self, limit: int = 100, cursor: str = None):
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        return await self.request("GET", "/portfolio/positions", params=params)
+
+    async def get_orders(self, ticker: str = None, status: str = "resting", limit: int = 100, cursor: str = None):
+        return await self.request("GET", "/portfolio/orders", params=orders_query(ticker, status, limit, cursor))
+
+    async def cancel_order(self, order_id: str):
+        return await self.request("DELETE", f"/portfolio/orders/{order_id}")
+
+    async def amend_order(self, order_id: str, ticker: str, action: str, count: int, price: int, side: str = "yes", client_order_id: str = None):
+        data = amend_payload(ticker, action, count, price, side, client_order_id)
+        return await self.request("POST", f"/portfolio/orders/{order_id}/amend", data=data, key=quote_key([(ticker, side)]))
+
+    async def decrease_order(self, order_id: str, reduce_by: int = None, reduce_to: int = None):
+        return await self.request("POST", f"/portfolio/orders/{order_id}/decrease", data=decrease_payload(reduce_by, reduce_to))
+
+    async def batch_create_orders(self, orders):
+        # Every order in a batch counts against the write limit
+        key = quote_key((o['ticker'], o['side']) for o in orders)
+        return await self.request("POST", "/portfolio/orders/batched", data={"orders": orders}, cost=len(orders), key=key)
+
+    async def batch_cancel_orders(self, order_ids):
+        order_ids = list(order_ids)
+        # Batched cancels are charged a fifth of a write each
+        return await self.request("DELETE", "/portfolio/orders/batched", data={"ids": order_ids}, cost=0.2 * len(order_ids))
@@ -0,0 +1,386 @@
+import asyncio
+import sys
+import time
+from config import Config
+from client import OrderNotFound
+from market_data import MarketDataService
+from strategy import MarketMakingStrategy
+from recorder import read_frames
+from ledger import Ledger
+from ws_messages import BOOK_TYPES, MessageDecoder
+from event_log import events, OFF
+from metrics import metrics
+from requote_policy import RequotePolicy
+
+class SimulatedExchange:
+    # Async stand-in for KalshiClient backed by an internal matching engine.
+    # Our orders rest until the recorded book trades through them, then fill in full at
+    # our limit price (a maker fill). Orders that cross on arrival fill immediately.
+    def __init__(self):
+        self.books = {} # ticker -> OrderBook, attached by the caller
+        self.orders = {} # order_id -> order dict
+        self.resting = {} # ticker -> {order_id: order}
+        self.positions = {} # ticker -> {'yes': contracts, 'no': contracts}
+        self.cash = 0 # cents
+        self.fills = []
+        self.orders_created = 0
+        self.orders_cancelled = 0
+        self.orders_amended = 0
+        self.requests = 0 # REST calls a real client would have made
+        self.fill_listeners = [] # callback(fill), e.g. to push WS fill messages
+        self._next_id = 0
+
+    def attach_book(self, ticker: str, book):
+        self.books[ticker] = book
+
+    def _crosses(self, order, book) -> bool:
+        price = order['price']
+        if order['action'] == "buy":
+            # Buying YES at p trades against NO bids at >= 100 - p (and vice versa)
+            opposite = book.no.best if order['side'] == "yes" else book.yes.best
+            return opposite > 0 and 100 - opposite <= price
+        same = book.yes.best if order['side'] == "yes" else book.no.best
+        return same >= price
+
+    def _fill(self, order, ts=None):
+        ticker = order['ticker']
+        pos = self.positions.setdefault(ticker, {'yes': 0, 'no': 0})
+        count = order['remaining']
+        sign = 1 if order['action'] == "buy" else -1
+        pos[order['side']] += sign * count
+        self.cash -= sign * order['price'] * count
+        order['remaining'] = 0
+        order['status'] = "executed"
+        self.resting.get(ticker, {}).pop(order['order_id'], None)
+        fill = {
+            'ticker': ticker,
+            'order_id': order['order_id'],
+            'side': order['side'],
+            'action': order['action'],
+            'price': order['price'],
+            'count': count,
+            'ts': ts,
+            'seq': len(self.fills) + 1,
+            'post_position': pos['yes'] - pos['no']
+        }
+        self.fills.append(fill)
+        for callback in self.fill_listeners:
+            callback(fill)
+        return fill
+
+    def fill_message(self, fill):
+        # A fill in the shape of the WS `fill` channel message
+        return {
+            'trade_id': f"{fill['order_id']}-{fill['seq']}",
+            'order_id': fill['order_id'],
+            'market_ticker': fill['ticker'],
+            'side': fill['side'],
+            'action': fill['action'],
+            'count': fill['count'],
+            'yes_price': fill['price'] if fill['side'] == "yes" else 100 - fill['price'],
+            'no_price': fill['price'] if fill['side'] == "no" else 100 - fill['price'],
+            'post_position': fill['post_position'],
+            'is_taker': False
+        }
+
+    def match(self, ticker: str, ts=None):
+        # Fill every resting order on `ticker` the current book trades through
+        book = self.books.get(ticker)
+        resting = self.resting.get(ticker)
+        if book is None or not resting:
+            return []
+        return [self._fill(o, ts) for o in list(resting.values()) if self._crosses(o, book)]
+
+    def net_position(self, ticker: str) -> int:
+        pos = self.positions.get(ticker, {'yes': 0, 'no': 0})
+        return pos['yes'] - pos['no']
+
+    def mark_to_market(self) -> float:
+        # Cash plus holdings valued at the current mid (YES at mid, NO at 100 - mid)
+        value = 0.0
+        for ticker, pos in self.positions.items():
+            book = self.books.get(ticker)
+            if book is None:
+                continue
+            best_bid, best_ask = book.best_prices()
+            mid = (best_bid + best_ask) / 2
+            value += pos['yes'] * mid + pos['no'] * (100 - mid)
+        return self.cash + value
+
+    # KalshiClient surface
+
+    def _place(self, ticker: str, action: str, count: int, price: int, side: str, client_order_id: str = None):
+        self._next_id += 1
+        oid = f"sim-{self._next_id}"
+        order = {
+            'order_id': oid,
+            'client_order_id': client_order_id or oid,
+            'ticker': ticker,
+            'action': action,
+            'side': side,
+            'price': price,
+            'count': count,
+            'remaining': count,
+            'status': "resting"
+        }
+        self.orders[oid] = order
+        self.resting.setdefault(ticker, {})[oid] = order
+        self.orders_created += 1
+        book = self.books.get(ticker)
+        if book is not None and self._crosses(order, book):
+            self._fill(order)
+        return {'order': dict(order)}
+
+    def _cancel(self, order_id: str):
+        order = self.orders.get(order_id)
+        if order is None or order['status'] != "resting":
+            raise OrderNotFound(f"order {order_id} not found")
+        order['status'] = "canceled"
+        self.resting.get(order['ticker'], {}).pop(order_id, None)
+        self.orders_cancelled += 1
+        return {'order': dict(order), 'reduced_by': order['remaining']}
+
+    async def create_order(self, ticker: str, action: str, count: int, price: int, side: str = "yes"):
+        self.requests += 1
+        return self._place(ticker, action, count, price, side)
+
+    async def cancel_order(self, order_id: str):
+        self.requests += 1
+        return self._cancel(order_id)
+
+    async def amend_order(self, order_id: str, ticker: str, action: str, count: int, price: int, side: str = "yes", client_order_id: str = None):
+        # Reprices in place: same order id, no gap in the quote
+        self.requests += 1
+        order = self.orders.get(order_id)
+        if order is None or order['status'] != "resting":
+            raise OrderNotFound(f"order {order_id} not found")
+        old = dict(order)
+        order['price'] = price
+        order['remaining'] = count
+        order['count'] = count
+        self.orders_amended += 1
+        book = self.books.get(ticker)
+        if book is not None and self._crosses(order, book):
+            self._fill(order)
+        return {'old_order': old, 'order': dict(order)}
+
+    async def decrease_order(self, order_id: str, reduce_by: int = None, reduce_to: int = None):
+        self.requests += 1
+        order = self.orders.get(order_id)
+        if order is None or order['status'] != "resting":
+            raise OrderNotFound(f"order {order_id} not found")
+        target = order['remaining'] - reduce_by if reduce_by is not None else reduce_to
+        if target <= 0:
+            return self._cancel(order_id)
+        order['remaining'] = target
+        return {'order': dict(order)}
+
+    async def batch_create_orders(self, orders):
+        self.requests += 1
+        results = []
+        for o in orders:
+            price = o.get('yes_price') if o.get('side') == "yes" else o.get('no_price')
+            resp = self._place(o['ticker'], o['action'], o['count'], price, o['side'], o.get('client_order_id'))
+            results.append({'client_order_id': o.get('client_order_id'), 'order': resp['order']})
+        return {'orders': results}
+
+    async def batch_cancel_orders(self, order_ids):
+        self.requests += 1
+        results = []
+        for oid in order_ids:
+            try:
+                results.append(dict(self._cancel(oid), order_id=oid))
+            except Exception as e:
+                results.append({'order_id': oid, 'error': {'code': "not_found", 'message': str(e)}})
+        return {'orders': results}
+
+    async def get_positions(self, limit: int = 100, cursor: str = None):
+        return {'market_positions': [
+            {'ticker': t, 'position': p['yes'] - p['no']} for t, p in self.positions.items()
+        ]}
+
+    async def get_orders(self, ticker: str = None, status: str = "resting", limit: int = 100, cursor: str = None):
+        # Same fields as the exchange's order objects
+        orders = [o for o in self.orders.values()
+                  if (ticker is None or o['ticker'] == ticker) and (status is None or o['status'] == status)]
+        return {'orders': [{
+            'order_id': o['order_id'],
+            'client_order_id': o['client_order_id'],
+            'ticker': o['ticker'],
+            'side': o['side'],
+            'action': o['action'],
+            'status': o['status'],
+            'yes_price': o['price'] if o['side'] == "yes" else 100 - o['price'],
+            'no_price': o['price'] if o['side'] == "no" else 100 - o['price'],
+            'remaining_count': o['remaining'],
+        } for o in orders], 'cursor': ""}
+
+    async def get_balance(self):
+        return {'balance': self.cash}
+
+def inventory_variance(changes, frames: int) -> float:
+    # Variance of net inventory over frames; it is 0 until the first fill and only moves
+    # at the (frame index, inventory) points in `changes`
+    if not frames:
+        return 0.0
+    total = squares = 0.0
+    index, value = 0, 0
+    for next_index, next_value in changes + [(frames, None)]:
+        weight = next_index - index
+        total += weight * value
+        squares += weight * value * value
+        index, value = next_index, next_value
+    mean = total / frames
+    return squares / frames - mean * mean
+
+def book_ticker(m):
+    # Market of a book message (None for other message types)
+    return m.msg.market_ticker if m.type in BOOK_TYPES else None
+
+class ReplayEngine:
+    # Drives recorded frames through MarketDataService's typed dispatch -> conflating
+    # dispatcher -> MarketMakingStrategy.on_market_update with a SimulatedExchange
+    # standing in for KalshiClient. Runs as fast as the CPU allows.
+    def __init__(self, config: Config, frames, tickers=None):
+        self.config = config
+        self.frames = frames # (ts_ns, raw frame) pairs, iterated once by decode()
+        self.tickers = tickers
+        self.decoded = None
+
+    def _discover_tickers(self, decoded):
+        tickers = []
+        for _, m in decoded:
+            t = book_ticker(m)
+            if t and t not in tickers:
+                tickers.append(t)
+        return tickers or [self.config.TARGET_TICKER]
+
+    def decode(self):
+        # Decoded once per engine; later runs (e.g. other parameters) reuse the messages,
+        # which the book and strategy only read
+        if self.decoded is None:
+            decoder = MessageDecoder(self.config.WS_JSON_BACKEND or None)
+            self.decoded = [(ts, decoder.decode(raw)) for ts, raw in self.frames]
+            self.frames = None # raw frames (or views into a shared segment) are not needed again
+        return self.decoded
+
+    async def run(self, verbose: bool = False, config: Config = None):
+        # `config` overrides the engine's for this run (strategy tunables, order size...)
+        config = config or self.config
+        decoded = self.decode()
+        tickers = self.tickers or self._discover_tickers(decoded)
+
+        market_data = MarketDataService(config, market_tickers=tickers)
+        # Evaluate inline after each frame instead of scheduling a task per update
+        market_data.dispatcher.autostart = False
+        exchange = SimulatedExchange()
+        # Fills reach the strategies through a ledger, as the WS fill channel does live
+        ledger = Ledger()
+        exchange.fill_listeners.append(lambda f: ledger.on_fill(exchange.fill_message(f)))
+        strategies = {}
+        # Requote timing (min resting time, order budget) runs on recorded time, not wall time
+        clock = [decoded[0][0] / 1e9 if decoded else 0.0]
+        for t in tickers:
+            exchange.attach_book(t, market_data.book(t))
+            strategy = MarketMakingStrategy(config, exchange, market_data, ticker=t, ledger=ledger)
+            strategy.policy = RequotePolicy.from_config(config, clock=lambda: clock[0])
+            strategy.retry_held = False # every frame re-evaluates anyway
+            market_data.add_listener(strategy.on_market_update, ticker=t)
+            strategies[t] = strategy
+
+        inventory = [] # (frame index, net inventory) after every frame with fills
+        seen_fills = 0
+        start = time.perf_counter()
+        # Strategy events are off unless verbose; then they are flushed to the console after
+        # every frame (no writer thread, so nothing is dropped however fast the replay runs)
+        level = events.level
+        # Stage metrics measure live latencies; here the frame clock is the recorded time
+        instrumented = metrics.enabled
+        metrics.enabled = False
+        if verbose:
+            events.console = sys.stdout
+        else:
+            events.level = OFF
+        try:
+            for i, (ts, m) in enumerate(decoded):
+                clock[0] = ts / 1e9
+                market_data.frame_ns = ts # rolling book stats decay on recorded time
+                market_data._dispatch(m)
+                await market_data.dispatcher.flush()
+                ticker = book_ticker(m) or market_data.ticker
+                if ticker in strategies:
+                    await strategies[ticker].wait_for_quotes()
+                    exchange.match(ticker, ts)
+                    if len(exchange.fills) > seen_fills:
+                        # Includes orders that crossed on arrival during the evaluation
+                        seen_fills = len(exchange.fills)
+                        inventory.append((i, sum(exchange.net_position(t) for t in tickers)))
+                if verbose:
+                    events.flush()
+            elapsed = time.perf_counter() - start
+        finally:
+            events.level = level
+            metrics.enabled = instrumented
+            if verbose:
+                events.flush()
+                events.console = None
+
+        return {
+            'frames': len(decoded),
+            'seconds': elapsed,
+            'frames_per_second': len(decoded) / elapsed if elapsed > 0 else 0.0,
+            'tickers': tickers,
+            'fills': len(exchange.fills),
+            'contracts_filled': sum(f['count'] for f in exchange.fills),
+            'orders_created': exchange.orders_created,
+            'orders_cancelled': exchange.orders_cancelled,
+            'orders_amended': exchange.orders_amended,
+            'rest_requests': exchange.requests,
+            'pnl_cents': exchange.mark_to_market(),
+            'final_inventory': {t: exchange.net_position(t) for t in tickers},
+            'max_abs_inventory': max((abs(x) for _, x in inventory), default=0),
+            'inventory_variance': inventory_variance(inventory, len(decoded)),
+            'evaluations': market_data.dispatcher.evaluations_run,
+            'requote_policy': combine_reports([s.policy.report() for s in strategies.values()]),
+            'fill_log': exchange.fills
+        }
+
+def combine_reports(reports):
+    # Requote policy reports of every market as one (averages weighted by suppressions)
+    total = {k: sum(r[k] for r in reports) for k in reports[0]} if reports else {}
+    if reports:
+        total['avg_deviation_cents'] = (sum(r['avg_deviation_cents'] * r['suppressed'] for r in reports)
+                                        / total['suppressed'] if total['suppressed'] else 0.0)
+        total['max_deviation_cents'] = max(r['max_deviation_cents'] for r in reports)
+    return total
+
+def print_report(result):
+    print(f"Replayed {result['frames']} frames in {result['seconds']:.2f}s ({result['frames_per_second']:,.0f} frames/s)")
+    print(f"Markets: {', '.join(result['tickers'])}")
+    print(f"Strategy evaluations: {result['evaluations']}")
+    print(f"Quotes: {result['orders_created']} placed, {result['orders_amended']} amended, {result['orders_cancelled']} cancelled")
+    print(f"REST requests: {result['rest_requests']}")
+    print(f"Fills: {result['fills']} ({result['contracts_filled']} contracts)")
+    print(f"PnL (mark-to-mid): {result['pnl_cents'] / 100:.2f}$")
+    print(f"Final inventory: {result['final_inventory']} (max |net| {result['max_abs_inventory']}, "
+          f"variance {result['inventory_variance']:,.1f})")
+    p = result['requote_policy']
+    print(f"Requotes suppressed: {p['suppressed']} of {p['suppressed'] + p['allowed']} (band {p['suppressed_band']}, "
+          f"min rest {p['suppressed_min_rest']}, budget {p['suppressed_budget']}); kept quotes off target by "
+          f"{p['avg_deviation_cents']:.2f}c on average, {p['behind_cent_seconds']:,.1f} cent-seconds behind, "
+          f"{p['ahead_cent_seconds']:,.1f} ahead")
+
+def main():
+    # Usage: python backtest.py feed.bin [TICKER ...] [--verbose]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print("Usage: python backtest.py <recording> [TICKER ...] [--verbose]")
+        sys.exit(1)
+    config = Config(API_KEY="backtest")
+    frames = list(read_frames(args[0]))
+    engine = ReplayEngine(config, frames, tickers=args[1:] or None)
+    result = asyncio.run(engine.run(verbose="--verbose" in sys.argv))
+    print_report(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import sys
+import time
+from config import Config
+from market_data import MarketDataService
+from metrics import metrics
+from recorder import read_frames
+from synthetic_feed import generate_frames
+from ws_messages import BOOK_TYPES, MessageDecoder, available_backends
+
+# WS frame decoding on a recorded feed:
+#   python bench_decode.py feed.bin      (synthetic churn frames if no file is given)
+# "decode" times the JSON backends alone against plain json.loads into dicts; "pipeline" runs
+# every backend through the same MarketDataService._on_frame (decode -> seq check -> book
+# apply -> dispatch), so the only difference between rows is the decoding.
+
+def load_frames(path=None):
+    if path:
+        return [raw for _, raw in read_frames(path)]
+    return generate_frames("churn", 200000)
+
+def make_service(frames, backend=None):
+    tickers = []
+    for raw in frames[:1000]:
+        m = MessageDecoder("json").decode(raw)
+        if m.type in BOOK_TYPES and m.msg.market_ticker not in tickers:
+            tickers.append(m.msg.market_ticker)
+    config = Config(API_KEY="bench", WS_JSON_BACKEND=backend or "")
+    md = MarketDataService(config, market_tickers=tickers or [config.TARGET_TICKER])
+    md.dispatcher.autostart = False
+    return md
+
+def run(label, frames, fn, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in frames:
+            fn(raw)
+        best = min(best, time.perf_counter() - start)
+    fps = len(frames) / best
+    print(f"{label:16s} {fps:12,.0f} frames/s {best / len(frames) * 1e9:8,.0f} ns/frame")
+    return fps
+
+def main():
+    frames = load_frames(sys.argv[1] if len(sys.argv) > 1 else None)
+    metrics.enabled = False # measure decoding, not instrumentation
+    print(f"{len(frames):,} frames, backends installed: {', '.join(available_backends())}")
+
+    print("decode")
+    baseline = run("json.loads dict", frames, json.loads)
+    for backend in available_backends():
+        fps = run(f"typed/{backend}", frames, MessageDecoder(backend).decode)
+        print(f"{'':16s} {fps / baseline:12.2f}x vs json.loads")
+
+    # The stdlib backend hands deltas to the book as plain dicts (no typed objects)
+    print("pipeline")
+    baseline = None
+    for backend in reversed(available_backends()):
+        md = make_service(frames, backend)
+        fps = run(f"{backend}", frames, md._on_frame)
+        baseline = baseline or fps
+        print(f"{'':16s} {fps / baseline:12.2f}x vs json")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import random
+import time
+from orderbook import OrderBook
+from verify_orderbook import DictBook, random_levels
+
+
+def make_deltas(n, seed=1):
+    rng = random.Random(seed)
+    return [{'yes': random_levels(rng, 1, 0.3), 'no': random_levels(rng, 1, 0.3)} for _ in range(n)]
+
+
+def bench_dict(snap, deltas):
+    book = DictBook()
+    book.snapshot(snap)
+    start = time.perf_counter()
+    for msg in deltas:
+        book.delta(msg)
+        book.get_best_prices()
+        book.get_imbalance()
+    return len(deltas) / (time.perf_counter() - start)
+
+
+def bench_array(snap, deltas):
+    book = OrderBook()
+    book.apply_snapshot(snap['yes'], snap['no'])
+    start = time.perf_counter()
+    for msg in deltas:
+        book.apply_levels('yes', msg['yes'])
+        book.apply_levels('no', msg['no'])
+        book.best_prices()
+        book.imbalance()
+    return len(deltas) / (time.perf_counter() - start)
+
+
+def main(n=200000):
+    rng = random.Random(0)
+    for name, levels in (("thin", 5), ("deep", 90)):
+        snap = {'yes': random_levels(rng, levels), 'no': random_levels(rng, levels)}
+        deltas = make_deltas(n)
+        d = bench_dict(snap, deltas)
+        a = bench_array(snap, deltas)
+        print(f"{name:5s} book: dict {d:,.0f} deltas/s | array {a:,.0f} deltas/s ({a / d:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from signing import RequestSigner
+
+# Usage: python bench_signing.py [path/to/private_key.pem]
+# Without a key path a throwaway 2048-bit key is generated.
+
+def load_pem():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            return f.read()
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+
+def bench_serial(signer, n):
+    start = time.perf_counter()
+    for i in range(n):
+        signer.auth_headers("POST", f"/trade-api/v2/portfolio/orders?{i}")
+    return n / (time.perf_counter() - start)
+
+async def bench_pool(signer, n):
+    # Warm the pool so process start-up is not counted
+    await asyncio.gather(*(signer.auth_headers_async("GET", "/warmup") for _ in range(signer.workers)))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        signer.auth_headers_async("POST", f"/trade-api/v2/portfolio/orders?{i}") for i in range(n)
+    ))
+    return n / (time.perf_counter() - start)
+
+def main(n=2000):
+    pem = load_pem()
+    cores = os.cpu_count() or 1
+    print(f"Cores: {cores}")
+
+    serial = bench_serial(RequestSigner("bench", pem), n)
+    print(f"on-loop serial : {serial:8,.0f} sig/s  ({1000 / serial:.3f} ms/sig)")
+
+    for mode in ("thread", "process"):
+        signer = RequestSigner("bench", pem, workers=cores, mode=mode)
+        try:
+            rate = asyncio.run(bench_pool(signer, n))
+        finally:
+            signer.close()
+        print(f"{mode:7s} pool x{cores}: {rate:8,.0f} sig/s  ({rate / cores:,.0f} sig/s/core)")
+
+if __name__ == "__main__":
+    main()
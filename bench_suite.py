@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from config import Config
+from client import order_payload
+from market_data import MarketDataService
+from metrics import metrics
+from signing import RequestSigner
+from strategy import MarketMakingStrategy
+from scan_markets import MarketColumns, rank_markets
+from quoting import QuoteEngine, compute_quote
+from synthetic_feed import PROFILES, generate_frames
+from ws_messages import MessageDecoder
+
+# Offline benchmarks for each hot-path stage, run against synthetic thin/deep/churn books.
+#   python bench_suite.py                      # run and write bench_results.json
+#   python bench_suite.py --save-baseline      # also store the results as the baseline
+#   python bench_suite.py --baseline b.json    # fail (exit 1) on regressions vs a baseline
+
+TICKER = "SYNTH"
+
+class NullClient:
+    # Accepts orders instantly so quote computation is measured without I/O
+    def __init__(self):
+        self.n = 0
+
+    async def create_order(self, ticker, action, count, price, side="yes"):
+        self.n += 1
+        return {'order': {'order_id': str(self.n)}}
+
+    async def cancel_order(self, order_id):
+        return {}
+
+    async def amend_order(self, order_id, ticker, action, count, price, side="yes", client_order_id=None):
+        return await self.create_order(ticker, action, count, price, side)
+
+    async def batch_create_orders(self, orders):
+        return {'orders': [await self.create_order(o['ticker'], o['action'], o['count'], 0) for o in orders]}
+
+def timeit(fn, n: int, repeat: int = 5):
+    # Best-of-`repeat` wall time for n calls of fn(i); returns ns per op
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn(n)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / n
+
+def make_service(frames):
+    config = Config(API_KEY="bench", TARGET_TICKER=TICKER)
+    md = MarketDataService(config, market_tickers=[TICKER])
+    md.dispatcher.autostart = False # measure the book update, not listener scheduling
+    md._on_frame(frames[0])
+    return config, md
+
+def book_bodies(md, frames):
+    return [md.decoder.decode(f).msg for f in frames]
+
+def bench_decode(frames):
+    decode = MessageDecoder().decode
+    def run(n):
+        for i in range(n):
+            decode(frames[i % len(frames)])
+    return run
+
+def bench_process_delta(frames):
+    _, md = make_service(frames)
+    msgs = book_bodies(md, frames[1:])
+    def run(n):
+        process = md._process_delta
+        for i in range(n):
+            process(msgs[i % len(msgs)])
+    return run
+
+def bench_frame(frames, instrumented: bool):
+    # Raw frame -> decode -> book apply, with stage metrics on or off (the difference is
+    # the instrumentation overhead per frame)
+    _, md = make_service(frames)
+    body = frames[1:]
+    def run(n):
+        enabled = metrics.enabled
+        metrics.enabled = instrumented
+        try:
+            on_frame = md._on_frame
+            for i in range(n):
+                if i % len(body) == 0:
+                    on_frame(frames[0]) # seq restarts with the snapshot when the feed wraps
+                on_frame(body[i % len(body)])
+        finally:
+            metrics.enabled = enabled
+    return run
+
+def bench_metrics_observe():
+    def run(n):
+        hist = metrics.histogram("bench")
+        for i in range(n):
+            hist.record(1000 + i)
+    return run
+
+def bench_book_queries(frames):
+    _, md = make_service(frames)
+    for msg in book_bodies(md, frames[1:]):
+        md._process_delta(msg)
+    def run(n):
+        for _ in range(n):
+            md.get_best_prices(TICKER)
+            md.get_imbalance(TICKER)
+    return run
+
+def bench_quote(frames):
+    config, md = make_service(frames)
+    msgs = book_bodies(md, frames[1:])
+    strategy = MarketMakingStrategy(config, NullClient(), md, ticker=TICKER)
+    async def loop(n):
+        for i in range(n):
+            md._process_delta(msgs[i % len(msgs)])
+            await strategy.on_market_update()
+            await strategy.wait_for_quotes() # legs run as tasks; finish them inside the op
+    def run(n):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(loop(n))
+    return run
+
+def bench_sign(signer):
+    def run(n):
+        for i in range(n):
+            signer.auth_headers("POST", "/trade-api/v2/portfolio/orders")
+    return run
+
+def bench_serialize():
+    def run(n):
+        dumps = json.dumps
+        for i in range(n):
+            dumps(order_payload(TICKER, "buy", 2, 1 + i % 99, side="yes" if i & 1 else "no"))
+    return run
+
+def bench_scan(num_markets: int = 50000):
+    # Columnar load + vectorized filter/rank of a full synthetic universe; one op per market
+    import random
+    rng = random.Random(5)
+    markets = []
+    for i in range(num_markets):
+        bid = rng.randint(0, 99)
+        markets.append({
+            'ticker': f"MKT-{i}", 'title': "", 'yes_bid': bid, 'yes_ask': min(100, bid + rng.randint(0, 20)),
+            'volume': rng.randint(0, 5000), 'open_interest': rng.randint(0, 10000), 'liquidity': rng.randint(0, 200000)
+        })
+    pages = [markets[i:i + 1000] for i in range(0, num_markets, 1000)]
+    def run(n):
+        for _ in range(max(1, n // num_markets)):
+            rank_markets(MarketColumns.from_pages(pages), k=10)
+    return run
+
+def quote_inputs(num_markets: int):
+    import random
+    import numpy as np
+    rng = random.Random(9)
+    bid = np.array([rng.randint(1, 90) for _ in range(num_markets)])
+    ask = bid + np.array([rng.randint(1, 9) for _ in range(num_markets)])
+    imbalance = np.array([rng.uniform(-1, 1) for _ in range(num_markets)])
+    position = np.array([rng.randint(-500, 500) for _ in range(num_markets)])
+    return bid, ask, imbalance, position
+
+def bench_quote_scalar(num_markets: int = 1000):
+    # Per-market quote math as the strategy runs it; one op per market
+    config = Config(API_KEY="bench", SPREAD_CENTS=2)
+    columns = [a.tolist() for a in quote_inputs(num_markets)]
+    rows = list(zip(*columns))
+    def run(n):
+        for _ in range(max(1, n // num_markets)):
+            for bid, ask, imbalance, position in rows:
+                compute_quote(bid, ask, imbalance, position, config.SPREAD_CENTS, config.INVENTORY_SKEW_PER_100, config.IMBALANCE_ALPHA)
+    return run
+
+def bench_quote_batch(num_markets: int = 1000):
+    # The same markets through the vectorized engine in one pass; one op per market
+    bid, ask, imbalance, position = quote_inputs(num_markets)
+    engine = QuoteEngine.from_config(Config(API_KEY="bench", SPREAD_CENTS=2), [f"MKT-{i}" for i in range(num_markets)])
+    def run(n):
+        for _ in range(max(1, n // num_markets)):
+            engine.update(bid, ask, imbalance, position)
+    return run
+
+def throwaway_signer():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return RequestSigner("bench", pem)
+
+def run_suite(n: int, quick: bool = False):
+    results = {}
+    def record(name, ns):
+        results[name] = {"ns_per_op": round(ns, 1), "ops_per_sec": round(1e9 / ns, 1)}
+        print(f"{name:32s} {ns:12,.0f} ns/op {1e9 / ns:14,.0f} ops/s")
+
+    for profile in PROFILES:
+        frames = generate_frames(profile, 20000, ticker=TICKER)
+        record(f"decode/{profile}", timeit(bench_decode(frames), n))
+        record(f"process_delta/{profile}", timeit(bench_process_delta(frames), n))
+        record(f"frame/{profile}", timeit(bench_frame(frames, True), n))
+        record(f"frame_no_metrics/{profile}", timeit(bench_frame(frames, False), n))
+        record(f"book_queries/{profile}", timeit(bench_book_queries(frames), n))
+        record(f"quote/{profile}", timeit(bench_quote(frames), n // 10, repeat=3))
+
+    record("serialize_order", timeit(bench_serialize(), n))
+    record("metrics_observe", timeit(bench_metrics_observe(), n))
+    record("scan_rank_per_market", timeit(bench_scan(), 50000, repeat=3))
+    record("quote_scalar_per_market", timeit(bench_quote_scalar(), 100000, repeat=3))
+    record("quote_batch_per_market", timeit(bench_quote_batch(), 100000, repeat=3))
+    if not quick:
+        signer = throwaway_signer()
+        record("sign_headers", timeit(bench_sign(signer), 200, repeat=3))
+    return results
+
+def compare(results, baseline, tolerance: float):
+    # A stage regresses when it is slower than baseline by more than `tolerance`
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        cur = results.get(name)
+        if cur is None:
+            continue
+        change = cur["ns_per_op"] / base["ns_per_op"] - 1
+        flag = "REGRESSION" if change > tolerance else ""
+        print(f"{name:32s} {base['ns_per_op']:10,.0f} -> {cur['ns_per_op']:10,.0f} ns/op ({change:+.1%}) {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path benchmark suite")
+    parser.add_argument("-n", type=int, default=50000, help="operations per measurement")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown vs baseline")
+    parser.add_argument("--quick", action="store_true", help="skip RSA signing")
+    args = parser.parse_args()
+
+    results = run_suite(args.n, quick=args.quick)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "timestamp": int(time.time())
+        },
+        "results": results
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparing against {args.baseline} (tolerance {args.tolerance:.0%})")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,97 @@
-import json
 import time
-import base64
-import requests
 from config import Config
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
-from cryptography.exceptions import InvalidSignature
+from signing import RequestSigner
+from metrics import metrics
+
+def order_payload(ticker: str, action: str, count: int, price: int, side: str = "yes"):
+    # action: "buy" or "sell"
+    # price: in cents. If side="no", this is the price of the NO contract.
+    data = {
+        "action": action,
+        "count": count,
+        "type": "limit",
+        "ticker": ticker,
+        "side": side,
+        "client_order_id": str(int(time.time() * 1000000))
+    }
+
+    if side == "yes":
+        data["yes_price"] = price
+    else:
+        data["no_price"] = price
+    return data
+
+def amend_payload(ticker: str, action: str, count: int, price: int, side: str = "yes", client_order_id: str = None):
+    # Amend keeps the order (and its id) and moves price/count in one request.
+    # client_order_id identifies the order being amended, updated_client_order_id is its new one.
+    data = order_payload(ticker, action, count, price, side)
+    data.pop("type")
+    data["updated_client_order_id"] = data["client_order_id"]
+    data["client_order_id"] = client_order_id or data["client_order_id"]
+    return data
+
+def decrease_payload(reduce_by: int = None, reduce_to: int = None):
+    if reduce_by is not None:
+        return {"reduce_by": reduce_by}
+    return {"reduce_to": reduce_to}
+
+def market_query(limit: int = 100, status: str = "open", cursor: str = None, min_close_ts: int = None, max_close_ts: int = None,
+                 min_updated_ts: int = None):
+    # Query params for GET /markets; unset filters (status=None included) are left out
+    params = {"limit": limit}
+    if status:
+        params["status"] = status
+    if cursor:
+        params["cursor"] = cursor
+    if min_close_ts is not None:
+        params["min_close_ts"] = min_close_ts
+    if max_close_ts is not None:
+        params["max_close_ts"] = max_close_ts
+    if min_updated_ts is not None:
+        params["min_updated_ts"] = min_updated_ts
+    return params
+
+def orders_query(ticker: str = None, status: str = "resting", limit: int = 100, cursor: str = None):
+    # Query params for GET /portfolio/orders
+    params = {"limit": limit}
+    if ticker:
+        params["ticker"] = ticker
+    if status:
+        params["status"] = status
+    if cursor:
+        params["cursor"] = cursor
+    return params
+
+def quote_key(pairs):
+    # Scheduler key of a create/amend for these (ticker, side) pairs: a newer request with the
+    # same key replaces one still queued (AsyncKalshiClient), and the strategy can withdraw it
+    return ("quote",) + tuple(sorted(pairs))
+
+class OrderNotFound(Exception):
+    # The exchange no longer has this order resting (filled, cancelled or never placed). Only this
+    # error means an order is gone; on timeouts, 429s or 5xx it may still be live.
+    status = 404
+
+def order_not_found(endpoint: str, status: int) -> bool:
+    return status == 404 and endpoint.startswith("/portfolio/orders/")
 
 class KalshiClient:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, signer: RequestSigner = None):
         self.config = config
         self.base_url = config.API_BASE_URL
+        # Imported here: only the sync client uses requests, the async trading path never loads it
+        import requests
         self.session = requests.Session()
-        self.private_key = self._load_private_key()
-
-    def _load_private_key(self):
-        with open(self.config.PRIVATE_KEY_PATH, "rb") as key_file:
-            private_key = serialization.load_pem_private_key(
-                key_file.read(),
-                password=None
-            )
-        return private_key
+        self._http_error = requests.exceptions.HTTPError
+        # The signer owns the loaded private key; share one across clients and the WS feed
+        self.signer = signer or RequestSigner.from_config(config)
+        self.private_key = self.signer.private_key
 
     def _sign_pss_text(self, text: str) -> str:
-        message = text.encode('utf-8')
-        try:
-            signature = self.private_key.sign(
-                message,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.DIGEST_LENGTH
-                ),
-                hashes.SHA256()
-            )
-            return base64.b64encode(signature).decode('utf-8')
-        except InvalidSignature as e:
-            raise ValueError("RSA sign PSS failed") from e
+        return self.signer.sign(text)
 
     def get_auth_headers(self, method: str, path: str):
-        timestamp = str(int(time.time() * 1000))
-        # Strip query parameters for signature
-        path_without_query = path.split('?')[0]
-        msg_string = timestamp + method + path_without_query
-        signature = self._sign_pss_text(msg_string)
-        
-        return {
-            'KALSHI-ACCESS-KEY': self.config.KEY_ID,
-            'KALSHI-ACCESS-SIGNATURE': signature,
-            'KALSHI-ACCESS-TIMESTAMP': timestamp,
-            'Content-Type': 'application/json'
-        }
+        return self.signer.auth_headers(method, path)
 
     def request(self, method: str, endpoint: str, params=None, data=None):
         url = f"{self.base_url}{endpoint}"
@@ -62,7 +104,11 @@ class KalshiClient:
         path_for_signing = parsed.path
         
         headers = self.get_auth_headers(method, path_for_signing)
-        
+
+        sent = 0
+        if metrics.enabled:
+            sent = time.perf_counter_ns()
+            metrics.since_origin("tick_to_trade", sent)
         response = self.session.request(
             method, 
             url, 
@@ -70,47 +116,59 @@ class KalshiClient:
             json=data, 
             headers=headers
         )
+        if sent:
+            received = time.perf_counter_ns()
+            metrics.observe("http_response", received - sent)
+            metrics.since_origin("tick_to_ack", received)
         
         try:
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.HTTPError as e:
+        except self._http_error as e:
             print(f"API Error: {e}")
             print(f"Response: {response.text}")
+            if order_not_found(endpoint, response.status_code):
+                raise OrderNotFound(f"{method} {endpoint}: order not found") from e
             raise
 
     def get_market(self, ticker: str):
         return self.request("GET", f"/markets/{ticker}")
 
-    def get_markets(self, limit: int = 100, status: str = "open"):
-        return self.request("GET", "/markets", params={"limit": limit, "status": status})
+    def get_markets(self, limit: int = 100, status: str = "open", cursor: str = None, min_close_ts: int = None, max_close_ts: int = None,
+                    min_updated_ts: int = None):
+        params = market_query(limit, status, cursor, min_close_ts, max_close_ts, min_updated_ts)
+        return self.request("GET", "/markets", params=params)
 
     def get_balance(self):
         return self.request("GET", "/portfolio/balance")
 
     def create_order(self, ticker: str, action: str, count: int, price: int, side: str = "yes"):
-        # action: "buy" or "sell"
-        # price: in cents. If side="no", this is the price of the NO contract.
-        
-        data = {
-            "action": action,
-            "count": count,
-            "type": "limit",
-            "ticker": ticker,
-            "side": side,
-            "client_order_id": str(int(time.time() * 1000000))
-        }
-        
-        if side == "yes":
-            data["yes_price"] = price
-        else:
-            data["no_price"] = price
-            
+        data = order_payload(ticker, action, count, price, side)
         return self.request("POST", "/portfolio/orders", data=data)
 
     
-    def get_positions(self, limit: int = 100):
-        return self.request("GET", "/portfolio/positions", params={"limit": limit})
+    def get_positions(self, limit: int = 100, cursor: str = None):
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        return self.request("GET", "/portfolio/positions", params=params)
+
+    def get_orders(self, ticker: str = None, status: str = "resting", limit: int = 100, cursor: str = None):
+        return self.request("GET", "/portfolio/orders", params=orders_query(ticker, status, limit, cursor))
 
     def cancel_order(self, order_id: str):
         return self.request("DELETE", f"/portfolio/orders/{order_id}")
+
+    def amend_order(self, order_id: str, ticker: str, action: str, count: int, price: int, side: str = "yes", client_order_id: str = None):
+        data = amend_payload(ticker, action, count, price, side, client_order_id)
+        return self.request("POST", f"/portfolio/orders/{order_id}/amend", data=data)
+
+    def decrease_order(self, order_id: str, reduce_by: int = None, reduce_to: int = None):
+        return self.request("POST", f"/portfolio/orders/{order_id}/decrease", data=decrease_payload(reduce_by, reduce_to))
+
+    def batch_create_orders(self, orders):
+        # orders: list of order_payload(...) dicts; response "orders" is in request order
+        return self.request("POST", "/portfolio/orders/batched", data={"orders": orders})
+
+    def batch_cancel_orders(self, order_ids):
+        return self.request("DELETE", "/portfolio/orders/batched", data={"ids": list(order_ids)})
@@ -15,6 +15,85 @@ class Config(BaseSettings):
     TARGET_TICKER: str = Field(default="KXELONMARS-99", validation_alias="TARGET_TICKER") 
     SPREAD_CENTS: int = Field(default=2, validation_alias="SPREAD_CENTS")
     ORDER_SIZE: int = Field(default=2, validation_alias="ORDER_SIZE")
+    # Fair value = mid + IMBALANCE_ALPHA * imbalance - INVENTORY_SKEW_PER_100 * position / 100 (cents)
+    INVENTORY_SKEW_PER_100: float = Field(default=0.5, validation_alias="INVENTORY_SKEW_PER_100")
+    IMBALANCE_ALPHA: float = Field(default=2.0, validation_alias="IMBALANCE_ALPHA")
+    # "amend": reprice resting orders in place and batch new ones; "cancel_replace": legacy path
+    REQUOTE_MODE: str = Field(default="amend", validation_alias="REQUOTE_MODE")
+    # Requote policy (requote_policy.py), all 0 = reprice on every cent: keep a resting quote while
+    # the target is within the behind/ahead bands (cents), for REQUOTE_MIN_REST_MS after it was
+    # placed, or while the market's orders/second budget is spent
+    REQUOTE_BAND_BEHIND_CENTS: int = Field(default=0, validation_alias="REQUOTE_BAND_BEHIND_CENTS")
+    REQUOTE_BAND_AHEAD_CENTS: int = Field(default=0, validation_alias="REQUOTE_BAND_AHEAD_CENTS")
+    REQUOTE_MIN_REST_MS: float = Field(default=0, validation_alias="REQUOTE_MIN_REST_MS")
+    REQUOTE_MAX_ORDERS_PER_SECOND: float = Field(default=0, validation_alias="REQUOTE_MAX_ORDERS_PER_SECOND")
+
+    # Book signals: imbalance is depth-weighted over the top IMBALANCE_LEVELS cents of each side
+    # (1 = best level only); rolling mid/volatility decay with ANALYTICS_HALFLIFE_SECONDS
+    IMBALANCE_LEVELS: int = Field(default=5, validation_alias="IMBALANCE_LEVELS")
+    ANALYTICS_HALFLIFE_SECONDS: float = Field(default=30, validation_alias="ANALYTICS_HALFLIFE_SECONDS")
+    # Track depth-to-N (Fenwick tree) and the rolling mid stats on every delta; off, deltas only
+    # update the book and imbalance/microprice are computed when the strategy reads them
+    BOOK_SIGNALS_ENABLED: bool = Field(default=False, validation_alias="BOOK_SIGNALS_ENABLED")
+
+    # HTTP Configuration (async client)
+    HTTP_MAX_CONNECTIONS: int = Field(default=8, validation_alias="HTTP_MAX_CONNECTIONS")
+    HTTP_TIMEOUT_SECONDS: float = Field(default=5.0, validation_alias="HTTP_TIMEOUT_SECONDS")
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = Field(default=2.0, validation_alias="HTTP_CONNECT_TIMEOUT_SECONDS")
+
+    # Exchange REST rate limits (requests/second, 0 = unthrottled); see scheduler.py
+    RATE_LIMIT_READS_PER_SECOND: float = Field(default=20, validation_alias="RATE_LIMIT_READS_PER_SECOND")
+    RATE_LIMIT_WRITES_PER_SECOND: float = Field(default=10, validation_alias="RATE_LIMIT_WRITES_PER_SECOND")
+
+    # REST position check against the WS-fed ledger (drift reconciliation only)
+    RECONCILE_SECONDS: float = Field(default=300, validation_alias="RECONCILE_SECONDS")
+
+    # Request signing pool: "thread" or "process", 0 workers = one per core
+    SIGNING_MODE: str = Field(default="thread", validation_alias="SIGNING_MODE")
+    SIGNING_WORKERS: int = Field(default=0, validation_alias="SIGNING_WORKERS")
+
+    # Market universe cache: full rescan once older than the TTL, incremental refresh while trading
+    UNIVERSE_PATH: str = Field(default="market_universe.json", validation_alias="UNIVERSE_PATH")
+    UNIVERSE_TTL_SECONDS: float = Field(default=3600, validation_alias="UNIVERSE_TTL_SECONDS")
+    UNIVERSE_REFRESH_SECONDS: float = Field(default=60, validation_alias="UNIVERSE_REFRESH_SECONDS")
+    # Startup subscribes the top cached candidates while the market is still being picked (0 = off)
+    STARTUP_PRESUBSCRIBE: int = Field(default=3, validation_alias="STARTUP_PRESUBSCRIBE")
+
+    # WS JSON decoder: "msgspec", "orjson" or "json" (empty = fastest installed)
+    WS_JSON_BACKEND: str = Field(default="", validation_alias="WS_JSON_BACKEND")
+    # Reconnect backoff: doubles from the base up to the max, each wait jittered to 50-100%
+    WS_BACKOFF_BASE_SECONDS: float = Field(default=0.5, validation_alias="WS_BACKOFF_BASE_SECONDS")
+    WS_BACKOFF_MAX_SECONDS: float = Field(default=30, validation_alias="WS_BACKOFF_MAX_SECONDS")
+
+    # Stage latency histograms, off by default (timestamps on every frame and delta cost a
+    # measurable share of the hot path); METRICS_PORT serves Prometheus text on /metrics
+    # (0 = no endpoint), bound to METRICS_HOST (loopback unless a scraper on another host needs it)
+    METRICS_ENABLED: bool = Field(default=False, validation_alias="METRICS_ENABLED")
+    METRICS_HOST: str = Field(default="127.0.0.1", validation_alias="METRICS_HOST")
+    METRICS_PORT: int = Field(default=9108, validation_alias="METRICS_PORT")
+    METRICS_SUMMARY_SECONDS: float = Field(default=60, validation_alias="METRICS_SUMMARY_SECONDS")
+
+    # Event log (event_log.py): records at LOG_LEVEL+ go to LOG_PATH as JSON lines (empty = no
+    # file), LOG_CONSOLE_LEVEL+ are echoed to stdout, both from a background writer every LOG_FLUSH_MS.
+    # Per-tick events keep 1 in LOG_SAMPLE_EVERY; records beyond LOG_BUFFER_SIZE pending are dropped
+    LOG_PATH: str = Field(default="bot_events.log", validation_alias="LOG_PATH")
+    LOG_LEVEL: str = Field(default="INFO", validation_alias="LOG_LEVEL")
+    LOG_CONSOLE_LEVEL: str = Field(default="INFO", validation_alias="LOG_CONSOLE_LEVEL")
+    LOG_SAMPLE_EVERY: int = Field(default=100, validation_alias="LOG_SAMPLE_EVERY")
+    LOG_BUFFER_SIZE: int = Field(default=16384, validation_alias="LOG_BUFFER_SIZE")
+    LOG_FLUSH_MS: float = Field(default=200, validation_alias="LOG_FLUSH_MS")
+
+    # Supervisor mode: WORKERS > 1 shards the top SHARD_MARKETS markets across worker processes;
+    # books and positions are shared with the supervisor's monitor, printed every MONITOR_SECONDS
+    WORKERS: int = Field(default=1, validation_alias="WORKERS")
+    SHARD_MARKETS: int = Field(default=20, validation_alias="SHARD_MARKETS")
+    MONITOR_SECONDS: float = Field(default=10, validation_alias="MONITOR_SECONDS")
+
+    # Memory-mapped state file (books, our resting orders, positions) for warm restarts (empty = off)
+    STATE_PATH: str = Field(default="bot_state.bin", validation_alias="STATE_PATH")
+
+    # Append raw WS frames to this file for replay/backtesting (empty = off)
+    RECORD_PATH: str = Field(default="", validation_alias="RECORD_PATH")
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,107 @@
+import asyncio
+from event_log import events
+from metrics import metrics, origin_ns
+
+class ConflatingDispatcher:
+    # Sits between market data and the strategy. Book updates only mark a ticker dirty;
+    # at most one evaluation per ticker runs at a time, and when it finishes it re-runs
+    # once if anything arrived meanwhile. A burst of N deltas therefore costs one or two
+    # evaluations, each reading the latest book.
+    def __init__(self, handler, autostart: bool = True):
+        self.handler = handler # async handler(ticker)
+        # With autostart off, notify() only marks tickers dirty and the owner runs the
+        # evaluations inline via flush() (replays use this to skip task scheduling).
+        self.autostart = autostart
+        # Optional prepare(tickers): markets are then evaluated in batches by one task, and
+        # prepare() sees every batch before its markets are evaluated (batched quoting)
+        self.prepare = None
+        self._batch = None # task running batches
+        self._running = {} # ticker -> task
+        self._dirty = set()
+        # Evaluations only: messages are counted where frames arrive (MarketDataService),
+        # since notify() is also called for fills, retries and position changes
+        self.evaluations_run = 0
+        self.evaluations_by_ticker = {}
+        self._since = {} # ticker -> receive time of the oldest frame not yet evaluated
+
+    def notify(self, ticker: str, ts: int = None):
+        # ts: perf_counter_ns when the triggering frame arrived (dispatch_wait, metrics on only)
+        if ts is not None and metrics.enabled and ticker not in self._since:
+            self._since[ticker] = ts
+        self._dirty.add(ticker)
+        if not self.autostart:
+            return
+        if self.prepare is not None:
+            if self._batch is None:
+                self._batch = asyncio.create_task(self._run_batches())
+        elif ticker not in self._running:
+            self._running[ticker] = asyncio.create_task(self._run(ticker))
+
+    async def _evaluate(self, ticker: str):
+        since = self._since.pop(ticker, None)
+        token = None
+        if since is not None:
+            metrics.since("dispatch_wait", since)
+            token = origin_ns.set(since) # inherited by the order tasks this evaluation spawns
+        try:
+            await self.handler(ticker)
+        except Exception as e:
+            events.error("listener_error", ticker=ticker, error=e)
+        finally:
+            if token is not None:
+                origin_ns.reset(token)
+        self.evaluations_run += 1
+        self.evaluations_by_ticker[ticker] = self.evaluations_by_ticker.get(ticker, 0) + 1
+
+    async def _run(self, ticker: str):
+        try:
+            while ticker in self._dirty:
+                self._dirty.discard(ticker)
+                await self._evaluate(ticker)
+        finally:
+            self._running.pop(ticker, None)
+
+    async def _evaluate_batch(self, tickers):
+        self._dirty.difference_update(tickers)
+        self.prepare(tickers)
+        for ticker in tickers:
+            await self._evaluate(ticker)
+
+    async def _run_batches(self):
+        # Markets marked dirty during a batch make up the next one
+        try:
+            while self._dirty:
+                await self._evaluate_batch(list(self._dirty))
+        finally:
+            self._batch = None
+
+    async def flush(self):
+        # Run every pending evaluation inline in the caller's task
+        # (tickers with a task in flight are left to that task)
+        if self.prepare is not None:
+            while self._dirty and self._batch is None:
+                await self._evaluate_batch(list(self._dirty))
+            return
+        pending = [t for t in self._dirty if t not in self._running]
+        while pending:
+            for ticker in pending:
+                self._dirty.discard(ticker)
+                await self._evaluate(ticker)
+            pending = [t for t in self._dirty if t not in self._running]
+
+    def discard(self, ticker: str):
+        # Drop pending work for a market that is no longer subscribed
+        self._dirty.discard(ticker)
+        self._since.pop(ticker, None)
+
+    async def drain(self):
+        # Wait until every in-flight evaluation has finished
+        while self._running or self._batch is not None:
+            tasks = list(self._running.values()) + ([self._batch] if self._batch is not None else [])
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "evaluations_run": self.evaluations_run,
+            "by_ticker": dict(self.evaluations_by_ticker)
+        }
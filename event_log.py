@@ -0,0 +1,170 @@
+import json
+import sys
+import threading
+import time
+
+# Structured event log for the trading path. Call sites only append a record to a
+# preallocated ring buffer (level check, clock read, one slot store: no formatting, no I/O);
+# a background thread flushes batches to a JSON-lines file and echoes them to the console.
+#   events.info("placed", ticker=t, side="yes", price=40)
+#   events.tick("market", ticker=t, bid=40, ask=45) # per-tick: 1 in LOG_SAMPLE_EVERY kept
+# A full buffer (writer behind) drops new records and counts them in `dropped`; the writer
+# then logs a `log_dropped` record with the number lost since the last one.
+# Records are appended from the event loop thread; the writer thread only consumes.
+
+DEBUG, INFO, WARN, ERROR, OFF = 10, 20, 30, 40, 100
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARN": WARN, "ERROR": ERROR, "OFF": OFF}
+LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+
+def parse_level(name: str) -> int:
+    try:
+        return LEVELS[name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown log level {name!r} (expected one of {', '.join(LEVELS)})") from None
+
+def format_record(ts_ns: int, level: int, event: str, fields) -> str:
+    # Console line: wall-clock time, level, event and its fields as key=value
+    clock = time.strftime("%H:%M:%S", time.localtime(ts_ns // 1_000_000_000))
+    pairs = " ".join(f"{k}={v}" for k, v in fields.items())
+    return f"{clock}.{ts_ns // 1_000_000 % 1000:03d} {LEVEL_NAMES[level]:5s} {event} {pairs}".rstrip()
+
+def encode_record(ts_ns: int, level: int, event: str, fields) -> str:
+    # File line: one compact JSON object (non-JSON values such as exceptions as str)
+    return json.dumps({"ts": ts_ns, "level": LEVEL_NAMES[level], "event": event, **fields},
+                      separators=(",", ":"), default=str)
+
+class EventLog:
+    def __init__(self, capacity: int = 1 << 14, level: int = INFO, console_level: int = INFO,
+                 sample_every: int = 100, flush_seconds: float = 0.2):
+        self._allocate(capacity)
+        self.level = level
+        self.console_level = console_level
+        self.sample_every = max(1, sample_every)
+        self.flush_seconds = flush_seconds
+        self.dropped = 0 # records lost to a full buffer
+        self.written = 0 # records flushed
+        self._reported_drops = 0
+        self._ticks = {} # event -> calls, for sampling
+        self.file = None
+        self.console = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = False
+
+    def _allocate(self, capacity: int):
+        # Power-of-two ring: slot = sequence & mask. head/tail are running sequence numbers
+        size = 1 << max(1, capacity - 1).bit_length()
+        self.slots = [None] * size
+        self.mask = size - 1
+        self.head = 0 # next record to write (event loop)
+        self.tail = 0 # next record to flush (writer)
+        self._wake_at = size // 2 # wake the writer early once half full
+
+    def configure(self, config):
+        self.level = parse_level(config.LOG_LEVEL)
+        self.console_level = parse_level(config.LOG_CONSOLE_LEVEL)
+        self.sample_every = max(1, config.LOG_SAMPLE_EVERY)
+        self.flush_seconds = config.LOG_FLUSH_MS / 1000
+        if self.head == self.tail and config.LOG_BUFFER_SIZE != len(self.slots):
+            self._allocate(config.LOG_BUFFER_SIZE)
+
+    # --- hot path ---
+
+    def emit(self, level: int, event: str, fields):
+        if level < self.level:
+            return
+        head = self.head
+        pending = head - self.tail
+        if pending > self.mask:
+            self.dropped += 1
+            return
+        self.slots[head & self.mask] = (time.time_ns(), level, event, fields)
+        self.head = head + 1
+        if pending == self._wake_at:
+            self._wake.set()
+
+    def debug(self, event: str, **fields):
+        self.emit(DEBUG, event, fields)
+
+    def info(self, event: str, **fields):
+        self.emit(INFO, event, fields)
+
+    def warn(self, event: str, **fields):
+        self.emit(WARN, event, fields)
+
+    def error(self, event: str, **fields):
+        self.emit(ERROR, event, fields)
+
+    def tick(self, event: str, **fields):
+        # Per-tick events (every book update): INFO, but only 1 in `sample_every` is kept
+        if INFO < self.level:
+            return
+        n = self._ticks.get(event, 0)
+        self._ticks[event] = n + 1
+        if n % self.sample_every == 0:
+            self.emit(INFO, event, fields)
+
+    # --- writer ---
+
+    def start(self, path: str = None, console=sys.stdout):
+        # Flushes to `path` (appended; None = console only) from a daemon thread
+        if self._thread is not None:
+            return
+        self.file = open(path, "a", buffering=1 << 16, encoding="utf-8") if path else None
+        self.console = console
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        # Drains everything appended so far in one batch per output
+        head = self.head
+        tail = self.tail
+        records = []
+        for seq in range(tail, head):
+            index = seq & self.mask
+            records.append(self.slots[index])
+            self.slots[index] = None
+        self.tail = head
+        if self.dropped != self._reported_drops:
+            lost = self.dropped - self._reported_drops
+            self._reported_drops = self.dropped
+            records.append((time.time_ns(), WARN, "log_dropped", {"count": lost, "total": self.dropped}))
+        if not records:
+            return
+        if self.file is not None:
+            self.file.write("".join(encode_record(*r) + "\n" for r in records))
+            self.file.flush()
+        if self.console is not None:
+            lines = [format_record(*r) + "\n" for r in records if r[1] >= self.console_level]
+            if lines:
+                self.console.write("".join(lines))
+                self.console.flush()
+        self.written += len(records)
+
+    def stop(self):
+        # Flushes what is left and closes the file
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def read_events(path: str):
+    # Records of a log file as dicts
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Process-wide log; main.py applies the LOG_* settings and starts the writer
+events = EventLog()
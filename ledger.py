@@ -0,0 +1,130 @@
+import asyncio
+from collections import deque
+
+class Ledger:
+    # Local order and position book kept current from the authenticated WS channels
+    # (`fill` and `market_positions`), so inventory is known the moment a fill happens.
+    # Positions are net YES contracts per market: YES holdings positive, NO negative.
+    # REST positions are only used to reconcile drift (see reconcile()).
+    def __init__(self, max_trade_ids: int = 10000):
+        self.positions = {} # ticker -> net position
+        self.orders = {} # order_id -> {'ticker', 'side', 'action', 'price', 'remaining', 'status'}
+        self.fills = 0
+        self.listeners = [] # callback(fill) on every market
+        self.ticker_listeners = {} # ticker -> callbacks for that market only
+        self.position_listeners = [] # callback(ticker, position) whenever a position changes
+        self.ticker_position_listeners = {} # ticker -> position callbacks for that market only
+        # Fills can be replayed after a resubscribe; drop duplicates by trade id
+        self._trade_ids = set()
+        self._trade_order = deque(maxlen=max_trade_ids)
+
+    def add_listener(self, callback, ticker: str = None):
+        if ticker is None:
+            self.listeners.append(callback)
+        else:
+            self.ticker_listeners.setdefault(ticker, []).append(callback)
+
+    def add_position_listener(self, callback, ticker: str = None):
+        if ticker is None:
+            self.position_listeners.append(callback)
+        else:
+            self.ticker_position_listeners.setdefault(ticker, []).append(callback)
+
+    def position(self, ticker: str) -> int:
+        return self.positions.get(ticker, 0)
+
+    def restore(self, ticker: str, position: int):
+        # Last known position from a state file; any WS update or REST reconcile overrides it
+        if ticker not in self.positions:
+            self.positions[ticker] = position
+
+    # --- Orders placed by us (from REST responses) ---
+
+    def track_order(self, order_id: str, ticker: str, side: str, action: str, price: int, count: int):
+        self.orders[order_id] = {
+            'ticker': ticker, 'side': side, 'action': action,
+            'price': price, 'remaining': count, 'status': "resting"
+        }
+
+    def forget_order(self, order_id: str):
+        self.orders.pop(order_id, None)
+
+    def is_resting(self, order_id: str) -> bool:
+        order = self.orders.get(order_id)
+        return order is not None and order['status'] == "resting"
+
+    # --- WS messages ---
+
+    def _seen(self, trade_id) -> bool:
+        if trade_id is None:
+            return False
+        if trade_id in self._trade_ids:
+            return True
+        if len(self._trade_order) == self._trade_order.maxlen:
+            self._trade_ids.discard(self._trade_order[0])
+        self._trade_order.append(trade_id)
+        self._trade_ids.add(trade_id)
+        return False
+
+    def on_fill(self, msg):
+        # msg: market_ticker, order_id, trade_id, side, action, count, yes_price/no_price, post_position
+        if self._seen(msg.get('trade_id')):
+            return None
+        ticker = msg.get('market_ticker')
+        side = msg.get('side', "yes")
+        action = msg.get('action', "buy")
+        count = msg.get('count', 0)
+        if msg.get('post_position') is not None:
+            self._set_position(ticker, msg['post_position']) # exchange's position after this fill
+        else:
+            # Buying YES or selling NO adds YES exposure
+            sign = 1 if (side == "yes") == (action == "buy") else -1
+            self._set_position(ticker, self.positions.get(ticker, 0) + sign * count)
+        order = self.orders.get(msg.get('order_id'))
+        if order is not None:
+            order['remaining'] = max(0, order['remaining'] - count)
+            if order['remaining'] == 0:
+                order['status'] = "executed"
+        self.fills += 1
+        fill = {
+            'ticker': ticker,
+            'order_id': msg.get('order_id'),
+            'side': side,
+            'action': action,
+            'count': count,
+            'price': msg.get('yes_price') if side == "yes" else msg.get('no_price'),
+            'remaining': order['remaining'] if order is not None else None
+        }
+        self._notify(ticker, fill)
+        return fill
+
+    def on_market_position(self, msg):
+        # Authoritative snapshot of one market's position, pushed on every change
+        ticker = msg.get('market_ticker')
+        if ticker is not None and msg.get('position') is not None:
+            self._set_position(ticker, msg['position'])
+
+    def _set_position(self, ticker, position):
+        self.positions[ticker] = position
+        for callback in self.position_listeners + self.ticker_position_listeners.get(ticker, []):
+            callback(ticker, position)
+
+    def _notify(self, ticker, fill):
+        for callback in self.listeners + self.ticker_listeners.get(ticker, []):
+            result = callback(fill)
+            if asyncio.iscoroutine(result):
+                asyncio.create_task(result)
+
+    # --- REST reconciliation ---
+
+    def reconcile(self, market_positions):
+        # Overwrite local positions with the REST view; returns {ticker: (local, remote)} for
+        # every market that disagreed. Markets missing from REST are flat.
+        remote = {p['ticker']: p.get('position', 0) for p in market_positions if p.get('ticker')}
+        drift = {}
+        for ticker in set(remote) | set(self.positions):
+            local, actual = self.positions.get(ticker, 0), remote.get(ticker, 0)
+            if local != actual:
+                drift[ticker] = (local, actual)
+                self._set_position(ticker, actual)
+        return drift
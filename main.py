@@ -1,19 +1,62 @@
+import time
+STARTED = time.perf_counter() # origin of the startup timeline, before the imports below
 import asyncio
 from config import load_config
-from client import KalshiClient
+from signing import RequestSigner
 from market_data import MarketDataService
-from strategy import MarketMakingStrategy
-from scan_markets import find_best_market
+from recorder import FeedRecorder
+from ledger import Ledger
+from metrics import metrics
+from event_log import events
+from startup import StartupTimer, import_trading_modules, read_universe_cache, watch_first_quote
 import sys
 
+async def connect_feed(timer, market_data, key):
+    # The handshake is signed, so it starts the moment the key is loaded
+    market_data.signer = await key
+    feed = asyncio.create_task(market_data.start())
+    await timer.run("ws handshake", market_data.connected.wait())
+    return feed
+
 async def main():
-    config = load_config()
-    client = KalshiClient(config)
-    
-    # Dynamic Market Selection
+    timer = StartupTimer(STARTED)
+    timer.phases["boot imports"] = (0.0, timer.now())
+    config = timer.timed("config", load_config)
+    metrics.enabled = config.METRICS_ENABLED
+    # Trading-path events go through the ring buffer; the writer thread does the file/console I/O
+    events.configure(config)
+    events.start(config.LOG_PATH or None)
+
+    # Independent startup work runs side by side (see startup.py): key load, the cached
+    # universe and the trading imports on threads, the WS handshake as soon as the key is in
+    key = timer.task("key load", asyncio.to_thread(RequestSigner.from_config, config))
+    cache = timer.task("universe cache", asyncio.to_thread(read_universe_cache, config))
+    imports = timer.task("trading imports", asyncio.to_thread(import_trading_modules))
+
+    recorder = FeedRecorder(config.RECORD_PATH) if config.RECORD_PATH else None
+    # Fills and positions are pushed over the WS into the ledger; REST only reconciles
+    ledger = Ledger()
+    # No markets yet: candidates are added as soon as the cache is read, the pick after selection
+    market_data = MarketDataService(config, market_tickers=[], recorder=recorder, ledger=ledger)
+    feed = asyncio.create_task(connect_feed(timer, market_data, key))
+
+    # Dynamic Market Selection (cached universe; full scan only when the cache is stale).
+    # The top candidates stream while the scan runs, so the winner usually has its book already.
+    universe = await cache
+    candidates = [m['ticker'] for m in universe.ranking[:config.STARTUP_PRESUBSCRIBE]]
+    await market_data.subscribe(candidates)
+    await imports
+    from market_universe import scan_if_stale
+    from async_client import AsyncKalshiClient
+    from shared_books import SharedBooks
+    from strategy import MarketMakingStrategy
+    signer = await key
+    # Orders go through the pooled async client so REST calls never block the WS feed
+    async_client = AsyncKalshiClient(config, signer=signer)
     print("Searching for best market...")
-    best_market = find_best_market(client)
-    
+    await timer.run("market scan", scan_if_stale(universe, async_client))
+
+    best_market = universe.ranking[0] if universe.ranking else None
     if best_market:
         ticker = best_market['ticker']
         print(f"Selected Market: {ticker} (Spread: {best_market['spread']}c)")
@@ -21,23 +64,56 @@ async def main():
         config.TARGET_TICKER = ticker
     else:
         print("No suitable market found. Using default/configured ticker.")
-    
+    timer.mark("market selected")
     print(f"Starting Market Maker for {config.TARGET_TICKER}")
-    
-    market_data = MarketDataService(config)
-    strategy = MarketMakingStrategy(config, client, market_data)
+    await market_data.unsubscribe([t for t in market_data.market_tickers if t != config.TARGET_TICKER])
+    await market_data.subscribe([config.TARGET_TICKER])
+    market_data.ticker = config.TARGET_TICKER
+
+    # Books, resting orders and the position are mirrored into a memory-mapped file; after a
+    # restart the strategy resumes from it once the orders are checked (see warm_start)
+    books = SharedBooks.open_file(config.STATE_PATH, [config.TARGET_TICKER]) if config.STATE_PATH else None
+    if books is not None:
+        ledger.position_listeners.append(books.update_position)
+        market_data.attach_shared(books)
+    strategy = MarketMakingStrategy(config, async_client, market_data, ledger=ledger)
+    asyncio.create_task(watch_first_quote(timer, market_data, strategy))
+    # Keep the universe and rankings fresh while trading
+    asyncio.create_task(universe.refresh_loop(async_client, config.UNIVERSE_REFRESH_SECONDS))
 
-    # Start WS in background
-    asyncio.create_task(market_data.connect()) 
-    # Logic in market_data.connect() needs to actually run the loop or be separate. 
-    # Ideally `start()` method is what runs the loop.
-    asyncio.create_task(market_data.start())
+    metrics_runner = None
+    if metrics.enabled:
+        dispatcher = market_data.dispatcher
+        metrics.gauge("ws_messages", lambda: market_data.messages_received)
+        metrics.gauge("evaluations", lambda: dispatcher.evaluations_run)
+        metrics.gauge("rest_calls", lambda: strategy.rest_calls)
+        metrics.gauge("net_position", lambda: strategy.net_position)
+        metrics.gauge("log_dropped", lambda: events.dropped)
+        asyncio.create_task(metrics.summary_loop(config.METRICS_SUMMARY_SECONDS))
+        if config.METRICS_PORT:
+            metrics_runner = await metrics.serve(config.METRICS_HOST, config.METRICS_PORT)
 
     # Start Strategy
-    await strategy.run()
+    try:
+        await strategy.run()
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await async_client.close()
+        signer.close()
+        if recorder is not None:
+            recorder.close()
+        if books is not None:
+            books.close()
+        events.stop()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if load_config().WORKERS > 1:
+            # One process per shard of markets, see supervisor.py
+            from supervisor import run_supervisor
+            run_supervisor(load_config())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("Stopping...")
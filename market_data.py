@@ -1,180 +1,459 @@
 import asyncio
 import json
+import random
+import time
 import websockets
 from config import Config
+from orderbook import OrderBook
+from analytics import BookAnalytics
+from signing import RequestSigner
+from dispatcher import ConflatingDispatcher
+from metrics import metrics
+from event_log import events
+import ws_messages
 
 class MarketDataService:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, signer: RequestSigner = None, market_tickers=None, recorder=None, ledger=None, shared=None):
         self.config = config
+        # Reuse the REST client's signer so the key is only loaded once
+        self.signer = signer
         self.url = config.WS_Url
-        self.ticker = config.TARGET_TICKER
-        self.orderbook = {"yes": {}, "no": {}}
-        self.listeners = []
+        # One socket carries every subscribed market; books are keyed by market_ticker
+        # (an empty list starts with no markets; startup subscribes them once they are chosen)
+        self.market_tickers = list(market_tickers) if market_tickers is not None else [config.TARGET_TICKER]
+        self.ticker = self.market_tickers[0] if self.market_tickers else config.TARGET_TICKER # default market for single-market callers
+        self.books = {t: OrderBook() for t in self.market_tickers}
+        # Book signals (see analytics.py); depth-to-N and rolling mid stats are only tracked
+        # per delta with BOOK_SIGNALS_ENABLED, imbalance and microprice are computed when read
+        self.track_signals = config.BOOK_SIGNALS_ENABLED
+        self.analytics = {t: self._new_analytics(b) for t, b in self.books.items()}
+        self.listeners = [] # notified on every market
+        self.ticker_listeners = {} # ticker -> callbacks for that market only
+        # Bursts of updates are conflated so listeners only ever see the latest book
+        self.dispatcher = ConflatingDispatcher(self._notify_listeners)
+        self.recorder = recorder # optional FeedRecorder capturing raw frames for replay
+        # Optional Ledger fed by the authenticated fill/market_positions channels
+        self.ledger = ledger
+        # Optional SharedBooks (attach_shared): every book update is mirrored into its slot
+        self.shared = None
         self.websocket = None
+        self.connected = asyncio.Event() # set while the socket is open
+        # One orderbook_delta subscription per market: seq is numbered per subscription, so a
+        # gap can be repaired by re-subscribing just that market on the live socket
+        self.sids = {} # ticker -> sid
+        self._last_seq = {} # sid -> last seq applied
+        self._cmd_id = 0
+        self._cmd_ticker = {} # subscribe command id -> ticker, until it is acknowledged
+        self._cmd_dropped = set() # subscribe command ids whose market was removed before the ack
+        # Books that must not be traded on: no snapshot yet, a gap was seen or the socket dropped
+        self.stale = set(self.market_tickers)
+        self.reconnects = 0
+        self.messages_received = 0 # WS messages of every type, see feed_stats()
+        # Receive time (perf_counter_ns) of the frame being processed, set with metrics or
+        # tracked signals on; replays set it to the recorded time
+        self.frame_ns = None
+        # Typed decoding with the fastest installed JSON backend, dispatched by message type.
+        # With the stdlib backend building typed objects costs more than it saves, so frames
+        # stay plain dicts and deltas are handled straight off them
+        self.decoder = ws_messages.MessageDecoder(config.WS_JSON_BACKEND or None)
+        if self.decoder.backend == "json":
+            self._decode, self._route = json.loads, self._dispatch_dict
+        else:
+            self._decode, self._route = self.decoder.decode, self._dispatch
+        self._handlers = {
+            "orderbook_snapshot": self._on_snapshot,
+            "orderbook_delta": self._on_delta,
+            "subscribed": self._on_subscribed,
+            "fill": self._on_fill,
+            "market_position": self._on_market_position,
+            "error": self._on_error,
+        }
+        self._decode_hist = metrics.histogram("decode")
+        self._apply_hist = metrics.histogram("book_apply")
+        metrics.gauge("stale_books", lambda: len(self.stale))
+        if shared is not None:
+            self.attach_shared(shared)
+
+    def _new_analytics(self, book):
+        return BookAnalytics(book, self.config.IMBALANCE_LEVELS, self.config.ANALYTICS_HALFLIFE_SECONDS,
+                             tracking=self.track_signals)
+
+    def attach_shared(self, shared):
+        # Books without a snapshot yet are restored from their slot; live ones are written
+        # through (startup can attach the state file after the socket is already streaming)
+        self.shared = shared
+        for t in self.market_tickers:
+            slot = shared.slots.get(t)
+            if slot is None:
+                continue
+            if t in self.stale:
+                self._restore_book(t)
+            else:
+                shared.write_book(slot, self.books[t])
+
+    def _restore_book(self, ticker: str):
+        # Last book the shared slot holds (previous run or worker). It stays stale, so nothing
+        # trades on it; the first snapshot replaces it.
+        slot = self.shared.slots.get(ticker)
+        if slot is None or not self.shared.updated_ns[slot]:
+            return
+        yes, no = self.shared.snapshot_levels(slot)
+        self.books[ticker].apply_snapshot(yes, no)
+        if self.track_signals:
+            self.analytics[ticker].on_snapshot()
+
+    @property
+    def orderbook(self):
+        return self.books.get(self.ticker)
+
+    def book(self, ticker: str = None):
+        return self.books.get(ticker or self.ticker)
+
+    def is_stale(self, ticker: str = None) -> bool:
+        return (ticker or self.ticker) in self.stale
+
+    def add_listener(self, callback, ticker: str = None):
+        if ticker is None:
+            self.listeners.append(callback)
+        else:
+            self.ticker_listeners.setdefault(ticker, []).append(callback)
+
+    def remove_listener(self, callback, ticker: str = None):
+        listeners = self.listeners if ticker is None else self.ticker_listeners.get(ticker, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    async def _send_cmd(self, cmd: str, params: dict, ticker: str = None):
+        self._cmd_id += 1
+        if ticker is not None:
+            self._cmd_ticker[self._cmd_id] = ticker
+        await self.websocket.send(json.dumps({"id": self._cmd_id, "cmd": cmd, "params": params}))
 
-    def add_listener(self, callback):
-        self.listeners.append(callback)
-
-    async def connect(self):
-        # WebSocket headers need signature too? 
-        # Documentation says: "API key authentication required for WebSocket connections. The API key should be provided during the WebSocket handshake."
-        # Usually this means we send a message after connecting, or query params?
-        # The docs say:
-        # { "id": 1, "cmd": "subscribe", ... }
-        # And also: "API key authentication required... provided during the WebSocket handshake"
-        # Wait, if it's during handshake, it's likely headers or query params.
-        # Let's check the doc reference again ideally.
-        # But commonly for Kalshi, it's a "login" message or headers.
-        # Wait, the `websocket-connection` chunk said: "API key authentication required... provided during the WebSocket handshake"
-        # Often this means standard headers if it's a library, or the `protocol` kwarg.
-        
-        # Let's try connecting without, if it fails, we know.
-        # Actually, browsing the docs again (mentally), Kalshi v2 requires signing the connection request?
-        # Or maybe it's just public data?
-        # "Learn how to access real-time market data without authentication" -> Quick Start says no auth needed for public market data?
-        # Quick Start Market Data says: "Start with an initial breakdown... without authentication"
-        # But WEBSOCKETS usually require it for trading? 
-        # Actually, let's assume public feed `orderbook_delta` MIGHT be public?
-        # If not, I'll need to sign the URL or headers.
-        
-        # Re-reading my research: "Step 3: Get Orderbook Data" in quick start was unauthenticated REST.
-        # WebSocket docs said: "API key authentication required...".
-        # So I probably need to sign.
-        
-        pass
+    async def _subscribe_book(self, ticker: str):
+        # The acknowledgement carries the sid; the snapshot follows on it
+        await self._send_cmd("subscribe", {"channels": ["orderbook_delta"], "market_tickers": [ticker]}, ticker)
+
+    async def subscribe(self, tickers):
+        # Add markets at runtime on the live socket (no reconnect)
+        new = [t for t in tickers if t not in self.books]
+        if not new:
+            return
+        for t in new:
+            self.market_tickers.append(t)
+            self.books[t] = OrderBook()
+            self.analytics[t] = self._new_analytics(self.books[t])
+            self.stale.add(t)
+        if self.websocket is None:
+            return # picked up by the initial subscribe on connect
+        for t in new:
+            await self._subscribe_book(t)
+
+    async def unsubscribe(self, tickers):
+        removed = [t for t in tickers if t in self.books]
+        if not removed:
+            return
+        sids = []
+        for t in removed:
+            self.market_tickers.remove(t)
+            del self.books[t]
+            self.analytics.pop(t, None)
+            self.ticker_listeners.pop(t, None)
+            self.stale.discard(t)
+            self.dispatcher.discard(t)
+            sid = self.sids.pop(t, None)
+            if sid is not None:
+                self._last_seq.pop(sid, None)
+                sids.append(sid)
+        # A subscribe still waiting for its ack has no sid to send yet; _on_subscribed drops it
+        for cmd_id, t in list(self._cmd_ticker.items()):
+            if t in removed:
+                del self._cmd_ticker[cmd_id]
+                self._cmd_dropped.add(cmd_id)
+        if self.websocket is not None and sids:
+            await self._send_cmd("unsubscribe", {"sids": sids})
+
+    def _mark_stale(self, tickers):
+        # Listeners are told so strategies pull their quotes until a fresh snapshot arrives
+        for t in tickers:
+            if t in self.books:
+                self.stale.add(t)
+                self.dispatcher.notify(t)
+                if self.shared is not None and t in self.shared.slots:
+                    self.shared.set_stale(self.shared.slots[t])
+
+    def _gap(self, sid: int, expected: int, got: int):
+        tickers = [t for t, s in self.sids.items() if s == sid]
+        events.warn("seq_gap", sid=sid, tickers=",".join(tickers), expected=expected, got=got) # resyncing
+        metrics.inc("ws_seq_gaps")
+        self._last_seq.pop(sid, None)
+        self._mark_stale(tickers)
+        # Detached from the sid right away: later frames on it are ignored until the next
+        # snapshot, even before the resync task runs
+        for t in tickers:
+            self.sids.pop(t, None)
+        if self.websocket is None:
+            return # offline replay: nothing to resubscribe on, the next snapshot clears it
+        for t in tickers:
+            asyncio.get_running_loop().create_task(self._resync(t, sid))
+
+    async def _resync(self, ticker: str, sid: int):
+        # Fresh snapshot for one market on the live socket: drop its old subscription `sid`
+        # and take a new one
+        if self.websocket is None:
+            return # offline replay, or the reconnect will resubscribe everything
+        metrics.inc("ws_resyncs")
+        try:
+            await self._send_cmd("unsubscribe", {"sids": [sid]})
+            await self._subscribe_book(ticker)
+        except Exception as e:
+            events.error("resync_failed", ticker=ticker, error=e)
 
     async def start(self):
-        # We'll use a loop to maintain connection
+        # Keeps the connection up; reconnects back off exponentially with jitter and
+        # resubscribe every market as soon as the socket is open
+        from urllib.parse import urlparse
+        attempt = 0
         while True:
+            connected_at = None
             try:
-                # Based on Kalshi V2 docs, auth is often via query params or headers on handshake.
-                # Constructing signed headers similar to REST
-                # But websockets library supports extra_headers.
-                
-                from urllib.parse import urlparse
-                from client import KalshiClient
-                
-                temp_client = KalshiClient(self.config)
+                if self.signer is None:
+                    self.signer = RequestSigner.from_config(self.config)
                 ws_path = urlparse(self.url).path
-                headers = temp_client.get_auth_headers("GET", ws_path)
+                headers = await self.signer.auth_headers_async("GET", ws_path)
 
-                # I'll re-use the signing logic from client if possible, or duplicate it here for now to avoid circular deps or complex refactoring.
-                # Actually, let's just use the `KalshiClient` to generate headers if I could. 
                 async with websockets.connect(self.url, additional_headers=headers) as websocket:
                     self.websocket = websocket
-                    print("Connected to WebSocket")
-                    
-                    # Subscribe
-                    sub_msg = {
-                        "id": 1,
-                        "cmd": "subscribe",
-                        "params": {
-                            "channels": ["orderbook_delta"],
-                            "market_ticker": self.ticker
-                        }
-                    }
-                    await websocket.send(json.dumps(sub_msg))
-                    
+                    self.connected.set()
+                    connected_at = time.monotonic()
+                    events.info("ws_connected", url=self.url)
+
+                    for t in list(self.market_tickers):
+                        await self._subscribe_book(t)
+                    if self.ledger is not None:
+                        # Account-wide channels: every fill and position change, pushed
+                        await self._send_cmd("subscribe", {"channels": ["fill", "market_positions"]})
+
                     async for message in websocket:
-                        data = json.loads(message)
-                        self._handle_message(data)
-                        
+                        try:
+                            self._on_frame(message)
+                        except Exception as e:
+                            # One bad frame must not cost the connection
+                            events.error("ws_frame_error", error=e)
+
             except Exception as e:
-                print(f"WebSocket connection dropped: {e}")
-                await asyncio.sleep(5)
+                events.warn("ws_dropped", error=e)
+            if self.recorder is not None:
+                self.recorder.flush()
+            self.websocket = None
+            self.connected.clear()
+            self.sids.clear()
+            self._last_seq.clear()
+            self._cmd_ticker.clear()
+            self._cmd_dropped.clear()
+            self._mark_stale(self.market_tickers)
+            self.reconnects += 1
+            metrics.inc("ws_reconnects")
+
+            # A connection that stayed up resets the backoff; one that flaps keeps growing it
+            if connected_at is not None and time.monotonic() - connected_at >= self.config.WS_BACKOFF_MAX_SECONDS:
+                attempt = 0
+            delay = min(self.config.WS_BACKOFF_MAX_SECONDS, self.config.WS_BACKOFF_BASE_SECONDS * 2 ** attempt)
+            delay = random.uniform(delay / 2, delay)
+            attempt += 1
+            events.info("ws_reconnecting", delay_s=round(delay, 2))
+            await asyncio.sleep(delay)
+
+    def _on_frame(self, message):
+        self.messages_received += 1
+        if self.recorder is not None:
+            self.recorder.write(message)
+        if not metrics.enabled:
+            if self.track_signals:
+                self.frame_ns = time.perf_counter_ns() # clock of the rolling mid stats
+            self._route(self._decode(message))
+            return
+        clock = time.perf_counter_ns
+        received = self.frame_ns = clock()
+        m = self._decode(message)
+        decoded = clock()
+        self._route(m)
+        self._decode_hist.record(decoded - received)
+        self._apply_hist.record(clock() - decoded)
+        self.frame_ns = None
+
+    def _dispatch(self, m):
+        handler = self._handlers.get(m.type)
+        if handler is not None:
+            handler(m)
+
+    def _dispatch_dict(self, data):
+        # stdlib json frames: deltas go straight to the book, everything else is typed first
+        if data.get("type") == "orderbook_delta":
+            self._on_delta_dict(data)
+        else:
+            self._dispatch(ws_messages.from_dict(data))
 
     def _handle_message(self, data):
-        msg_type = data.get("type")
-        msg = data.get("msg", {})
-
-        if msg_type == "subscribed":
-            print(f"Subscribed to {msg.get('channel')}")
-        elif msg_type == "orderbook_snapshot":
-            self._process_snapshot(msg)
-        elif msg_type == "orderbook_delta":
-            self._process_delta(msg)
-        elif msg_type == "error":
-             print(f"WS Error: {data}")
-
-    async def _notify_listeners(self):
-        for listener in self.listeners:
+        # Entry point for already-decoded dicts (tests and tools)
+        self.messages_received += 1
+        self._dispatch(ws_messages.from_dict(data))
+
+    def feed_stats(self):
+        # Messages received vs strategy evaluations run: the conflation ratio
+        stats = self.dispatcher.stats()
+        return {
+            "messages_received": self.messages_received,
+            "evaluations_run": stats["evaluations_run"],
+            "evaluations_saved": self.messages_received - stats["evaluations_run"],
+            "evaluations_by_ticker": stats["by_ticker"]
+        }
+
+    def _on_subscribed(self, m):
+        channel = m.msg.channel
+        ticker = self._cmd_ticker.pop(m.id, None)
+        if m.id in self._cmd_dropped:
+            # The market was unsubscribed before this ack: close the stream it opened
+            self._cmd_dropped.discard(m.id)
+            if self.websocket is not None:
+                asyncio.get_running_loop().create_task(self._send_cmd("unsubscribe", {"sids": [m.msg.sid]}))
+            return
+        if channel == "orderbook_delta" and ticker is not None:
+            if ticker in self.books:
+                self.sids[ticker] = m.msg.sid
+            return
+        events.info("subscribed", channel=channel)
+
+    def _on_snapshot(self, m):
+        sid = m.sid
+        if sid is not None:
+            ticker = m.msg.market_ticker or self.ticker
+            current = self.sids.get(ticker)
+            if current is None and self.websocket is None:
+                # Offline replay: no subscribe acknowledgement, adopt the frame's sid
+                current = self.sids[ticker] = sid
+            if sid != current:
+                return # from a subscription being replaced
+            self._last_seq[sid] = m.seq
+        self._process_snapshot(m.msg)
+
+    def _on_fill(self, m):
+        if self.ledger is not None:
+            self.ledger.on_fill(m.msg)
+
+    def _on_market_position(self, m):
+        if self.ledger is not None:
+            self.ledger.on_market_position(m.msg)
+
+    def _on_error(self, m):
+        events.error("ws_error", code=m.msg.code, msg=m.msg.msg)
+
+    async def _notify_listeners(self, ticker: str):
+        for listener in self.listeners + self.ticker_listeners.get(ticker, []):
             if asyncio.iscoroutinefunction(listener):
                 await listener()
             else:
                 listener()
 
     def _process_snapshot(self, msg):
-        # msg keys: yes, no (list of [price, qty])
-        # We store them as dicts for easy update: price -> qty
-        self.orderbook['yes'] = {item[0]: item[1] for item in msg.get('yes', [])}
-        self.orderbook['no'] = {item[0]: item[1] for item in msg.get('no', [])}
+        # msg: ws_messages.BookBody with market_ticker, yes, no (lists of [price, qty])
+        ticker = msg.market_ticker or self.ticker
+        book = self.books.get(ticker)
+        if book is None:
+            return # late message for a market we already unsubscribed
+        book.apply_snapshot(msg.yes, msg.no)
+        if self.track_signals:
+            self.analytics[ticker].on_snapshot(self._frame_seconds())
+        self.stale.discard(ticker)
+        if self.shared is not None:
+            slot = self.shared.slots.get(ticker)
+            if slot is not None:
+                self.shared.write_book(slot, book)
         # print("Book snapshot received")
-        asyncio.create_task(self._notify_listeners())
+        self.dispatcher.notify(ticker, self.frame_ns)
+
+    def _on_delta(self, m):
+        msg = m.msg
+        ticker = msg.market_ticker or self.ticker
+        if m.sid is not None and not self._in_sequence(m.sid, m.seq, ticker):
+            return
+        self._apply_delta(ticker, msg.yes, msg.no)
+
+    def _on_delta_dict(self, data):
+        msg = data.get("msg") or {}
+        ticker = msg.get("market_ticker") or self.ticker
+        sid = data.get("sid")
+        if sid is not None and not self._in_sequence(sid, data.get("seq"), ticker):
+            return
+        self._apply_delta(ticker, msg.get("yes") or (), msg.get("no") or ())
+
+    def _in_sequence(self, sid: int, seq: int, ticker: str) -> bool:
+        # False for deltas that must not be applied: no snapshot yet on this subscription,
+        # an old subscription, or a sequence gap (which starts a resync)
+        if self.sids.get(ticker) != sid:
+            return False
+        last = self._last_seq.get(sid)
+        if last is not None and seq is not None:
+            if seq != last + 1:
+                self._gap(sid, last + 1, seq)
+                return False
+            self._last_seq[sid] = seq
+        return True
 
     def _process_delta(self, msg):
-        # Update YES
-        for price, qty in msg.get('yes', []):
-            if qty == 0:
-                self.orderbook['yes'].pop(price, None)
-            else:
-                self.orderbook['yes'][price] = qty
-        
-        # Update NO
-        for price, qty in msg.get('no', []):
-            if qty == 0:
-                self.orderbook['no'].pop(price, None)
-            else:
-                self.orderbook['no'][price] = qty
-        
-        asyncio.create_task(self._notify_listeners())
+        self._apply_delta(msg.market_ticker or self.ticker, msg.yes, msg.no)
+
+    def _apply_delta(self, ticker, yes, no):
+        # Absolute [price, qty] updates per side, qty == 0 removes the level
+        book = self.books.get(ticker)
+        if book is None:
+            return
+        if self.track_signals:
+            analytics = self.analytics[ticker]
+            analytics.apply_levels('yes', yes)
+            analytics.apply_levels('no', no)
+            analytics.on_delta(self._frame_seconds())
+        else:
+            book.apply_levels('yes', yes)
+            book.apply_levels('no', no)
+        if self.shared is not None:
+            slot = self.shared.slots.get(ticker)
+            if slot is not None:
+                self.shared.write_levels(slot, yes, no, book)
+        self.dispatcher.notify(ticker, self.frame_ns)
 
-    
-    def get_imbalance(self):
-        # Calculate simple volume imbalance at top levels
+    def _frame_seconds(self):
+        return self.frame_ns / 1e9 if self.frame_ns is not None else None
+
+    def get_imbalance(self, ticker: str = None):
+        # Depth-weighted volume imbalance over the top IMBALANCE_LEVELS cents of each side
         # VOI = (BidVol - AskVol) / (BidVol + AskVol)
         # Returns float between -1.0 and 1.0
-        
-        yes_bids = self.orderbook.get('yes', {})
-        no_bids = self.orderbook.get('no', {}) # recall: no bids are effectively yes asks
-        
-        # Get volume at best bid
-        if not yes_bids:
-            bid_vol = 0
-        else:
-            best_bid = max(yes_bids.keys())
-            bid_vol = yes_bids[best_bid]
-            
-        # Get volume at best ask (which is best NO bid)
-        if not no_bids:
-            ask_vol = 0 # No supply
-        else:
-            best_no_bid = max(no_bids.keys())
-            ask_vol = no_bids[best_no_bid]
-            
-        total = bid_vol + ask_vol
-        if total == 0:
-            return 0.0
-            
         # If bid_vol is high, buying pressure -> positive
         # If ask_vol is high (lots of NO bids), selling pressure on YES -> negative
-        return (bid_vol - ask_vol) / total
+        return self.analytics[ticker or self.ticker].imbalance
 
-    def get_best_prices(self):
+    def get_microprice(self, ticker: str = None):
+        # Size-weighted mid, None while either side is empty
+        return self.analytics[ticker or self.ticker].microprice
+
+    def get_depth_price(self, side: str, contracts: int, ticker: str = None):
+        # Worst price reached buying `contracts` off the top of a side, 0 if it is too thin
+        # (O(log 99) with BOOK_SIGNALS_ENABLED, a scan of the side otherwise)
+        return self.analytics[ticker or self.ticker].price_for_depth(side, contracts)
+
+    def get_mid_stats(self, ticker: str = None, ts: float = None):
+        # (decayed mid, mid volatility in cents per sqrt(second)) over ANALYTICS_HALFLIFE_SECONDS,
+        # decayed to `ts` (seconds on the frame clock, default now); (None, 0.0) unless
+        # BOOK_SIGNALS_ENABLED
+        a = self.analytics[ticker or self.ticker]
+        return a.mid_ewma(ts), a.volatility(ts)
+
+    def get_best_prices(self, ticker: str = None):
         # Returns (best_yes_bid, best_yes_ask)
         # best_yes_bid = max price in yes book
         # best_yes_ask = 100 - max price in no book (since NO bid X means YES ask 100-X)
-        
-        yes_bids = self.orderbook.get('yes', {})
-        no_bids = self.orderbook.get('no', {})
-        
-        best_bid = max(yes_bids.keys()) if yes_bids else 0
-        
-        # Best NO bid = highest price people are willing to pay for NO
-        best_no_bid = max(no_bids.keys()) if no_bids else 0
-        
-        if best_no_bid > 0:
-            best_ask = 100 - best_no_bid
-        else:
-            best_ask = 100 # No one selling YES (no one buying NO)
-            
-        return best_bid, best_ask
+        return self.book(ticker).best_prices()
+
+    def get_depth(self, side: str, levels: int = None, ticker: str = None):
+        # Cumulative qty over the top `levels` populated levels of a side
+        return self.book(ticker).cumulative_depth(side, levels)
@@ -0,0 +1,324 @@
+import asyncio
+import bisect
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from scan_markets import PAGE_LIMIT, MarketColumns, rank_markets, iter_market_pages, aiter_market_pages
+
+# Fields kept per market; everything else in the /markets payload is dropped
+MARKET_FIELDS = (
+    'ticker', 'event_ticker', 'series_ticker', 'title', 'status', 'close_time',
+    'yes_bid', 'yes_ask', 'volume', 'open_interest', 'liquidity'
+)
+OPEN_STATUSES = {"open", "active"}
+# Upper bounds (cents) of the spread buckets; wider spreads land in the last one
+SPREAD_BUCKETS = (1, 2, 3, 5, 10, 20, 100)
+# Incremental syncs re-fetch this many seconds before the last sync to cover clock skew
+SYNC_OVERLAP_SECONDS = 60
+CACHE_VERSION = 1
+
+def series_of(market) -> str:
+    # Series ticker is the event ticker's prefix (KXHIGHNY-25OCT16 -> KXHIGHNY) when not sent
+    series = market.get('series_ticker')
+    if series:
+        return series
+    event = market.get('event_ticker') or market['ticker']
+    return event.split('-', 1)[0]
+
+def spread_bucket(spread: int) -> int:
+    i = bisect.bisect_left(SPREAD_BUCKETS, spread)
+    return SPREAD_BUCKETS[min(i, len(SPREAD_BUCKETS) - 1)]
+
+def _close_ts(market):
+    close_time = market.get('close_time')
+    if not close_time:
+        return None
+    try:
+        return datetime.fromisoformat(close_time.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+class MarketUniverse:
+    # Every open market, cached on disk and refreshed incrementally.
+    # A full scan only runs on a cold start or once the cache is older than `ttl`;
+    # otherwise only markets updated since the last sync are re-fetched (min_updated_ts).
+    # Indexes by event, series, spread bucket and liquidity are kept in step with each update.
+    def __init__(self, path: str = "", ttl: float = 3600):
+        self.path = path
+        self.ttl = ttl
+        self.markets = {}
+        self.synced_at = 0 # start of the last sync (full or incremental), unix seconds
+        self.full_synced_at = 0
+        self.by_event = defaultdict(set)
+        self.by_series = defaultdict(set)
+        self.by_spread = defaultdict(set)
+        self._liquidity = [] # sorted (liquidity, ticker)
+        self._columns = None # MarketColumns for ranking, rebuilt after changes
+        self.ranking = []
+
+    # --- Persistence ---
+
+    @classmethod
+    def load(cls, path: str, ttl: float = 3600):
+        universe = cls(path, ttl)
+        if not path or not os.path.exists(path):
+            return universe
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable market cache {path}: {e}")
+            return universe
+        if data.get("version") != CACHE_VERSION:
+            return universe
+        universe.synced_at = data.get("synced_at", 0)
+        universe.full_synced_at = data.get("full_synced_at", 0)
+        # Cached entries were filtered and trimmed when saved; just index them
+        for m in data.get("markets", []):
+            universe.markets[m['ticker']] = m
+            universe._index(m, bulk=True)
+        universe._rebuild_liquidity()
+        universe.expire()
+        return universe
+
+    def _snapshot(self):
+        return {
+            "version": CACHE_VERSION,
+            "synced_at": self.synced_at,
+            "full_synced_at": self.full_synced_at,
+            "markets": list(self.markets.values())
+        }
+
+    def save(self, snapshot=None):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot or self._snapshot(), f, separators=(",", ":"))
+        os.replace(tmp, self.path) # readers never see a half-written cache
+
+    async def save_async(self):
+        # Snapshot on the loop, serialize and write off it
+        if self.path:
+            await asyncio.to_thread(self.save, self._snapshot())
+
+    def age(self) -> float:
+        return time.time() - self.full_synced_at
+
+    def is_fresh(self) -> bool:
+        return bool(self.markets) and self.age() < self.ttl
+
+    # --- Updates and indexes ---
+
+    def _index(self, m, bulk: bool = False):
+        ticker = m['ticker']
+        self.by_event[m.get('event_ticker') or ticker].add(ticker)
+        self.by_series[series_of(m)].add(ticker)
+        self.by_spread[spread_bucket(m.get('yes_ask', 100) - m.get('yes_bid', 0))].add(ticker)
+        if not bulk: # bulk loads rebuild the liquidity index once at the end
+            bisect.insort(self._liquidity, (m.get('liquidity') or 0, ticker))
+
+    def _rebuild_liquidity(self):
+        self._liquidity = sorted((m.get('liquidity') or 0, t) for t, m in self.markets.items())
+
+    def _unindex(self, m):
+        ticker = m['ticker']
+        for index, key in (
+            (self.by_event, m.get('event_ticker') or ticker),
+            (self.by_series, series_of(m)),
+            (self.by_spread, spread_bucket(m.get('yes_ask', 100) - m.get('yes_bid', 0)))
+        ):
+            members = index.get(key)
+            if members is not None:
+                members.discard(ticker)
+                if not members:
+                    del index[key]
+        entry = (m.get('liquidity') or 0, ticker)
+        i = bisect.bisect_left(self._liquidity, entry)
+        if i < len(self._liquidity) and self._liquidity[i] == entry:
+            del self._liquidity[i]
+
+    def apply(self, markets, now: float = None):
+        # Upsert open markets, drop ones that closed or settled. Returns the number changed.
+        now = time.time() if now is None else now
+        bulk = not self.markets # initial load: build the liquidity index once instead of per insert
+        changed = 0
+        for raw in markets:
+            ticker = raw.get('ticker')
+            if not ticker:
+                continue
+            old = self.markets.pop(ticker, None)
+            if old is not None:
+                self._unindex(old)
+                changed += 1
+            status = raw.get('status')
+            close_ts = _close_ts(raw)
+            if (status and status not in OPEN_STATUSES) or (close_ts is not None and close_ts <= now):
+                continue
+            m = {k: raw[k] for k in MARKET_FIELDS if raw.get(k) is not None}
+            self.markets[ticker] = m
+            self._index(m, bulk)
+            changed += old is None
+        if bulk:
+            self._rebuild_liquidity()
+        if changed:
+            self._columns = None
+        return changed
+
+    def expire(self, now: float = None):
+        # Markets past their close time leave the universe without waiting for an update
+        now = time.time() if now is None else now
+        closed = [t for t, m in self.markets.items() if (_close_ts(m) or now + 1) <= now]
+        for ticker in closed:
+            self._unindex(self.markets.pop(ticker))
+        if closed:
+            self._columns = None
+        return len(closed)
+
+    def _replace(self, markets, started):
+        self.markets.clear()
+        self.by_event.clear()
+        self.by_series.clear()
+        self.by_spread.clear()
+        self._liquidity.clear()
+        self._columns = None
+        self.apply(markets, now=started)
+        self.synced_at = self.full_synced_at = started
+
+    # --- Queries ---
+
+    def columns(self) -> MarketColumns:
+        if self._columns is None:
+            self._columns = MarketColumns.from_pages([self.markets.values()])
+        return self._columns
+
+    def top(self, k: int = 10):
+        return rank_markets(self.columns(), k)
+
+    def best(self):
+        top = self.top(1)
+        return top[0] if top else None
+
+    def in_event(self, event_ticker: str):
+        return [self.markets[t] for t in self.by_event.get(event_ticker, ())]
+
+    def in_series(self, series_ticker: str):
+        return [self.markets[t] for t in self.by_series.get(series_ticker, ())]
+
+    def with_spread(self, max_spread: int):
+        # Markets whose spread bucket is at most max_spread's bucket
+        limit = spread_bucket(max_spread)
+        return [self.markets[t] for b, tickers in self.by_spread.items() if b <= limit for t in tickers]
+
+    def most_liquid(self, n: int = 10, min_liquidity: int = 0):
+        start = bisect.bisect_left(self._liquidity, (min_liquidity, ""))
+        picks = self._liquidity[start:][::-1][:n]
+        return [self.markets[t] for _, t in picks]
+
+    # --- Sync (sync client) ---
+
+    def full_sync(self, client):
+        started = time.time()
+        pages = iter_market_pages(client, status="open", limit=PAGE_LIMIT)
+        self._replace([m for page in pages for m in page], started)
+        print(f"Market universe: full scan, {len(self.markets)} open markets")
+
+    def incremental_sync(self, client):
+        started = time.time()
+        changed = 0
+        for page in iter_market_pages(client, status=None, limit=PAGE_LIMIT,
+                                      min_updated_ts=int(self.synced_at - SYNC_OVERLAP_SECONDS)):
+            changed += self.apply(page, now=started)
+        changed += self.expire(started)
+        self.synced_at = started
+        return changed
+
+    def refresh(self, client):
+        if self.is_fresh():
+            return self.incremental_sync(client)
+        self.full_sync(client)
+        return len(self.markets)
+
+    # --- Sync (async client) ---
+
+    async def full_sync_async(self, client):
+        started = time.time()
+        markets = []
+        async for page in aiter_market_pages(client, status="open", limit=PAGE_LIMIT):
+            markets.extend(page)
+        self._replace(markets, started)
+        print(f"Market universe: full scan, {len(self.markets)} open markets")
+
+    async def incremental_sync_async(self, client):
+        started = time.time()
+        changed = 0
+        cursor = None
+        while True:
+            data = await client.get_markets(limit=PAGE_LIMIT, status=None, cursor=cursor,
+                                            min_updated_ts=int(self.synced_at - SYNC_OVERLAP_SECONDS))
+            changed += self.apply(data.get("markets", []), now=started)
+            cursor = data.get("cursor")
+            if not cursor:
+                break
+        changed += self.expire(started)
+        self.synced_at = started
+        return changed
+
+    async def refresh_async(self, client):
+        if self.is_fresh():
+            return await self.incremental_sync_async(client)
+        await self.full_sync_async(client)
+        return len(self.markets)
+
+    async def refresh_loop(self, client, interval: float = 60, k: int = 10):
+        # Background refresh while trading: keeps self.ranking current and the cache on disk
+        while True:
+            try:
+                changed = await self.refresh_async(client)
+                if changed:
+                    leader = self.ranking[0]['ticker'] if self.ranking else None
+                    self.ranking = self.top(k)
+                    if self.ranking and self.ranking[0]['ticker'] != leader:
+                        best = self.ranking[0]
+                        print(f"Market universe: best market now {best['ticker']} (Spread: {best['spread']}c)")
+                    await self.save_async()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Market universe refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+def load_cached_universe(config):
+    # Whatever the cache holds (possibly stale), ranked; no network
+    universe = MarketUniverse.load(config.UNIVERSE_PATH, ttl=config.UNIVERSE_TTL_SECONDS)
+    universe.ranking = universe.top()
+    return universe
+
+async def scan_if_stale(universe, client):
+    # Async counterpart of load_universe's scan, for startup alongside the WS handshake
+    if universe.is_fresh():
+        print(f"Market universe: {len(universe.markets)} markets from cache ({universe.age():.0f}s old)")
+        return
+    try:
+        await universe.full_sync_async(client)
+        await universe.save_async()
+    except Exception as e:
+        print(f"Error scanning: {e}")
+    universe.ranking = universe.top()
+
+def load_universe(config, client):
+    # Cached universe for startup: used as-is when fresh (the background loop catches it up),
+    # otherwise rebuilt with a full scan and written back
+    universe = MarketUniverse.load(config.UNIVERSE_PATH, ttl=config.UNIVERSE_TTL_SECONDS)
+    if universe.is_fresh():
+        print(f"Market universe: {len(universe.markets)} markets from cache ({universe.age():.0f}s old)")
+    else:
+        try:
+            universe.full_sync(client)
+            universe.save()
+        except Exception as e:
+            print(f"Error scanning: {e}")
+    universe.ranking = universe.top()
+    return universe
@@ -0,0 +1,183 @@
+import asyncio
+import contextvars
+import time
+
+# Stage latency histograms for the tick-to-trade path.
+#   decode         WS frame received -> JSON decoded
+#   book_apply     decoded message applied to the order book
+#   dispatch_wait  ticker marked dirty -> strategy evaluation starts (conflation/queueing)
+#   quote          evaluation start -> quotes computed and legs launched
+#   sign           request signature (off-loop when a signing pool is used)
+#   tick_to_trade  frame received -> order request handed to the HTTP client
+#   http_response  request sent -> response received (every REST call)
+#   tick_to_ack    frame received -> order response received
+# Off unless METRICS_ENABLED=true. Hot-path call sites check `metrics.enabled` before taking
+# any timestamp, so when off they cost one attribute read per stage.
+
+SUB_BITS = 2 # 2**SUB_BITS sub-buckets per power of two (bucket width <= 25%)
+SUB = 1 << SUB_BITS
+NUM_BUCKETS = 64 * SUB
+
+# Receive time (perf_counter_ns) of the frame that triggered the current evaluation.
+# Set by the dispatcher; tasks spawned by the evaluation (order legs) inherit it.
+origin_ns = contextvars.ContextVar("origin_ns", default=None)
+
+def bucket_index(ns: int) -> int:
+    shift = ns.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return ns
+    return (shift << SUB_BITS) + (ns >> shift)
+
+def bucket_bounds(idx: int):
+    # [lower, upper) in nanoseconds
+    if idx < 2 * SUB:
+        return idx, idx + 1
+    shift = (idx >> SUB_BITS) - 1
+    mantissa = idx - (shift << SUB_BITS)
+    return mantissa << shift, (mantissa + 1) << shift
+
+class LogHistogram:
+    # Log-linear histogram of nanosecond durations: recording is one bit_length, a shift
+    # and a list increment, with no allocation
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns: int):
+        if ns < 0:
+            ns = 0
+        shift = ns.bit_length() - SUB_BITS - 1 # bucket_index, inlined
+        self.counts[(shift << SUB_BITS) + (ns >> shift) if shift > 0 else ns] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th sample, capped at the observed max
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bucket_bounds(idx)[1], self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        # Counts at or below each bound (bounds are powers of two, which bucket edges align to)
+        out = []
+        seen = 0
+        idx = 0
+        for bound in bounds:
+            while idx < NUM_BUCKETS and bucket_bounds(idx)[1] <= bound:
+                seen += self.counts[idx]
+                idx += 1
+            out.append(seen)
+        return out
+
+    def reset(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = self.total = self.max = 0
+
+# Prometheus bucket edges: powers of two from ~1us to ~8.6s
+EXPORT_BOUNDS = [1 << k for k in range(10, 34)]
+
+class Metrics:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {} # name -> zero-arg callable, read at scrape time
+
+    def histogram(self, name: str) -> LogHistogram:
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = LogHistogram()
+        return hist
+
+    def observe(self, name: str, ns: int):
+        self.histogram(name).record(ns)
+
+    def since(self, name: str, start_ns: int):
+        self.histogram(name).record(time.perf_counter_ns() - start_ns)
+
+    def since_origin(self, name: str, now_ns: int = None):
+        # Duration since the triggering frame arrived, if this work was triggered by one
+        start = origin_ns.get()
+        if start is not None:
+            self.histogram(name).record((now_ns or time.perf_counter_ns()) - start)
+
+    def inc(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, fn):
+        self.gauges[name] = fn
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+        self.counters.clear()
+
+    def summary(self):
+        return {
+            name: {
+                'count': h.count,
+                'p50_us': h.percentile(0.5) / 1000,
+                'p99_us': h.percentile(0.99) / 1000,
+                'max_us': h.max / 1000,
+                'mean_us': h.total / h.count / 1000 if h.count else 0.0
+            }
+            for name, h in self.histograms.items()
+        }
+
+    def print_summary(self):
+        for name, s in self.summary().items():
+            if s['count']:
+                print(f"[metrics] {name:14s} p50 {s['p50_us']:9.1f}us p99 {s['p99_us']:9.1f}us "
+                      f"max {s['max_us']:9.1f}us (n={s['count']})")
+
+    async def summary_loop(self, every: float = 60.0):
+        while True:
+            await asyncio.sleep(every)
+            self.print_summary()
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP kalshi_stage_seconds Tick-to-trade stage latency",
+            "# TYPE kalshi_stage_seconds histogram"
+        ]
+        for name, h in self.histograms.items():
+            for bound, n in zip(EXPORT_BOUNDS, h.cumulative(EXPORT_BOUNDS)):
+                lines.append(f'kalshi_stage_seconds_bucket{{stage="{name}",le="{bound / 1e9:.9g}"}} {n}')
+            lines.append(f'kalshi_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'kalshi_stage_seconds_sum{{stage="{name}"}} {h.total / 1e9:.9f}')
+            lines.append(f'kalshi_stage_seconds_count{{stage="{name}"}} {h.count}')
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE kalshi_{name}_total counter")
+            lines.append(f"kalshi_{name}_total {value}")
+        for name, fn in self.gauges.items():
+            lines.append(f"# TYPE kalshi_{name} gauge")
+            lines.append(f"kalshi_{name} {fn()}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9108):
+        # Prometheus text endpoint on /metrics; returns the runner so callers can clean up
+        from aiohttp import web
+        async def handle(request):
+            return web.Response(text=self.prometheus(), content_type="text/plain", charset="utf-8")
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"Metrics on http://{host}:{port}/metrics")
+        return runner
+
+# Process-wide registry; main.py applies METRICS_ENABLED
+metrics = Metrics()
@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from aiohttp import web, WSMsgType
+from backtest import SimulatedExchange
+from synthetic_feed import SyntheticMarket
+
+# Local stand-in for the Kalshi REST + WS API for load and latency testing.
+# Point the bot at it with:
+#   KALSHI_API_URL=http://127.0.0.1:8080/trade-api/v2
+#   KALSHI_WS_URL=ws://127.0.0.1:8080/trade-api/ws/v2
+# Auth headers are accepted but not verified.
+
+API_PATH = "/trade-api/v2"
+WS_PATH = "/trade-api/ws/v2"
+
+def percentile(samples, q: float):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Subscription:
+    __slots__ = ("sid", "ws", "tickers", "seq", "channel")
+
+    def __init__(self, sid: int, ws, tickers, channel: str = "orderbook_delta"):
+        self.sid = sid
+        self.ws = ws
+        self.tickers = set(tickers)
+        self.seq = 0
+        self.channel = channel
+
+class MockExchange:
+    def __init__(self, markets, rate: float = 1000, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed=None, drop_rate: float = 0.0):
+        self.markets = {m.ticker: m for m in markets}
+        self.rate = rate # book messages/second across all markets
+        self.latency_ms = latency_ms # injected before every REST response
+        self.jitter_ms = jitter_ms
+        self.drop_rate = drop_rate # fraction of book deltas lost in transit (seq still advances)
+        self.rng = random.Random(seed)
+        # Matching engine shared with the backtester
+        self.exchange = SimulatedExchange()
+        for ticker, market in self.markets.items():
+            self.exchange.attach_book(ticker, market.book)
+        self.exchange.fill_listeners.append(self._on_fill)
+        self.subscriptions = {} # sid -> Subscription
+        self._next_sid = 0
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.orders_received = 0
+        self.last_sent_ns = {} # ticker -> time its latest book frame went out
+        self.tick_to_trade_ns = deque(maxlen=100000)
+
+    # --- REST ---
+
+    async def _delay(self):
+        delay = self.latency_ms + (self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def _record_trade(self, ticker: str):
+        # Tick-to-trade: latest book frame sent for this market -> order request received
+        self.orders_received += 1
+        sent = self.last_sent_ns.get(ticker)
+        if sent is not None:
+            self.tick_to_trade_ns.append(time.perf_counter_ns() - sent)
+
+    async def get_markets(self, request):
+        await self._delay()
+        limit = int(request.query.get("limit", 100))
+        start = int(request.query.get("cursor") or 0)
+        lo = int(request.query.get("min_close_ts", 0))
+        hi = int(request.query.get("max_close_ts", 2 ** 62))
+        tickers = [t for t, m in self.markets.items() if lo <= m.close_ts <= hi]
+        page = [self.markets[t].market_info() for t in tickers[start:start + limit]]
+        cursor = str(start + limit) if start + limit < len(tickers) else ""
+        return web.json_response({"markets": page, "cursor": cursor})
+
+    async def get_market(self, request):
+        await self._delay()
+        market = self.markets.get(request.match_info["ticker"])
+        if market is None:
+            return web.json_response({"error": {"code": "not_found"}}, status=404)
+        return web.json_response({"market": market.market_info()})
+
+    async def create_order(self, request):
+        body = await request.json()
+        ticker = body.get("ticker")
+        self._record_trade(ticker)
+        await self._delay()
+        if ticker not in self.markets:
+            return web.json_response({"error": {"code": "market_not_found"}}, status=404)
+        side = body.get("side", "yes")
+        price = body.get("yes_price") if side == "yes" else body.get("no_price")
+        resp = await self.exchange.create_order(ticker, body.get("action"), body.get("count"), price, side=side)
+        return web.json_response(resp, status=201)
+
+    async def cancel_order(self, request):
+        order = self.exchange.orders.get(request.match_info["order_id"])
+        if order is not None:
+            self._record_trade(order["ticker"])
+        await self._delay()
+        try:
+            resp = await self.exchange.cancel_order(request.match_info["order_id"])
+        except Exception:
+            return web.json_response({"error": {"code": "not_found"}}, status=404)
+        return web.json_response(resp)
+
+    async def amend_order(self, request):
+        body = await request.json()
+        self._record_trade(body.get("ticker"))
+        await self._delay()
+        side = body.get("side", "yes")
+        price = body.get("yes_price") if side == "yes" else body.get("no_price")
+        try:
+            resp = await self.exchange.amend_order(
+                request.match_info["order_id"], body.get("ticker"), body.get("action"), body.get("count"), price,
+                side=side, client_order_id=body.get("client_order_id")
+            )
+        except Exception:
+            return web.json_response({"error": {"code": "not_found"}}, status=404)
+        return web.json_response(resp)
+
+    async def decrease_order(self, request):
+        body = await request.json()
+        await self._delay()
+        try:
+            resp = await self.exchange.decrease_order(
+                request.match_info["order_id"], reduce_by=body.get("reduce_by"), reduce_to=body.get("reduce_to")
+            )
+        except Exception:
+            return web.json_response({"error": {"code": "not_found"}}, status=404)
+        return web.json_response(resp)
+
+    async def batch_create_orders(self, request):
+        body = await request.json()
+        orders = [o for o in body.get("orders", []) if o.get("ticker") in self.markets]
+        for ticker in {o["ticker"] for o in orders}:
+            self._record_trade(ticker)
+        await self._delay()
+        return web.json_response(await self.exchange.batch_create_orders(orders), status=201)
+
+    async def batch_cancel_orders(self, request):
+        body = await request.json()
+        ids = body.get("ids", [])
+        for ticker in {self.exchange.orders[i]["ticker"] for i in ids if i in self.exchange.orders}:
+            self._record_trade(ticker)
+        await self._delay()
+        return web.json_response(await self.exchange.batch_cancel_orders(ids))
+
+    async def get_positions(self, request):
+        await self._delay()
+        return web.json_response(await self.exchange.get_positions())
+
+    async def get_orders(self, request):
+        await self._delay()
+        return web.json_response(await self.exchange.get_orders(
+            ticker=request.query.get("ticker"), status=request.query.get("status")
+        ))
+
+    async def get_balance(self, request):
+        await self._delay()
+        return web.json_response(await self.exchange.get_balance())
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats())
+
+    # --- WebSocket ---
+
+    async def _send(self, sub: Subscription, msg_type: str, body: str):
+        sub.seq += 1
+        if msg_type == "orderbook_delta" and self.drop_rate and self.rng.random() < self.drop_rate:
+            self.messages_dropped += 1 # the client sees a seq gap
+            return
+        await sub.ws.send_str(f'{{"type":"{msg_type}","sid":{sub.sid},"seq":{sub.seq},"msg":{body}}}')
+
+    async def _subscribe(self, ws, cmd_id, tickers, channel: str = "orderbook_delta"):
+        self._next_sid += 1
+        sub = Subscription(self._next_sid, ws, [t for t in tickers if t in self.markets], channel)
+        self.subscriptions[sub.sid] = sub
+        await ws.send_str(json.dumps({"id": cmd_id, "type": "subscribed", "msg": {"channel": channel, "sid": sub.sid}}))
+        if channel != "orderbook_delta":
+            return sub
+        for t in sub.tickers:
+            await self._send(sub, "orderbook_snapshot", json.dumps(self.markets[t].snapshot()["msg"]))
+        return sub
+
+    async def ws_handler(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0, compress=False)
+        await ws.prepare(request)
+        owned = []
+        try:
+            async for raw in ws:
+                if raw.type != WSMsgType.TEXT:
+                    continue
+                cmd = json.loads(raw.data)
+                params = cmd.get("params", {})
+                if cmd.get("cmd") == "subscribe":
+                    tickers = params.get("market_tickers") or [params.get("market_ticker")]
+                    for channel in params.get("channels", ["orderbook_delta"]):
+                        owned.append(await self._subscribe(ws, cmd.get("id"), tickers, channel))
+                elif cmd.get("cmd") == "update_subscription":
+                    for sid in params.get("sids", []):
+                        sub = self.subscriptions.get(sid)
+                        if sub is None:
+                            continue
+                        tickers = [t for t in params.get("market_tickers", []) if t in self.markets]
+                        if params.get("action") == "add_markets":
+                            sub.tickers.update(tickers)
+                            for t in tickers:
+                                await self._send(sub, "orderbook_snapshot", json.dumps(self.markets[t].snapshot()["msg"]))
+                        else:
+                            sub.tickers.difference_update(tickers)
+                    await ws.send_str(json.dumps({"id": cmd.get("id"), "type": "ok"}))
+                elif cmd.get("cmd") == "unsubscribe":
+                    for sid in params.get("sids", []):
+                        self.subscriptions.pop(sid, None)
+                    await ws.send_str(json.dumps({"id": cmd.get("id"), "type": "unsubscribed"}))
+        finally:
+            for sub in owned:
+                self.subscriptions.pop(sub.sid, None)
+        return ws
+
+    def _on_fill(self, fill):
+        # Push the fill and the new position to every user-channel subscriber
+        messages = {
+            "fill": ("fill", json.dumps(self.exchange.fill_message(fill))),
+            "market_positions": ("market_position", json.dumps({
+                "market_ticker": fill['ticker'], "position": fill['post_position']
+            }))
+        }
+        for sub in list(self.subscriptions.values()):
+            if sub.channel in messages and not sub.ws.closed:
+                msg_type, body = messages[sub.channel]
+                asyncio.get_running_loop().create_task(self._send(sub, msg_type, body))
+
+    async def publish(self, interval: float = 0.002):
+        # Emits `rate` deltas/second in small batches, then lets resting orders match
+        loop = asyncio.get_running_loop()
+        budget = 0.0
+        last = loop.time()
+        while True:
+            await asyncio.sleep(interval)
+            now = loop.time()
+            budget += self.rate * (now - last)
+            last = now
+            n = int(budget)
+            budget -= n
+            # Only markets somebody subscribed to tick, so `rate` is the delivered rate
+            subs = [sub for sub in self.subscriptions.values() if sub.channel == "orderbook_delta"]
+            live = sorted({t for sub in subs for t in sub.tickers})
+            if not live:
+                continue
+            for _ in range(n):
+                market = self.markets[live[self.rng.randrange(len(live))]]
+                body = json.dumps(market.next_delta()["msg"])
+                for sub in subs:
+                    if market.ticker not in sub.tickers or sub.ws.closed:
+                        continue
+                    try:
+                        await self._send(sub, "orderbook_delta", body)
+                    except ConnectionError:
+                        self.subscriptions.pop(sub.sid, None)
+                        continue
+                    self.messages_sent += 1
+                self.last_sent_ns[market.ticker] = time.perf_counter_ns()
+                self.exchange.match(market.ticker)
+
+    def stats(self):
+        samples = list(self.tick_to_trade_ns)
+        return {
+            "messages_sent": self.messages_sent,
+            "messages_dropped": self.messages_dropped,
+            "orders_received": self.orders_received,
+            "fills": len(self.exchange.fills),
+            "subscriptions": len(self.subscriptions),
+            "tick_to_trade_ms": {
+                "count": len(samples),
+                "p50": percentile(samples, 0.50) / 1e6,
+                "p99": percentile(samples, 0.99) / 1e6,
+                "max": (max(samples) if samples else 0) / 1e6
+            }
+        }
+
+    async def report(self, every: float = 5.0):
+        last_msgs = 0
+        last_orders = 0
+        while True:
+            await asyncio.sleep(every)
+            s = self.stats()
+            t2t = s["tick_to_trade_ms"]
+            print(
+                f"[mock] {(s['messages_sent'] - last_msgs) / every:,.0f} msg/s | "
+                f"{(s['orders_received'] - last_orders) / every:,.1f} orders/s | "
+                f"tick-to-trade p50 {t2t['p50']:.2f}ms p99 {t2t['p99']:.2f}ms | fills {s['fills']}"
+            )
+            last_msgs = s["messages_sent"]
+            last_orders = s["orders_received"]
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get(f"{API_PATH}/markets", self.get_markets)
+        app.router.add_get(f"{API_PATH}/markets/{{ticker}}", self.get_market)
+        app.router.add_post(f"{API_PATH}/portfolio/orders", self.create_order)
+        app.router.add_post(f"{API_PATH}/portfolio/orders/batched", self.batch_create_orders)
+        app.router.add_delete(f"{API_PATH}/portfolio/orders/batched", self.batch_cancel_orders)
+        app.router.add_delete(f"{API_PATH}/portfolio/orders/{{order_id}}", self.cancel_order)
+        app.router.add_post(f"{API_PATH}/portfolio/orders/{{order_id}}/amend", self.amend_order)
+        app.router.add_post(f"{API_PATH}/portfolio/orders/{{order_id}}/decrease", self.decrease_order)
+        app.router.add_get(f"{API_PATH}/portfolio/positions", self.get_positions)
+        app.router.add_get(f"{API_PATH}/portfolio/orders", self.get_orders)
+        app.router.add_get(f"{API_PATH}/portfolio/balance", self.get_balance)
+        app.router.add_get(WS_PATH, self.ws_handler)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+async def serve(args):
+    now = int(time.time())
+    markets = [
+        SyntheticMarket(f"MOCK-{i}", mid=30 + (i * 7) % 40, depth=args.depth, seed=args.seed + i,
+                        close_ts=now + 3600 * (1 + (i * 37) % 2000))
+        for i in range(args.markets)
+    ]
+    mock = MockExchange(markets, rate=args.rate, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed,
+                        drop_rate=args.drop_rate)
+    runner = web.AppRunner(mock.app())
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"Mock exchange on http://{args.host}:{args.port}{API_PATH} (WS {WS_PATH}), {args.markets} markets @ {args.rate:,.0f} msg/s")
+    try:
+        await asyncio.gather(mock.publish(), mock.report())
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Kalshi exchange stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--markets", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=1000, help="book messages per second")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every REST response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random REST delay")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of book deltas to drop (sequence gaps)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
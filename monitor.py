@@ -0,0 +1,57 @@
+import argparse
+import time
+import numpy as np
+from shared_books import SharedBooks, YES, NO
+
+# Read-only view of every market's book and position straight from shared memory:
+#   python monitor.py <segment name>      (printed by main.py when WORKERS > 1)
+#   python monitor.py bot_state.bin       (the STATE_PATH file, single process or supervisor)
+
+def summarize(books: SharedBooks):
+    # One vectorized pass over all slots, no per-market Python work besides formatting
+    bid, ask = books.top_of_book()
+    depth = books.levels.sum(axis=2) # [n, 2] resting contracts per side
+    now = time.time_ns()
+    updated = books.updated_ns.copy()
+    age = np.where(updated > 0, (now - updated) / 1e9, np.inf)
+    return {
+        'tickers': [t.decode() for t in books.tickers],
+        'bid': bid,
+        'ask': ask,
+        'yes_depth': depth[:, YES],
+        'no_depth': depth[:, NO],
+        'position': books.position.copy(),
+        'stale': books.stale.astype(bool),
+        'age_s': age,
+    }
+
+def print_summary(books: SharedBooks, limit: int = 20):
+    s = summarize(books)
+    position = s['position']
+    print(f"[monitor] {len(s['tickers'])} markets, {int(s['stale'].sum())} stale, "
+          f"net {int(position.sum())}, gross {int(np.abs(position).sum())}")
+    order = np.argsort(-np.abs(position), kind="stable")[:limit] # largest exposure first
+    for i in order:
+        flag = " STALE" if s['stale'][i] else ""
+        age = f"{s['age_s'][i]:6.1f}s" if np.isfinite(s['age_s'][i]) else "     -"
+        print(f"  {s['tickers'][i]:32s} {s['bid'][i]:3d} @ {s['ask'][i]:3d}  depth {s['yes_depth'][i]:7d}/{s['no_depth'][i]:<7d} "
+              f"pos {position[i]:6d}  age {age}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Print books and positions from the workers' shared memory")
+    parser.add_argument("name", help="shared memory segment name or state file path")
+    parser.add_argument("--every", type=float, default=2.0)
+    parser.add_argument("--limit", type=int, default=20, help="markets listed per report")
+    args = parser.parse_args()
+    books = SharedBooks.attach(args.name)
+    try:
+        while True:
+            print_summary(books, args.limit)
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        books.close()
+
+if __name__ == "__main__":
+    main()
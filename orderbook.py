@@ -0,0 +1,146 @@
+MIN_PRICE = 1
+MAX_PRICE = 99
+# Index by price directly (0 and 100 are never valid Kalshi prices)
+NUM_LEVELS = MAX_PRICE + 1
+
+
+class BookSide:
+    # One side of the book (YES bids or NO bids) as a fixed array of qty per cent.
+    # `best` is the highest price with resting qty, 0 if the side is empty.
+    __slots__ = ("levels", "best", "count")
+
+    def __init__(self):
+        self.levels = [0] * NUM_LEVELS
+        self.best = 0
+        self.count = 0  # number of non-empty levels
+
+    def clear(self):
+        levels = self.levels
+        for i in range(NUM_LEVELS):
+            levels[i] = 0
+        self.best = 0
+        self.count = 0
+
+    def set(self, price: int, qty: int) -> int:
+        # Sets the absolute qty at a price level, returns the previous qty.
+        # Out of range prices are ignored.
+        if price < MIN_PRICE or price > MAX_PRICE:
+            return 0
+        levels = self.levels
+        old = levels[price]
+        if qty <= 0:
+            if old == 0:
+                return 0
+            levels[price] = 0
+            self.count -= 1
+            if price == self.best:
+                # Walk down to the next populated level (bounded by 99 cents)
+                p = price - 1
+                while p > 0 and levels[p] == 0:
+                    p -= 1
+                self.best = p
+        else:
+            levels[price] = qty
+            if old == 0:
+                self.count += 1
+                if price > self.best:
+                    self.best = price
+        return old
+
+    def best_qty(self) -> int:
+        return self.levels[self.best] if self.best else 0
+
+    def depth(self, levels: int = None) -> int:
+        # Cumulative qty over the top `levels` populated price levels (all if None)
+        total = 0
+        seen = 0
+        arr = self.levels
+        p = self.best
+        while p > 0:
+            q = arr[p]
+            if q:
+                total += q
+                seen += 1
+                if levels is not None and seen >= levels:
+                    break
+            p -= 1
+        return total
+
+    def depth_through(self, price: int) -> int:
+        # Cumulative qty resting at prices >= `price`
+        arr = self.levels
+        total = 0
+        for p in range(max(price, MIN_PRICE), self.best + 1):
+            total += arr[p]
+        return total
+
+    def price_for_depth(self, contracts: int) -> int:
+        # Worst price reached when sweeping `contracts` from the top, 0 if not enough depth
+        arr = self.levels
+        remaining = contracts
+        p = self.best
+        while p > 0:
+            remaining -= arr[p]
+            if remaining <= 0:
+                return p
+            p -= 1
+        return 0
+
+    def items(self):
+        arr = self.levels
+        return [(p, arr[p]) for p in range(self.best, 0, -1) if arr[p]]
+
+    def to_dict(self):
+        arr = self.levels
+        return {p: arr[p] for p in range(MIN_PRICE, self.best + 1) if arr[p]}
+
+
+class OrderBook:
+    # Kalshi book for a single market. Both sides are bids:
+    # YES bids, and NO bids (a NO bid at X is a YES ask at 100 - X).
+    __slots__ = ("yes", "no")
+
+    def __init__(self):
+        self.yes = BookSide()
+        self.no = BookSide()
+
+    def side(self, name: str) -> BookSide:
+        return self.yes if name == "yes" else self.no
+
+    def apply_snapshot(self, yes_levels, no_levels):
+        self.yes.clear()
+        self.no.clear()
+        for price, qty in yes_levels:
+            self.yes.set(price, qty)
+        for price, qty in no_levels:
+            self.no.set(price, qty)
+
+    def apply_levels(self, side: str, levels):
+        # Absolute [price, qty] updates, qty == 0 removes the level
+        book_side = self.yes if side == "yes" else self.no
+        for price, qty in levels:
+            book_side.set(price, qty)
+
+    def best_prices(self):
+        # Returns (best_yes_bid, best_yes_ask); same conventions as the old dict book
+        best_bid = self.yes.best
+        best_no_bid = self.no.best
+        best_ask = 100 - best_no_bid if best_no_bid > 0 else 100
+        return best_bid, best_ask
+
+    def imbalance(self) -> float:
+        bid_vol = self.yes.best_qty()
+        ask_vol = self.no.best_qty()
+        total = bid_vol + ask_vol
+        if total == 0:
+            return 0.0
+        return (bid_vol - ask_vol) / total
+
+    def cumulative_depth(self, side: str, levels: int = None) -> int:
+        return self.side(side).depth(levels)
+
+    def is_empty(self) -> bool:
+        return self.yes.count == 0 and self.no.count == 0
+
+    def to_dict(self):
+        return {"yes": self.yes.to_dict(), "no": self.no.to_dict()}
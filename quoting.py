@@ -0,0 +1,127 @@
+import numpy as np
+
+# Quote math shared by the per-market strategy and the portfolio engine.
+#   compute_quote   one market, plain Python (MarketMakingStrategy.on_market_update)
+#   compute_quotes  every market at once over NumPy arrays, same semantics
+#   QuoteEngine     keeps the last quotes and reports only the markets that changed
+#                   (supervisor workers quote their markets through it, see PortfolioQuoter)
+# Prices are YES cents: target_bid buys YES, target_ask sells YES (= buys NO at 100 - ask).
+# skew_per_100 and alpha are Config.INVENTORY_SKEW_PER_100 and Config.IMBALANCE_ALPHA.
+
+def compute_quote(best_bid: int, best_ask: int, imbalance: float, net_position: int, spread: int,
+                  skew_per_100: float, alpha: float):
+    # Returns (target_bid, target_ask), or None for an empty book
+    if best_bid == 0 and best_ask == 100:
+        return None
+
+    mid = (best_bid + best_ask) / 2
+
+    # Risk: Inventory Skew
+    # If we have positive position (Long YES), we want to sell YES -> Lower target price
+    # If we have negative position (Long NO/Short YES), we want to buy YES -> Higher target price
+    inventory_skew = -(net_position / 100.0) * skew_per_100
+
+    # Alpha factor: increase price if buying pressure (positive imbalance)
+    alpha_adj = imbalance * alpha
+
+    fair_value = mid + alpha_adj + inventory_skew
+
+    target_bid = int(fair_value - spread)
+    target_ask = int(fair_value + spread) # Target Ask for YES
+
+    # Competitive Logic
+    if best_bid > target_bid:
+        max_bid = best_ask - 1
+        if best_bid < max_bid:
+            target_bid = best_bid
+
+    if best_ask < target_ask:
+        min_ask = best_bid + 1
+        if best_ask > min_ask:
+            target_ask = best_ask
+
+    # Safety checks
+    if target_bid < 1: target_bid = 1
+    if target_ask > 99: target_ask = 99
+    if target_bid >= target_ask:
+        target_bid = best_bid
+        target_ask = max(target_bid + 1, best_ask)
+        if target_ask > 99: target_bid = 98; target_ask = 99
+    return target_bid, target_ask
+
+def compute_quotes(best_bid, best_ask, imbalance, net_position, spread, skew_per_100: float, alpha: float):
+    # Vectorized compute_quote: array inputs (spread may be a scalar), returns
+    # (target_bid, target_ask, valid) int64/bool arrays; invalid rows are empty books
+    best_bid = np.asarray(best_bid, dtype=np.int64)
+    best_ask = np.asarray(best_ask, dtype=np.int64)
+    imbalance = np.asarray(imbalance, dtype=np.float64)
+    net_position = np.asarray(net_position, dtype=np.int64)
+
+    # Same float operations in the same order as the scalar path, so results match exactly
+    mid = (best_bid + best_ask) / 2
+    inventory_skew = -(net_position / 100.0) * skew_per_100
+    fair_value = mid + imbalance * alpha + inventory_skew
+    target_bid = np.trunc(fair_value - spread).astype(np.int64) # int() truncates toward zero
+    target_ask = np.trunc(fair_value + spread).astype(np.int64)
+
+    target_bid = np.where((best_bid > target_bid) & (best_bid < best_ask - 1), best_bid, target_bid)
+    target_ask = np.where((best_ask < target_ask) & (best_ask > best_bid + 1), best_ask, target_ask)
+
+    np.maximum(target_bid, 1, out=target_bid)
+    np.minimum(target_ask, 99, out=target_ask)
+    crossed = target_bid >= target_ask
+    if crossed.any():
+        fallback_ask = np.maximum(best_bid + 1, best_ask)
+        capped = fallback_ask > 99
+        target_bid = np.where(crossed, np.where(capped, 98, best_bid), target_bid)
+        target_ask = np.where(crossed, np.where(capped, 99, fallback_ask), target_ask)
+
+    valid = ~((best_bid == 0) & (best_ask == 100))
+    return target_bid, target_ask, valid
+
+class QuoteEngine:
+    # Batch quoting for a fixed list of markets: update() recomputes the given markets (all
+    # of them by default) in one pass and returns the indices whose (bid, ask) changed
+    def __init__(self, tickers, spread: int, skew_per_100: float, alpha: float):
+        self.tickers = list(tickers)
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        self.spread = spread
+        self.skew_per_100 = skew_per_100
+        self.alpha = alpha
+        n = len(self.tickers)
+        self.bid = np.zeros(n, dtype=np.int64) # last emitted quotes, 0/0 = none
+        self.ask = np.zeros(n, dtype=np.int64)
+
+    @classmethod
+    def from_config(cls, config, tickers):
+        return cls(tickers, config.SPREAD_CENTS, config.INVENTORY_SKEW_PER_100, config.IMBALANCE_ALPHA)
+
+    def update(self, best_bid, best_ask, imbalance, net_position, indices=None):
+        # Inputs are aligned with `indices` (market positions in self.tickers) when given
+        bid, ask, valid = compute_quotes(best_bid, best_ask, imbalance, net_position, self.spread,
+                                         self.skew_per_100, self.alpha)
+        # Empty books pull their quotes (0/0), which is a change if anything was quoted
+        bid[~valid] = 0
+        ask[~valid] = 0
+        if indices is None:
+            changed = np.flatnonzero((bid != self.bid) | (ask != self.ask))
+            self.bid = bid
+            self.ask = ask
+            return changed
+        indices = np.asarray(indices, dtype=np.intp)
+        changed = indices[(bid != self.bid[indices]) | (ask != self.ask[indices])]
+        self.bid[indices] = bid
+        self.ask[indices] = ask
+        return changed
+
+    def quote(self, ticker: str):
+        # Last (bid, ask) computed for one market, None for an empty book
+        i = self.index[ticker]
+        bid, ask = int(self.bid[i]), int(self.ask[i])
+        return (bid, ask) if bid else None
+
+    def quotes(self, indices=None):
+        # [(ticker, bid, ask)] for the given indices (all markets by default); bid/ask None = no quote
+        if indices is None:
+            indices = range(len(self.tickers))
+        return [(self.tickers[i], int(self.bid[i]) or None, int(self.ask[i]) or None) for i in indices]
@@ -0,0 +1,50 @@
+import struct
+import time
+
+# Append-only feed log: each record is [recv time ns: int64][length: uint32][raw frame bytes]
+RECORD_HEADER = struct.Struct("<qI")
+
+class FeedRecorder:
+    # Writes raw WS frames exactly as received so replays exercise the real decode path
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.path = path
+        self.file = open(path, "ab", buffering=buffer_size)
+        self.frames = 0
+
+    def write(self, raw, ts_ns: int = None):
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        if ts_ns is None:
+            ts_ns = time.time_ns()
+        self.file.write(RECORD_HEADER.pack(ts_ns, len(raw)))
+        self.file.write(raw)
+        self.frames += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+def read_frames(path: str):
+    # Yields (ts_ns, raw bytes). A truncated trailing record (e.g. after a crash) is ignored.
+    with open(path, "rb") as f:
+        data = f.read()
+    yield from iter_frames(data)
+
+def iter_frames(data, copy: bool = True):
+    # copy=False yields memoryview slices of `data` instead of bytes; they keep the
+    # underlying buffer exported until released
+    view = memoryview(data)
+    header_size = RECORD_HEADER.size
+    offset = 0
+    end = len(view)
+    while offset + header_size <= end:
+        ts_ns, length = RECORD_HEADER.unpack_from(view, offset)
+        offset += header_size
+        if offset + length > end:
+            break
+        frame = view[offset:offset + length]
+        yield ts_ns, bytes(frame) if copy else frame
+        offset += length
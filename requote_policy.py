@@ -0,0 +1,107 @@
+import time
+from scheduler import TokenBucket
+
+# Decides whether a side whose target price moved is actually repriced. Both sides are buys
+# (YES bid, NO bid), so "behind" means resting below the target (less aggressive than wanted:
+# some fill probability lost) and "ahead" resting above it (more aggressive: adverse selection).
+# A resting quote is kept when
+#   band      the target is at most REQUOTE_BAND_BEHIND_CENTS above or REQUOTE_BAND_AHEAD_CENTS
+#             below the resting price
+#   min_rest  the order has rested less than REQUOTE_MIN_REST_MS (keeps queue priority), unless
+#             it is ahead of the target by more than the ahead band: that is never held
+#   budget    the market's REQUOTE_MAX_ORDERS_PER_SECOND token bucket is empty
+# Pulls (no target) always go through; new placements only count against the budget.
+# Every kept quote is charged as quality cost: the cents between resting and target price,
+# summed per suppressed evaluation and integrated over time (cent-seconds, behind/ahead).
+
+SUPPRESS_REASONS = ("band", "min_rest", "budget")
+
+class RequotePolicy:
+    def __init__(self, band_behind: int = 0, band_ahead: int = 0, min_rest_seconds: float = 0.0,
+                 orders_per_second: float = 0.0, clock=time.monotonic):
+        self.band_behind = band_behind
+        self.band_ahead = band_ahead
+        self.min_rest = min_rest_seconds
+        self.clock = clock # seconds; replays pass their frame clock
+        self.budget = TokenBucket(orders_per_second, clock=clock)
+        self.rested_at = {'yes': None, 'no': None} # when the resting order got its current price
+        self.retry_in = None # seconds until a held requote could go out (min_rest/budget), None = no retry
+        self.allowed = 0
+        self.suppressed = dict.fromkeys(SUPPRESS_REASONS, 0)
+        self.deviation_cents = 0 # summed over suppressed evaluations
+        self.max_deviation_cents = 0
+        self.cent_seconds = {'behind': 0.0, 'ahead': 0.0}
+        self._off_target = {'yes': None, 'no': None} # (since, target - resting) while a kept quote is off
+
+    @classmethod
+    def from_config(cls, config, clock=time.monotonic):
+        return cls(config.REQUOTE_BAND_BEHIND_CENTS, config.REQUOTE_BAND_AHEAD_CENTS,
+                   config.REQUOTE_MIN_REST_MS / 1000, config.REQUOTE_MAX_ORDERS_PER_SECOND, clock)
+
+    def allow(self, side: str, current: int, target: int) -> bool:
+        # current: resting price (None = nothing resting); target: the new price, != current
+        now = self.clock()
+        self._settle(side, now)
+        reason = None
+        retry = None
+        if current is not None:
+            gap = target - current
+            if -self.band_ahead <= gap <= self.band_behind:
+                reason = "band"
+            elif (self.min_rest and -gap <= self.band_ahead and self.rested_at[side] is not None
+                  and now - self.rested_at[side] < self.min_rest):
+                reason = "min_rest"
+                retry = self.min_rest - (now - self.rested_at[side])
+        if reason is None:
+            wait = self.budget.delay(1)
+            if wait:
+                reason = "budget"
+                retry = wait
+        if reason is None:
+            self.budget.take(1)
+            self.allowed += 1
+            self._off_target[side] = None
+            return True
+        self.suppressed[reason] += 1
+        if retry is not None:
+            self.retry_in = retry if self.retry_in is None else min(self.retry_in, retry)
+        if current is not None:
+            deviation = abs(target - current)
+            self.deviation_cents += deviation
+            self.max_deviation_cents = max(self.max_deviation_cents, deviation)
+            self._off_target[side] = (now, target - current)
+        return False
+
+    def on_order(self, side: str, price: int):
+        # The side's resting order changed (placed, repriced, filled or cancelled; None = gone)
+        now = self.clock()
+        self._settle(side, now)
+        self._off_target[side] = None
+        self.rested_at[side] = now if price is not None else None
+
+    def take_retry(self):
+        retry, self.retry_in = self.retry_in, None
+        return retry
+
+    def _settle(self, side: str, now: float):
+        # Charges the time a kept quote has spent off target since the last look
+        off = self._off_target[side]
+        if off is not None:
+            since, gap = off
+            self.cent_seconds['behind' if gap > 0 else 'ahead'] += abs(gap) * (now - since)
+            self._off_target[side] = (now, gap)
+
+    def report(self):
+        now = self.clock()
+        for side in self._off_target:
+            self._settle(side, now)
+        suppressed = sum(self.suppressed.values())
+        return {
+            'allowed': self.allowed,
+            'suppressed': suppressed,
+            **{f'suppressed_{r}': n for r, n in self.suppressed.items()},
+            'avg_deviation_cents': self.deviation_cents / suppressed if suppressed else 0.0,
+            'max_deviation_cents': self.max_deviation_cents,
+            'behind_cent_seconds': self.cent_seconds['behind'],
+            'ahead_cent_seconds': self.cent_seconds['ahead'],
+        }
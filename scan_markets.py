@@ -1,78 +1,189 @@
+import asyncio
+import time
+import numpy as np
 from config import load_config
 from client import KalshiClient
 
-def find_best_market(client: KalshiClient):
-    print("Scanning for best market opportunities...")
+PAGE_LIMIT = 1000 # max page size for GET /markets
+
+# Cursor pagination is sequential, so the universe is split into disjoint close-time
+# windows whose cursor chains are fetched concurrently (seconds from now; None = open end).
+CLOSE_WINDOWS = [
+    (None, 86400),
+    (86400, 7 * 86400),
+    (7 * 86400, 30 * 86400),
+    (30 * 86400, 90 * 86400),
+    (90 * 86400, 365 * 86400),
+    (365 * 86400, None),
+]
+
+def iter_market_pages(client: KalshiClient, status: str = "open", limit: int = PAGE_LIMIT, **filters):
+    # Follows the cursor until the last page, yielding each page's market list
+    cursor = None
+    while True:
+        data = client.get_markets(limit=limit, status=status, cursor=cursor, **filters)
+        yield data.get("markets", [])
+        cursor = data.get("cursor")
+        if not cursor:
+            break
+
+async def _fetch_window(client, queue, status, limit, filters):
+    cursor = None
+    try:
+        while True:
+            data = await client.get_markets(limit=limit, status=status, cursor=cursor, **filters)
+            await queue.put(data.get("markets", []))
+            cursor = data.get("cursor")
+            if not cursor:
+                break
+    finally:
+        await queue.put(None)
+
+async def aiter_market_pages(client, status: str = "open", limit: int = PAGE_LIMIT, windows=CLOSE_WINDOWS):
+    # Async client: one cursor chain per close-time window, all in flight at once.
+    # Pages are yielded in arrival order.
+    now = int(time.time())
+    queue = asyncio.Queue()
+    tasks = []
+    for lo, hi in windows:
+        filters = {}
+        if lo is not None:
+            filters["min_close_ts"] = now + lo
+        if hi is not None:
+            filters["max_close_ts"] = now + hi
+        tasks.append(asyncio.create_task(_fetch_window(client, queue, status, limit, filters)))
+    remaining = len(tasks)
     try:
-        # Fetch mostly open markets
-        data = client.get_markets(limit=1000, status="open")
-        markets = data.get("markets", [])
-        
-        candidates = []
+        while remaining:
+            page = await queue.get()
+            if page is None:
+                remaining -= 1
+                continue
+            yield page
+        # Surface any fetch error after every window finished
+        for t in tasks:
+            t.result()
+    finally:
+        for t in tasks:
+            t.cancel()
+
+class MarketColumns:
+    # Columnar view of the fields market selection needs, one NumPy array per field
+    def __init__(self):
+        self.tickers = []
+        self.titles = []
+        self._seen = set()
+        self._cols = {"bid": [], "ask": [], "vol": [], "oi": [], "liq": []}
+        self.bid = self.ask = self.vol = self.oi = self.liq = np.zeros(0, dtype=np.int64)
+
+    def add_page(self, markets):
+        cols = self._cols
         for m in markets:
-            # Metrics
-            bid = m.get('yes_bid', 0)
-            ask = m.get('yes_ask', 100)
-            vol = m.get('volume', 0)
-            
-            # 1. Basic Filters
-            if bid <= 1 or ask >= 99: continue # Empty book
-            if bid >= ask: continue # Inverted or crossed
-            
-            # 2. Spread Calculation
-            spread = ask - bid
-            
-            # 3. Liquidity Filter (Ensure active market)
-            '''
-            Volume: Total contracts traded
-            Open Interest: Total active contracts
-            Liquidity: Approx Book depth in cents
-            '''
-            oi = m.get('open_interest', 0)
-            liq = m.get('liquidity', 0)
-            
-            # Require substantial volume and depth
-            # $1,000 liquidity = 100,000 cents
-            if vol < 1000 or oi < 3000 or liq < 50000: continue 
-            
-            # 4. Sanity Check on Spread
-            # If spread is > 15 cents, it's likely broken/untouchable
-            if spread > 10: continue
-
-            score = spread 
-            
-            candidates.append({
-                'ticker': m['ticker'],
-                'bid': bid,
-                'ask': ask,
-                'spread': spread,
-                'vol': vol,
-                'title': m.get('title')
-            })
-            
-        # Sort by Spread Descending
-        candidates.sort(key=lambda x: x['spread'], reverse=True)
-        
+            ticker = m['ticker']
+            if ticker in self._seen:
+                continue # window boundaries may overlap
+            self._seen.add(ticker)
+            self.tickers.append(ticker)
+            self.titles.append(m.get('title'))
+            # Missing (or null) fields get the same defaults the per-market loop used
+            ask = m.get('yes_ask')
+            cols["bid"].append(m.get('yes_bid') or 0)
+            cols["ask"].append(100 if ask is None else ask)
+            cols["vol"].append(m.get('volume') or 0)
+            cols["oi"].append(m.get('open_interest') or 0)
+            cols["liq"].append(m.get('liquidity') or 0)
+
+    def finalize(self):
+        for name, values in self._cols.items():
+            setattr(self, name, np.asarray(values, dtype=np.int64))
+        return self
+
+    @classmethod
+    def from_pages(cls, pages):
+        cols = cls()
+        for page in pages:
+            cols.add_page(page)
+        return cols.finalize()
+
+    def __len__(self):
+        return len(self.tickers)
+
+def rank_markets(cols: MarketColumns, k: int = 10, max_spread: int = 10, min_volume: int = 1000,
+                 min_open_interest: int = 3000, min_liquidity: int = 50000):
+    # Same filters as the original per-market loop, applied to whole columns:
+    # skip empty books (bid <= 1 or ask >= 99) and crossed books, require volume,
+    # open interest and liquidity ($1,000 = 100,000 cents of depth), and drop
+    # spreads wider than max_spread. Ranked by spread, widest first.
+    if len(cols) == 0:
+        return []
+    bid, ask = cols.bid, cols.ask
+    spread = ask - bid
+    mask = (
+        (bid > 1) & (ask < 99) & (bid < ask)
+        & (cols.vol >= min_volume) & (cols.oi >= min_open_interest) & (cols.liq >= min_liquidity)
+        & (spread <= max_spread)
+    )
+    idx = np.flatnonzero(mask)
+    if idx.size == 0:
+        return []
+    # Stable sort keeps API order among equal spreads, like list.sort(reverse=True)
+    top = idx[np.argsort(-spread[idx], kind="stable")[:k]]
+    return [
+        {
+            'ticker': cols.tickers[i],
+            'bid': int(bid[i]),
+            'ask': int(ask[i]),
+            'spread': int(spread[i]),
+            'vol': int(cols.vol[i]),
+            'title': cols.titles[i]
+        }
+        for i in top
+    ]
+
+def find_top_markets(client: KalshiClient, k: int = 10):
+    print("Scanning for best market opportunities...")
+    try:
+        cols = MarketColumns.from_pages(iter_market_pages(client, status="open"))
+        candidates = rank_markets(cols, k)
         if not candidates:
             print("No suitable markets found.")
-            return None
-            
-        return candidates[0]
+        return candidates
+    except Exception as e:
+        print(f"Error scanning: {e}")
+        return []
 
+async def find_top_markets_async(client, k: int = 10, windows=CLOSE_WINDOWS):
+    print("Scanning for best market opportunities...")
+    try:
+        cols = MarketColumns()
+        async for page in aiter_market_pages(client, status="open", windows=windows):
+            cols.add_page(page)
+        candidates = rank_markets(cols.finalize(), k)
+        if not candidates:
+            print("No suitable markets found.")
+        return candidates
     except Exception as e:
         print(f"Error scanning: {e}")
-        return None
+        return []
+
+def find_best_market(client: KalshiClient):
+    candidates = find_top_markets(client, k=1)
+    return candidates[0] if candidates else None
 
 def scan():
     config = load_config()
     client = KalshiClient(config)
-    best = find_best_market(client)
-    
-    if best:
+    top = find_top_markets(client, k=5)
+
+    if top:
+        best = top[0]
         print(f"\nBest Opportunity Found: {best['ticker']}")
         print(f"Title: {best['title']}")
         print(f"Spread: {best['spread']} (Bid {best['bid']} / Ask {best['ask']})")
         print(f"Volume: {best['vol']}")
+        print("\nRunners-up:")
+        for m in top[1:]:
+            print(f"  {m['ticker']}: spread {m['spread']} (Bid {m['bid']} / Ask {m['ask']}), vol {m['vol']}")
     else:
         print("No opportunities found.")
 
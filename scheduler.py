@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import deque
+from metrics import metrics
+
+# Rate-limited, priority-ordered REST dispatch in front of AsyncKalshiClient.request.
+#   Token buckets per exchange limit class: "read" (GET) and "write" (everything else).
+#   Priorities: cancels first, then creates/amends, then reads (positions, markets).
+#   A queued request with a `key` is superseded by a newer one with the same key; the
+#   older caller gets Superseded instead of sending a stale price.
+#   429 responses empty the bucket and put the request back at the front of its queue.
+# Requests go out immediately while nothing is queued ahead of them and tokens are
+# available, so the scheduler adds no latency under the limits.
+
+CANCEL, CREATE, READ = 0, 1, 2
+PRIORITY_NAMES = ("cancel", "create", "read")
+
+class Superseded(Exception):
+    # A newer request with the same key replaced this one before it was sent
+    pass
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "clock")
+
+    def __init__(self, rate: float, capacity: float = None, clock=time.monotonic):
+        self.rate = rate # tokens per second, 0 = unlimited
+        self.capacity = capacity or rate # one second of burst by default
+        self.tokens = self.capacity
+        self.clock = clock # seconds; replays pass their frame clock
+        self.updated = clock()
+
+    def delay(self, cost: float) -> float:
+        # Seconds until `cost` tokens are available (0 = now)
+        if not self.rate:
+            return 0.0
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        cost = min(cost, self.capacity) # an oversized batch still goes out once the bucket is full
+        return 0.0 if self.tokens >= cost else (cost - self.tokens) / self.rate
+
+    def take(self, cost: float):
+        if self.rate:
+            self.tokens -= min(cost, self.capacity)
+
+    def drain(self):
+        self.tokens = 0.0
+        self.updated = self.clock()
+
+class _Request:
+    __slots__ = ("priority", "bucket", "cost", "key", "args", "future", "submitted_ns", "retries", "dropped")
+
+    def __init__(self, priority, bucket, cost, key, args, future):
+        self.priority = priority
+        self.bucket = bucket
+        self.cost = cost
+        self.key = key
+        self.args = args
+        self.future = future
+        self.submitted_ns = time.perf_counter_ns()
+        self.retries = 0
+        self.dropped = False
+
+class RequestScheduler:
+    def __init__(self, send, reads_per_second: float, writes_per_second: float, max_retries: int = 3):
+        self.send = send # coroutine function(*args) performing the HTTP request
+        self.buckets = {"read": TokenBucket(reads_per_second), "write": TokenBucket(writes_per_second)}
+        self.max_retries = max_retries
+        self.queues = [deque() for _ in PRIORITY_NAMES]
+        self.depth = [0] * len(PRIORITY_NAMES) # live (not superseded) entries per queue
+        self.queued = {} # key -> queued request
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limited = 0 # 429 responses
+        self._wakeup = None
+        self._runner = None
+        for i, name in enumerate(PRIORITY_NAMES):
+            metrics.gauge(f"rest_queue_{name}", lambda i=i: self.depth[i])
+
+    async def submit(self, priority: int, bucket: str, cost: float, key, *args):
+        # Fast path: nothing queued at or above this priority and tokens to spare
+        tokens = self.buckets[bucket]
+        future = asyncio.get_running_loop().create_future()
+        if not any(self.depth[:priority + 1]) and tokens.delay(cost) == 0:
+            tokens.take(cost)
+            self.sent += 1
+            try:
+                return await self._send(bucket, args)
+            except Exception as e:
+                if getattr(e, "status", None) != 429 or not self.max_retries:
+                    raise
+            entry = _Request(priority, bucket, cost, key, args, future)
+            entry.retries = 1
+            self._requeue(entry)
+            return await future
+
+        entry = _Request(priority, bucket, cost, key, args, future)
+        if key is not None:
+            self.supersede(key)
+            self.queued[key] = entry
+        self.queues[priority].append(entry)
+        self.depth[priority] += 1
+        self._kick()
+        return await entry.future
+
+    def supersede(self, key) -> bool:
+        # Drops the queued request with this key, if any, before it is sent
+        old = self.queued.pop(key, None)
+        if old is None:
+            return False
+        self._drop(old)
+        old.future.set_exception(Superseded(f"superseded by a newer request for {key}"))
+        self.coalesced += 1
+        return True
+
+    async def _send(self, bucket, args):
+        try:
+            return await self.send(*args)
+        except Exception as e:
+            if getattr(e, "status", None) == 429:
+                self.rate_limited += 1
+                metrics.inc("rest_rate_limited")
+                self.buckets[bucket].drain()
+            raise
+
+    def _requeue(self, entry):
+        # Back to the front of its queue after a 429; the drained bucket spaces out the retry.
+        # The retry can be superseded like any queued request, and is itself superseded if a
+        # newer request with its key was queued while it was in flight.
+        if entry.key is not None:
+            if entry.key in self.queued:
+                entry.future.set_exception(Superseded(f"superseded by a newer request for {entry.key}"))
+                self.coalesced += 1
+                return
+            self.queued[entry.key] = entry
+        self.queues[entry.priority].appendleft(entry)
+        self.depth[entry.priority] += 1
+        self._kick()
+
+    def _drop(self, entry):
+        entry.dropped = True
+        self.depth[entry.priority] -= 1
+
+    def _kick(self):
+        if self._runner is None or self._runner.done():
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            wait = self._dispatch_ready()
+            if wait is None and not any(self.depth):
+                return # idle; the next submit restarts the runner
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_ready(self):
+        # Sends every request whose bucket allows it, highest priority first. A bucket that
+        # is blocked for a higher priority is not spent on lower ones. Returns the time until
+        # the next blocked request could go, or None if nothing is blocked.
+        wait = None
+        blocked = set()
+        for queue in self.queues:
+            while queue:
+                entry = queue[0]
+                if entry.dropped:
+                    queue.popleft()
+                    continue
+                if entry.bucket in blocked:
+                    break
+                delay = self.buckets[entry.bucket].delay(entry.cost)
+                if delay > 0:
+                    blocked.add(entry.bucket)
+                    wait = delay if wait is None else min(wait, delay)
+                    break
+                queue.popleft()
+                self.depth[entry.priority] -= 1
+                if self.queued.get(entry.key) is entry:
+                    del self.queued[entry.key]
+                self.buckets[entry.bucket].take(entry.cost)
+                self.sent += 1
+                if metrics.enabled:
+                    metrics.since("rest_queue_wait", entry.submitted_ns)
+                asyncio.get_running_loop().create_task(self._complete(entry))
+        return wait
+
+    async def _complete(self, entry):
+        try:
+            result = await self._send(entry.bucket, entry.args)
+        except Exception as e:
+            if getattr(e, "status", None) == 429 and entry.retries < self.max_retries:
+                entry.retries += 1
+                self._requeue(entry)
+                return
+            if not entry.future.done():
+                entry.future.set_exception(e)
+            return
+        if not entry.future.done():
+            entry.future.set_result(result)
+
+    def stats(self):
+        return {
+            "queued": dict(zip(PRIORITY_NAMES, self.depth)),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+        }
@@ -0,0 +1,255 @@
+import mmap
+import os
+import time
+import numpy as np
+from multiprocessing import parent_process, resource_tracker, shared_memory
+from orderbook import MIN_PRICE, MAX_PRICE, NUM_LEVELS
+
+# Order books, resting orders and positions for every traded market in one shared memory
+# segment, so a monitor/risk process can read all of them with numpy without copies or IPC.
+# Each market owns a fixed slot; only the worker trading that market writes to it.
+# The same layout can live in a memory-mapped file (open_file) instead: the page cache keeps
+# it when the bot crashes or restarts, and the next run warm-starts from it.
+#   tickers     S64      [n]
+#   version     uint64   [n]          seqlock: odd while the slot is being written
+#   levels      int32    [n, 2, 100]  qty per price, side 0 = YES bids, 1 = NO bids
+#   best        int32    [n, 2]       best bid price per side, 0 = empty
+#   position    int64    [n]          net YES contracts
+#   updated_ns  int64    [n]          time.time_ns() of the last book write
+#   stale       uint8    [n]          1 until a snapshot arrives, or after a gap/disconnect
+#   order_id    S48      [n, 2]       our resting order per side (YES, NO), b"" = none
+#   client_id   S48      [n, 2]       its client_order_id
+#   order_price int32    [n, 2]       its price in cents of that side
+# The first 8 bytes hold n so readers can attach by name alone.
+
+YES, NO = 0, 1
+
+def _layout(n: int):
+    fields = [
+        ("tickers", "S64", (n,)),
+        ("version", np.uint64, (n,)),
+        ("levels", np.int32, (n, 2, NUM_LEVELS)),
+        ("best", np.int32, (n, 2)),
+        ("position", np.int64, (n,)),
+        ("updated_ns", np.int64, (n,)),
+        ("stale", np.uint8, (n,)),
+        ("order_id", "S48", (n, 2)),
+        ("client_id", "S48", (n, 2)),
+        ("order_price", np.int32, (n, 2)),
+    ]
+    offset = 8
+    out = []
+    for name, dtype, shape in fields:
+        dtype = np.dtype(dtype)
+        offset = (offset + 7) & ~7
+        out.append((name, dtype, shape, offset))
+        offset += dtype.itemsize * int(np.prod(shape))
+    return out, offset
+
+class _MappedFile:
+    # File-backed stand-in for SharedMemory (same buf/name/close/unlink surface). Writes land
+    # in the page cache, so they survive the process but not necessarily a machine crash.
+    def __init__(self, path: str, size: int = None):
+        self.name = path
+        with open(path, "r+b" if size is None else "w+b") as f:
+            if size is not None:
+                f.truncate(size)
+            self._mmap = mmap.mmap(f.fileno(), 0)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+    def unlink(self):
+        pass # the file is the state, it outlives its writers
+
+class SharedBooks:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        n = int(np.ndarray((1,), np.int64, shm.buf, 0)[0]) if len(shm.buf) >= 8 else -1
+        if n < 0 or len(shm.buf) < _layout(n)[1]:
+            shm.close()
+            raise ValueError(f"{shm.name} does not hold a books layout")
+        self.capacity = n
+        views = []
+        for name, dtype, shape, offset in _layout(n)[0]:
+            setattr(self, name, np.ndarray(shape, dtype, shm.buf, offset))
+            if dtype.kind != "S":
+                # Flat memoryviews for the writers: a memoryview item store is several times
+                # cheaper than a numpy scalar store, and deltas touch a handful of items
+                end = offset + dtype.itemsize * int(np.prod(shape))
+                view = shm.buf[offset:end].cast(dtype.char)
+                setattr(self, f"_{name}_mv", view)
+                views.append(view)
+        self._views = views
+        self.slots = {t.decode(): i for i, t in enumerate(self.tickers) if t}
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, tickers, name: str = None):
+        size = _layout(len(tickers))[1]
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        return cls._init(shm, tickers, owner=True)
+
+    @classmethod
+    def _init(cls, shm, tickers, owner: bool = False):
+        np.ndarray((1,), np.int64, shm.buf, 0)[0] = len(tickers)
+        books = cls(shm, owner=owner)
+        books.tickers[:] = [t.encode() for t in tickers]
+        books.slots = {t: i for i, t in enumerate(tickers)}
+        books.stale[:] = 1
+        return books
+
+    @classmethod
+    def open_file(cls, path: str, tickers):
+        # Memory-mapped state file for these tickers. Whatever the previous run left for them
+        # (books, resting orders, positions) is kept and marked stale; a file for a different
+        # set of markets is rebuilt with just the slots they have in common.
+        tickers = list(tickers)
+        previous = None
+        if os.path.exists(path):
+            try:
+                previous = cls(_MappedFile(path))
+            except (OSError, ValueError) as e:
+                print(f"Ignoring state file {path}: {e}")
+        if previous is not None and list(previous.slots) == tickers:
+            previous.version[previous.version % 2 == 1] += 1 # writer died mid-write
+            previous.stale[:] = 1
+            return previous
+        tmp = f"{path}.tmp"
+        books = cls._init(_MappedFile(tmp, _layout(len(tickers))[1]), tickers)
+        if previous is not None:
+            for ticker, slot in books.slots.items():
+                if ticker in previous.slots:
+                    books._copy_slot(slot, previous, previous.slots[ticker])
+            previous.close()
+        books.stale[:] = 1
+        books.close()
+        os.replace(tmp, path)
+        return cls(_MappedFile(path))
+
+    def _copy_slot(self, slot: int, other, other_slot: int):
+        for name, _, _, _ in _layout(self.capacity)[0]:
+            if name not in ("tickers", "version"):
+                getattr(self, name)[slot] = getattr(other, name)[other_slot]
+
+    @classmethod
+    def attach(cls, name: str):
+        if os.path.isfile(name):
+            return cls(_MappedFile(name)) # state file written by open_file
+        shm = shared_memory.SharedMemory(name=name)
+        # Python < 3.13 registers every attach with the resource tracker, which unlinks the
+        # segment when the attaching process exits. Workers share the supervisor's tracker
+        # (and its registration); a standalone reader has its own and must drop it.
+        if parent_process() is None:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm)
+
+    def close(self):
+        for name, _, _, _ in _layout(self.capacity)[0]:
+            setattr(self, name, None) # views must go before the buffer can be released
+            setattr(self, f"_{name}_mv", None)
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # --- writers (the worker owning the slot) ---
+
+    def write_book(self, slot: int, book):
+        version = self._version_mv
+        version[slot] += 1
+        levels = self.levels[slot]
+        levels[YES] = book.yes.levels
+        levels[NO] = book.no.levels
+        best = self._best_mv
+        best[2 * slot] = book.yes.best
+        best[2 * slot + 1] = book.no.best
+        self._stale_mv[slot] = 0
+        self._updated_ns_mv[slot] = time.time_ns()
+        version[slot] += 1
+
+    def write_levels(self, slot: int, yes, no, book):
+        # Delta: only the changed [price, qty] levels are copied
+        version = self._version_mv
+        version[slot] += 1
+        levels = self._levels_mv
+        base = 2 * slot * NUM_LEVELS
+        for price, qty in yes:
+            if MIN_PRICE <= price <= MAX_PRICE:
+                levels[base + price] = qty if qty > 0 else 0
+        base += NUM_LEVELS
+        for price, qty in no:
+            if MIN_PRICE <= price <= MAX_PRICE:
+                levels[base + price] = qty if qty > 0 else 0
+        best = self._best_mv
+        best[2 * slot] = book.yes.best
+        best[2 * slot + 1] = book.no.best
+        self._updated_ns_mv[slot] = time.time_ns()
+        version[slot] += 1
+
+    def set_stale(self, slot: int, stale: bool = True):
+        self._stale_mv[slot] = 1 if stale else 0
+
+    def set_position(self, slot: int, position: int):
+        self._position_mv[slot] = position
+
+    def update_position(self, ticker: str, position: int):
+        # Ledger position listener
+        slot = self.slots.get(ticker)
+        if slot is not None:
+            self._position_mv[slot] = position
+
+    def set_order(self, slot: int, side: int, order_id: str, price: int, client_order_id: str = None):
+        # Id last: a write torn by a crash leaves the old id, which the warm start re-checks anyway
+        self.order_price[slot, side] = price
+        self.client_id[slot, side] = (client_order_id or "").encode()
+        self.order_id[slot, side] = order_id.encode()
+
+    def clear_order(self, slot: int, side: int):
+        self.order_id[slot, side] = b""
+
+    # --- readers ---
+
+    def read_book(self, slot: int, retries: int = 100):
+        # Consistent copy of one slot: (levels [2, 100], best [2]), retried while a write is in progress
+        version = self.version
+        for _ in range(retries):
+            before = int(version[slot])
+            if before & 1:
+                continue
+            levels = self.levels[slot].copy()
+            best = self.best[slot].copy()
+            if int(version[slot]) == before:
+                return levels, best
+        raise RuntimeError(f"slot {slot} kept changing while being read")
+
+    def snapshot_levels(self, slot: int):
+        # (yes, no) as [[price, qty], ...] lists, the shape of an orderbook_snapshot
+        levels, _ = self.read_book(slot)
+        return tuple([[int(p), int(side[p])] for p in np.flatnonzero(side)] for side in levels)
+
+    def read_orders(self, slot: int):
+        # {'yes'/'no': {'id', 'price', 'client_order_id'} or None}
+        orders = {}
+        for side, name in ((YES, 'yes'), (NO, 'no')):
+            order_id = self.order_id[slot, side].decode()
+            orders[name] = {
+                'id': order_id,
+                'price': int(self.order_price[slot, side]),
+                'client_order_id': self.client_id[slot, side].decode() or None,
+            } if order_id else None
+        return orders
+
+    def top_of_book(self):
+        # Vectorized (bid, ask) for every slot; YES ask = 100 - best NO bid
+        best = self.best.copy()
+        ask = np.where(best[:, NO] > 0, 100 - best[:, NO], 100)
+        return best[:, YES], ask
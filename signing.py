@@ -0,0 +1,119 @@
+import asyncio
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from config import Config
+from metrics import metrics
+
+# cryptography is imported with the first key load rather than with this module, so startup
+# can load the key (and pay for the import) on a worker thread; see main.py
+serialization = hashes = InvalidSignature = PSS_PADDING = None
+
+def _import_cryptography():
+    global serialization, hashes, InvalidSignature, PSS_PADDING
+    if PSS_PADDING is not None:
+        return
+    from cryptography.hazmat.primitives import serialization, hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.exceptions import InvalidSignature
+    PSS_PADDING = padding.PSS(
+        mgf=padding.MGF1(hashes.SHA256()),
+        salt_length=padding.PSS.DIGEST_LENGTH
+    )
+
+def load_private_key(pem: bytes):
+    _import_cryptography()
+    return serialization.load_pem_private_key(pem, password=None)
+
+def sign_pss_text(private_key, text: str) -> str:
+    message = text.encode('utf-8')
+    try:
+        signature = private_key.sign(message, PSS_PADDING, hashes.SHA256())
+        return base64.b64encode(signature).decode('utf-8')
+    except InvalidSignature as e:
+        raise ValueError("RSA sign PSS failed") from e
+
+# Process pool workers load the key once at startup and keep it here
+_worker_key = None
+
+def _init_worker(pem: bytes):
+    global _worker_key
+    _worker_key = load_private_key(pem)
+
+def _sign_in_worker(text: str) -> str:
+    return sign_pss_text(_worker_key, text)
+
+class RequestSigner:
+    # Holds the loaded API key and signs Kalshi auth headers.
+    # Async callers get signatures from a worker pool so RSA-PSS never runs on the
+    # event loop and concurrent requests are signed in parallel.
+    # mode="thread" shares the key in-process and keeps signing off the loop thread,
+    # mode="process" reloads the key in each worker process so signatures scale across cores.
+    def __init__(self, key_id: str, pem: bytes, workers: int = 0, mode: str = "thread"):
+        self.key_id = key_id
+        self.pem = pem
+        self.private_key = load_private_key(pem)
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self._executor = None
+
+    @classmethod
+    def from_config(cls, config: Config):
+        with open(config.PRIVATE_KEY_PATH, "rb") as key_file:
+            pem = key_file.read()
+        return cls(config.KEY_ID, pem, workers=config.SIGNING_WORKERS, mode=config.SIGNING_MODE)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker, initargs=(self.pem,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="signer")
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def sign(self, text: str) -> str:
+        return sign_pss_text(self.private_key, text)
+
+    async def sign_async(self, text: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            return await loop.run_in_executor(self._get_executor(), _sign_in_worker, text)
+        return await loop.run_in_executor(self._get_executor(), self.sign, text)
+
+    def _message(self, method: str, path: str):
+        timestamp = str(int(time.time() * 1000))
+        # Strip query parameters for signature
+        path_without_query = path.split('?')[0]
+        return timestamp, timestamp + method + path_without_query
+
+    def _headers(self, timestamp: str, signature: str):
+        return {
+            'KALSHI-ACCESS-KEY': self.key_id,
+            'KALSHI-ACCESS-SIGNATURE': signature,
+            'KALSHI-ACCESS-TIMESTAMP': timestamp,
+            'Content-Type': 'application/json'
+        }
+
+    def auth_headers(self, method: str, path: str):
+        started = time.perf_counter_ns() if metrics.enabled else 0
+        timestamp, msg_string = self._message(method, path)
+        headers = self._headers(timestamp, self.sign(msg_string))
+        if started:
+            metrics.since("sign", started)
+        return headers
+
+    async def auth_headers_async(self, method: str, path: str):
+        started = time.perf_counter_ns() if metrics.enabled else 0
+        timestamp, msg_string = self._message(method, path)
+        headers = self._headers(timestamp, await self.sign_async(msg_string))
+        if started:
+            metrics.since("sign", started)
+        return headers
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+# Startup pipeline pieces for main.py. Phases that don't depend on each other overlap:
+#
+#   config -+- key load (thread, imports cryptography) ------ WS handshake ---------+
+#           +- universe cache (thread) -- pre-subscribe top-K candidates ------------+
+#           +- trading imports (thread: aiohttp, numpy) -- market scan if stale -----+
+#                                            select -> first snapshot -> warm start -> first quote
+#
+# Worker threads only win time while the loop waits on the network (the GIL serializes the
+# imports themselves), so the handshake and the scan are started as early as possible.
+
+def read_universe_cache(config):
+    # market_universe pulls in numpy; both the import and the JSON parse stay off the loop
+    from market_universe import load_cached_universe
+    return load_cached_universe(config)
+
+def import_trading_modules():
+    # Only needed once a market is picked; imported off the loop while the socket connects
+    import async_client, strategy, shared_books # noqa: F401
+
+class StartupTimer:
+    # Wall-clock timeline of startup in ms since `origin` (perf_counter at process start).
+    # Phases keep their start and end so overlap is visible; marks are single points.
+    def __init__(self, origin: float = None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = {} # name -> (start_ms, end_ms)
+        self.marks = {} # name -> ms
+
+    def now(self) -> float:
+        return (time.perf_counter() - self.origin) * 1000
+
+    def timed(self, name: str, fn, *args):
+        start = self.now()
+        try:
+            return fn(*args)
+        finally:
+            self.phases[name] = (start, self.now())
+
+    async def run(self, name: str, awaitable):
+        start = self.now()
+        try:
+            return await awaitable
+        finally:
+            self.phases[name] = (start, self.now())
+
+    def task(self, name: str, awaitable):
+        return asyncio.create_task(self.run(name, awaitable))
+
+    def mark(self, name: str):
+        self.marks.setdefault(name, self.now())
+
+    def report(self) -> str:
+        rows = [(start, f"  {name:18s} {start:8.1f} -> {end:8.1f} ms  ({end - start:7.1f} ms)")
+                for name, (start, end) in self.phases.items()]
+        rows += [(at, f"  {name:18s} {at:8.1f} ms") for name, at in self.marks.items()]
+        total = self.marks.get("first quote")
+        head = f"Startup: first quote after {total:.0f} ms" if total is not None else "Startup: no quote yet"
+        return "\n".join([head] + [row for _, row in sorted(rows)])
+
+async def watch_first_quote(timer: StartupTimer, market_data, strategy, timeout: float = 60):
+    # Marks the first live book and the first resting quote of the traded market, then
+    # prints the timeline (after `timeout` at the latest)
+    ticker = strategy.ticker
+    live = asyncio.Event()
+
+    def on_book():
+        if not market_data.is_stale(ticker):
+            live.set()
+
+    market_data.add_listener(on_book, ticker=ticker)
+    on_book()
+    try:
+        await asyncio.wait_for(live.wait(), timeout)
+        timer.mark("first snapshot")
+        await asyncio.wait_for(strategy.quoting.wait(), timeout)
+        timer.mark("first quote")
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        market_data.remove_listener(on_book, ticker=ticker)
+    print(timer.report())
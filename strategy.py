@@ -1,121 +1,463 @@
 import asyncio
+import time
+from collections import deque
 from config import Config
-from client import KalshiClient
+from client import KalshiClient, OrderNotFound, order_payload, quote_key
 from market_data import MarketDataService
+from ledger import Ledger
+from metrics import metrics, origin_ns
+from event_log import events
+from quoting import QuoteEngine, compute_quote
+from requote_policy import RequotePolicy
+from scheduler import Superseded
+from shared_books import YES, NO
 
 class MarketMakingStrategy:
+    async def _call(self, method, *args, **kwargs):
+        # Await async clients directly; run blocking clients off the event loop
+        # so REST round trips never stall market data processing.
+        self.rest_calls += 1
+        if asyncio.iscoroutinefunction(method):
+            return await method(*args, **kwargs)
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def fetch_positions(self):
+        # Every market position, following the cursor past the first page
+        positions = []
+        cursor = None
+        while True:
+            data = await self._call(self.client.get_positions, cursor=cursor)
+            positions.extend(data.get('market_positions', []))
+            cursor = data.get('cursor')
+            if not cursor:
+                return positions
+
     async def sync_inventory(self):
+        # With a ledger, fills arrive over the WS and this is only a slow drift check;
+        # without one (no user channels), positions are polled as before.
+        interval = self.config.RECONCILE_SECONDS if self.ledger is not None else 10
         while True:
             try:
-                data = self.client.get_positions()
-                # data is likely dict with keys 'market_positions' which is a list
-                positions = data.get('market_positions', [])
-                
-                found = False
-                for p in positions:
-                    if p.get('ticker') == self.config.TARGET_TICKER:
-                        # Net position: YES is +, NO is -?
-                        # Or typically Kalshi separates them.
-                        # For simplicity, let's sum 'position' if 'market_position' (or similar field)
-                        # Actually Kalshi likely returns 'position' as signed int relative to YES?
-                        # Or 'side' field.
-                        # Let's assume we just want specific exposures. 
-                        # IF explicit 'yes_count' and 'no_count' exist:
-                        yes = p.get('position', 0) # Simplification
-                        # For now, let's assume 'position' is the net exposure to YES.
-                        self.net_position = yes
-                        found = True
-                        break
-                
-                if not found:
-                    self.net_position = 0
-                    
-                # print(f"Inventory Synced: {self.net_position}")
+                positions = await self.fetch_positions()
+                if self.ledger is not None:
+                    for ticker, (local, actual) in self.ledger.reconcile(positions).items():
+                        events.warn("position_drift", ticker=ticker, ledger=local, exchange=actual)
+                    self.net_position = self.ledger.position(self.ticker)
+                else:
+                    # 'position' is the signed net exposure: YES positive, NO negative
+                    self.net_position = next(
+                        (p.get('position', 0) for p in positions if p.get('ticker') == self.ticker), 0
+                    )
             except Exception as e:
-                print(f"Inventory Sync Error: {e}")
+                events.error("inventory_sync_failed", ticker=self.ticker, error=e)
             
-            await asyncio.sleep(10)
+            await asyncio.sleep(interval)
 
-    def __init__(self, config: Config, client: KalshiClient, market_data: MarketDataService):
+    def __init__(self, config: Config, client: KalshiClient, market_data: MarketDataService, ticker: str = None, ledger: Ledger = None):
         self.config = config
         self.client = client
         self.market_data = market_data
+        # One strategy instance per market; defaults to the configured ticker
+        self.ticker = ticker or config.TARGET_TICKER
         # Track active orders by side: {'yes': {'price': 10, 'id': '...'}, 'no': {'price': 90, 'id': '...'}}
         self.current_pos = {'yes': None, 'no': None}
         self.net_position = 0
+        self.rest_calls = 0
+        # Per-side request in flight (task) and the latest target price for that side
+        self.inflight = {'yes': None, 'no': None}
+        self.desired = {'yes': None, 'no': None}
+        self.desired_origin = None
+        self._legs = {} # leg task -> (sides, targets it was launched with)
+        # True while warm_start() checks restored orders against the exchange; no quoting meanwhile
+        self.warming = False
+        self.quoting = asyncio.Event() # set once an order of ours is resting (startup timing)
+        # Which target changes are worth an order (bands, min resting time, orders/second budget)
+        self.policy = RequotePolicy.from_config(config)
+        # Held requotes are retried on a timer when the book goes quiet (replays re-evaluate every frame)
+        self.retry_held = True
+        # Set by PortfolioQuoter: targets come precomputed from its batch instead of compute_quote
+        self.engine = None
+        self._retry = None
+        # Evaluation -> leg response latency, first and second leg reported separately
+        self.leg_latency = {'first': deque(maxlen=10000), 'second': deque(maxlen=10000)}
+        # Shared account ledger updated from WS fills; net_position follows it on every fill
+        self.ledger = ledger
+        # Resting orders and position are mirrored into the market's shared slot (state file or
+        # supervisor segment); a restart picks them up from there, see warm_start()
+        self.shared = market_data.shared
+        self._slot = self.shared.slots.get(self.ticker) if self.shared is not None else None
+        if self._slot is not None:
+            self.current_pos.update(self.shared.read_orders(self._slot))
+            self.net_position = int(self.shared.position[self._slot])
+            if ledger is not None:
+                ledger.restore(self.ticker, self.net_position)
+        if ledger is not None:
+            self.net_position = ledger.position(self.ticker)
+            ledger.add_listener(self.on_fill, ticker=self.ticker)
+            ledger.add_position_listener(self.on_position, ticker=self.ticker)
 
     async def run(self):
-        print("Starting Strategy (Event-Driven)...")
-        self.market_data.add_listener(self.on_market_update)
+        events.info("strategy_started", ticker=self.ticker)
+        self.market_data.add_listener(self.on_market_update, ticker=self.ticker)
         asyncio.create_task(self.sync_inventory())
+        asyncio.create_task(self.report_loop())
+        await self.warm_start()
         # Keep running until cancelled
         try:
             await asyncio.Future()
         except asyncio.CancelledError:
-            print("Strategy stopping...")
+            events.info("strategy_stopped", ticker=self.ticker)
+
+    async def warm_start(self):
+        # Quotes resume once the orders we think are resting have been checked (one REST
+        # round trip, overlapping the WS handshake and snapshot)
+        self.warming = True
+        try:
+            await self.reconcile_orders()
+        finally:
+            self.warming = False
+        if not self.market_data.is_stale(self.ticker):
+            self.market_data.dispatcher.notify(self.ticker)
+
+    async def reconcile_orders(self):
+        # Remembered orders still resting are kept at the exchange's price; a side with none
+        # adopts a resting order we lost track of; anything else resting is cancelled, so a
+        # restart never leaves two quotes on a side
+        try:
+            data = await self._call(self.client.get_orders, ticker=self.ticker, status="resting")
+        except Exception as e:
+            events.error("order_check_failed", ticker=self.ticker, error=e) # saved orders are kept
+            return
+        resting = {'yes': [], 'no': []}
+        for order in data.get('orders', []):
+            if order.get('action') == "buy" and order.get('side') in resting:
+                resting[order['side']].append(order)
+        stray = []
+        for side, orders in resting.items():
+            saved = self.current_pos.get(side)
+            keep = next((o for o in orders if saved and o['order_id'] == saved['id']), orders[0] if orders else None)
+            stray += [o['order_id'] for o in orders if o is not keep]
+            if keep is None:
+                self.current_pos[side] = None
+                self._save_order(side)
+            else:
+                price = keep['yes_price'] if side == "yes" else keep['no_price']
+                self._set_order(side, price, keep, keep.get('remaining_count', self.config.ORDER_SIZE))
+        if stray:
+            try:
+                await self._call(self.client.batch_cancel_orders, stray)
+            except Exception as e:
+                events.error("stray_cancel_failed", ticker=self.ticker, orders=len(stray), error=e)
+        events.info("warm_start", ticker=self.ticker, yes=self._resting_price("yes"), no=self._resting_price("no"),
+                    position=self.net_position, stray_cancelled=len(stray))
+
+    async def report_loop(self, every: float = 60.0):
+        while True:
+            await asyncio.sleep(every)
+            for key, r in self.latency_report().items():
+                events.info("leg_latency", ticker=self.ticker, leg=key, p50_ms=round(r['p50_ms'], 1),
+                            p99_ms=round(r['p99_ms'], 1), count=r['count'])
+            stats = self.market_data.feed_stats()
+            events.info("feed", ticker=self.ticker, updates=stats['messages_received'], evaluations=stats['evaluations_run'])
+            events.info("requote_policy", ticker=self.ticker, **self.policy.report())
+
+    def on_fill(self, fill):
+        self.net_position = self.ledger.position(self.ticker)
+        events.info("fill", ticker=self.ticker, action=fill['action'], side=fill['side'], count=fill['count'],
+                    price=fill['price'], position=self.net_position)
+        if fill['remaining'] == 0:
+            current = self.current_pos.get(fill['side'])
+            if current and current['id'] == fill['order_id']:
+                self.current_pos[fill['side']] = None
+                self._save_order(fill['side'])
+        # Requote now with the new inventory skew instead of waiting for the next book change
+        self.market_data.dispatcher.notify(self.ticker)
+
+    def on_position(self, ticker, position):
+        # market_position pushes and REST reconciles can move the position without a fill we saw
+        if position == self.net_position:
+            return
+        self.net_position = position
+        self.market_data.dispatcher.notify(self.ticker)
+
+    def _set_order(self, side, price, order, size):
+        if order.get('status') == "executed":
+            # Crossed and filled on arrival; the fill itself arrives on the ledger
+            self.current_pos[side] = None
+            self._save_order(side)
+            return
+        self.current_pos[side] = {'price': price, 'id': order['order_id'], 'client_order_id': order.get('client_order_id')}
+        self._save_order(side)
+        self.quoting.set()
+        if self.ledger is not None:
+            self.ledger.track_order(order['order_id'], self.ticker, side, "buy", price, size)
+
+    def _clear_order(self, side):
+        current = self.current_pos.get(side)
+        if current and self.ledger is not None:
+            self.ledger.forget_order(current['id'])
+        self.current_pos[side] = None
+        self._save_order(side)
+
+    def _resting_price(self, side):
+        current = self.current_pos.get(side)
+        return current['price'] if current else None
+
+    def _save_order(self, side):
+        # Every change of a side's resting order passes here
+        current = self.current_pos[side]
+        self.policy.on_order(side, current['price'] if current else None)
+        if self._slot is None:
+            return
+        index = YES if side == "yes" else NO
+        if current is None:
+            self.shared.clear_order(self._slot, index)
+        else:
+            self.shared.set_order(self._slot, index, current['id'], current['price'], current.get('client_order_id'))
 
     async def on_market_update(self):
-        best_bid, best_ask = self.market_data.get_best_prices()
+        started = time.perf_counter_ns() if metrics.enabled else 0
+        if self.warming:
+            return # warm_start() re-evaluates when it is done
+        if self.market_data.is_stale(self.ticker):
+            # Book can't be trusted (sequence gap or disconnect): pull quotes until it resyncs
+            if any(self.current_pos.get(s) for s in ("yes", "no")) or any(self.inflight.values()):
+                events.warn("book_stale", ticker=self.ticker) # pulling quotes
+                self.requote({"yes": None, "no": None}, self.config.ORDER_SIZE)
+            return
+        best_bid, best_ask = self.market_data.get_best_prices(self.ticker)
         
         if best_bid == 0 and best_ask == 100:
             # print("Empty book, waiting for data...")
             return
 
-        print(f"Market: {best_bid} @ {best_ask}")
+        events.tick("market", ticker=self.ticker, bid=best_bid, ask=best_ask)
 
-        # 1. Calculate Target Quotes
-        mid = (best_bid + best_ask) / 2
-        
-        # Alpha: Order Book Imbalance
-        imbalance = self.market_data.get_imbalance() # -1.0 to 1.0
-        
-        # Risk: Inventory Skew
-        # If we have positive position (Long YES), we want to sell YES -> Lower target price
-        # If we have negative position (Long NO/Short YES), we want to buy YES -> Higher target price
-        # Skew factor: reduce price by X cents per 100 contracts
-        inventory_skew = -(self.net_position / 100.0) * 0.5 
-        
-        # Alpha factor: increase price if buying pressure (positive imbalance)
-        alpha_adj = imbalance * 2.0 # Swing 2 cents based on full imbalance
-        
-        fair_value = mid + alpha_adj + inventory_skew
-        
-        spread = self.config.SPREAD_CENTS
-        
-        target_bid = int(fair_value - spread)
-        target_ask = int(fair_value + spread) # Target Ask for YES
-        
-        # Competitive Logic
-        if best_bid > target_bid:
-            max_bid = best_ask - 1 
-            if best_bid < max_bid:
-                # print(f"Squeezing Bid: {target_bid} -> {best_bid}")
-                target_bid = best_bid
-        
-        if best_ask < target_ask:
-            min_ask = best_bid + 1
-            if best_ask > min_ask:
-                # print(f"Squeezing Ask: {target_ask} -> {best_ask}")
-                target_ask = best_ask
-        
-        # Safety checks
-        if target_bid < 1: target_bid = 1
-        if target_ask > 99: target_ask = 99
-        if target_bid >= target_ask:
-            target_bid = best_bid
-            target_ask = max(target_bid + 1, best_ask)
-            if target_ask > 99: target_bid = 98; target_ask = 99
+        # 1. Calculate Target Quotes: fair value from mid, book imbalance (alpha) and
+        # inventory skew, then squeezed to the touch and clamped (see quoting.py)
+        if self.engine is not None:
+            target_bid, target_ask = self.engine.quote(self.ticker)
+        else:
+            imbalance = self.market_data.get_imbalance(self.ticker) # -1.0 to 1.0
+            config = self.config
+            target_bid, target_ask = compute_quote(best_bid, best_ask, imbalance, self.net_position, config.SPREAD_CENTS,
+                                                   config.INVENTORY_SKEW_PER_100, config.IMBALANCE_ALPHA)
             
         # 2. Update orders if needed
         size = self.config.ORDER_SIZE
         
-        # YES SIDE
-        await self.update_order("yes", "buy", target_bid, size)
-        
+        # YES SIDE: buy YES at target_bid
         # NO SIDE (Synthetic Sell YES)
         # Sell YES at target_ask == Buy NO at (100 - target_ask)
         target_no_price = 100 - target_ask
-        await self.update_order("no", "buy", target_no_price, size)
+        
+        self.requote({"yes": target_bid, "no": target_no_price}, size)
+        if started:
+            metrics.since("quote", started)
+
+    def _needs_update(self, side):
+        desired = self.desired[side]
+        current = self.current_pos.get(side)
+        if desired is None:
+            return current is not None # pulls always go out
+        if current is not None and current['price'] == desired:
+            return False
+        if self.policy.allow(side, current['price'] if current else None, desired):
+            return True
+        metrics.inc("requotes_suppressed")
+        return False
+
+    def _schedule_retry(self):
+        retry = self.policy.take_retry()
+        if retry is None or not self.retry_held or self._retry is not None:
+            return
+        self._retry = asyncio.get_running_loop().call_later(retry, self._retry_quotes)
+
+    def _retry_quotes(self):
+        self._retry = None
+        if not self.market_data.is_stale(self.ticker):
+            self.market_data.dispatcher.notify(self.ticker)
+
+    def requote(self, targets, size):
+        # Both legs are dispatched concurrently as their own tasks, so the NO leg is no
+        # longer a full round trip behind the YES leg and the evaluation returns at once.
+        # A side with a request in flight is skipped (its order ID may not be back yet);
+        # the latest target is kept in self.desired and re-applied when the leg completes,
+        # unless the leg is still queued in the client (rate limited): then it is withdrawn
+        # and the new target goes out in its place.
+        # Target changes the requote policy holds back leave the resting quote where it is.
+        # Returns the tasks launched.
+        self.desired.update(targets)
+        self.desired_origin = origin_ns.get() # frame behind the latest targets, for follow-ups
+        freed = self._withdraw_queued(targets)
+        candidates = list(targets) + [s for s in freed if s not in targets]
+        sides = [s for s in candidates if self.inflight[s] is None and self._needs_update(s)]
+        self._schedule_retry()
+        if not sides:
+            return []
+        tracker = {'start': time.perf_counter(), 'done': 0, 'legs': len(sides)}
+        batch = (
+            len(sides) == 2
+            and self.config.REQUOTE_MODE != "cancel_replace"
+            and all(self.desired[s] is not None and self.current_pos.get(s) is None for s in sides)
+        )
+        if batch:
+            # Neither side resting: both legs go out in one batched create
+            return [self._launch(sides, self._place_legs(sides, size), tracker)]
+        return [self._launch([s], self._update_leg(s, size), tracker) for s in sides]
+
+    def _withdraw_queued(self, targets):
+        # Legs whose target moved and whose request is still waiting in the client's queue are
+        # withdrawn (their op gets Superseded and ends quietly). Returns the sides freed.
+        cancel_queued = getattr(self.client, "cancel_queued", None)
+        freed = []
+        if cancel_queued is None:
+            return freed
+        for task in {self.inflight[s] for s in targets if self.inflight[s] is not None}:
+            sides, launched = self._legs[task]
+            if all(self.desired[s] == launched[s] for s in sides):
+                continue
+            if cancel_queued(quote_key([(self.ticker, s) for s in sides])):
+                for s in sides:
+                    self.inflight[s] = None
+                freed += sides
+        return freed
+
+    def _launch(self, sides, op, tracker):
+        launched = {s: self.desired[s] for s in sides}
+        task = asyncio.create_task(self._run_leg(sides, op, tracker, launched))
+        self._legs[task] = (sides, launched)
+        for s in sides:
+            self.inflight[s] = task
+        return task
+
+    async def _run_leg(self, sides, op, tracker, launched):
+        task = asyncio.current_task()
+        try:
+            await op
+        finally:
+            self._legs.pop(task, None)
+            replaced = any(self.inflight[s] is not task for s in sides)
+            for s in sides:
+                if self.inflight[s] is task:
+                    self.inflight[s] = None
+            if not replaced:
+                self._record_leg_latency(tracker, len(sides))
+        if replaced:
+            return # withdrawn while queued; the leg that replaced it carries the latest target
+        # The target moved while this leg was in flight: apply the latest one
+        stale = {s: self.desired[s] for s in sides if self.desired[s] != launched[s]}
+        if stale:
+            # Latency of the follow-up counts from the frame that set the new target
+            origin_ns.set(self.desired_origin)
+            self.requote(stale, self.config.ORDER_SIZE)
+
+    def _record_leg_latency(self, tracker, legs_done):
+        # Evaluation start -> leg response; with two legs the later one is the "second leg"
+        elapsed_ms = (time.perf_counter() - tracker['start']) * 1000
+        for _ in range(legs_done):
+            tracker['done'] += 1
+            key = 'first' if tracker['done'] == 1 else 'second'
+            self.leg_latency[key].append(elapsed_ms)
+
+    async def _update_leg(self, side, size):
+        price = self.desired[side]
+        current = self.current_pos.get(side)
+        if price is None:
+            # Quote pulled while nothing was in flight for this side
+            await self.cancel_side(side)
+        elif self.config.REQUOTE_MODE == "cancel_replace":
+            await self.update_order(side, "buy", price, size)
+        elif current is None or not await self.amend_order(side, "buy", price, size):
+            await self.update_order(side, "buy", price, size)
+
+    async def _place_legs(self, sides, size):
+        await self.place_batch([(s, self.desired[s]) for s in sides], "buy", size)
+
+    async def cancel_side(self, side):
+        current = self.current_pos.get(side)
+        if not current:
+            return
+        try:
+            await self._call(self.client.cancel_order, current['id'])
+        except OrderNotFound:
+            pass # already filled or cancelled
+        except Exception as e:
+            # May still be resting: keep tracking it so the next evaluation retries the cancel
+            events.error("cancel_failed", ticker=self.ticker, side=side, error=e)
+            return
+        self._clear_order(side)
+
+    async def wait_for_quotes(self):
+        # Wait until no leg is in flight (follow-up legs included)
+        while True:
+            pending = {t for t in self.inflight.values() if t is not None}
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def latency_report(self):
+        report = {}
+        for key, samples in self.leg_latency.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            report[key] = {
+                'count': len(ordered),
+                'p50_ms': ordered[len(ordered) // 2],
+                'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+                'max_ms': ordered[-1]
+            }
+        return report
+
+    async def amend_order(self, side, action, price, size):
+        # Returns False only if the exchange reports the order gone (filled/cancelled), so the
+        # caller places a new one. Any other failure (timeout, 429, 5xx) may have left the order
+        # resting, possibly amended: it stays tracked at its old price and the next evaluation
+        # retries, rather than placing a second order on the side.
+        current = self.current_pos[side]
+        events.info("amend", ticker=self.ticker, side=side, old=current['price'], price=price)
+        try:
+            resp = await self._call(
+                self.client.amend_order, current['id'], self.ticker, action, size, price,
+                side=side, client_order_id=current.get('client_order_id')
+            )
+            if self.ledger is not None:
+                self.ledger.forget_order(current['id'])
+            self._set_order(side, price, resp['order'], size)
+            return True
+        except Superseded:
+            return True # withdrawn before it was sent; the order rests unchanged
+        except OrderNotFound:
+            events.info("amend_order_gone", ticker=self.ticker, side=side, order_id=current['id'])
+            self._clear_order(side)
+            return False
+        except Exception as e:
+            events.warn("amend_failed", ticker=self.ticker, side=side, error=e)
+            return True
+
+    async def place_batch(self, quotes, action, size):
+        orders = [order_payload(self.ticker, action, size, price, side) for side, price in quotes]
+        try:
+            resp = await self._call(self.client.batch_create_orders, orders)
+        except Superseded:
+            return # withdrawn before it was sent
+        except Exception as e:
+            events.error("batch_place_failed", ticker=self.ticker, error=e)
+            return
+        for (side, price), result in zip(quotes, resp.get('orders', [])):
+            self._record_placement(side, price, result, size)
+
+    def _record_placement(self, side, price, resp, size):
+        if resp.get('order'):
+            self._set_order(side, price, resp['order'], size)
+            events.info("placed", ticker=self.ticker, side=side, price=price)
+        elif resp.get('error'):
+            err = resp['error']
+            if err.get('code') == 'insufficient_balance':
+                events.warn("insufficient_balance", ticker=self.ticker, side=side, price=price)
+            else:
+                events.error("place_rejected", ticker=self.ticker, side=side, error=err)
 
     async def update_order(self, side, action, price, size):
         current = self.current_pos.get(side)
@@ -127,27 +469,49 @@ class MarketMakingStrategy:
 
         # If we have an order at WRONG price, cancel it first
         if current:
-            print(f"Updating {side.upper()}: Cancel {current['price']} -> New {price}")
+            events.info("replace", ticker=self.ticker, side=side, old=current['price'], price=price)
             try:
-                self.client.cancel_order(current['id'])
+                await self._call(self.client.cancel_order, current['id'])
+            except OrderNotFound:
+                pass # already filled or cancelled
             except Exception as e:
-                print(f"Cancel failed: {e}")
-            self.current_pos[side] = None
+                # Not known to be gone: placing now could leave two orders on the side
+                events.error("cancel_failed", ticker=self.ticker, side=side, error=e)
+                return
+            self._clear_order(side)
 
         # Place new order
         try:
-            resp = self.client.create_order(
-                self.config.TARGET_TICKER, action, size, price, side=side
+            resp = await self._call(
+                self.client.create_order, self.ticker, action, size, price, side=side
             )
-            if 'order' in resp:
-                oid = resp['order']['order_id']
-                self.current_pos[side] = {'price': price, 'id': oid}
-                print(f"Placed {side.upper()} at {price}")
-            elif 'error' in resp:
-                err = resp['error']
-                if err.get('code') == 'insufficient_balance':
-                    print(f"Skipped {side}: Insufficient Balance (Need ~{price}c)")
-                else:
-                    print(f"Error {side}: {err}")
+            self._record_placement(side, price, resp, size)
+        except Superseded:
+            pass # withdrawn before it was sent
         except Exception as e:
-            print(f"Place failed {side}: {e}")
+            events.error("place_failed", ticker=self.ticker, side=side, error=e)
+
+class PortfolioQuoter:
+    # Multi-market quote path (supervisor workers): the dispatcher hands over every market
+    # with pending updates as one batch, their targets are computed in a single QuoteEngine
+    # pass, then each strategy's evaluation picks up its precomputed quote. A batch is
+    # evaluated without yielding to the event loop, so books and positions cannot move
+    # between the pass and the evaluations.
+    def __init__(self, config: Config, market_data: MarketDataService, strategies):
+        self.market_data = market_data
+        self.strategies = {s.ticker: s for s in strategies}
+        self.engine = QuoteEngine.from_config(config, list(self.strategies))
+        for strategy in strategies:
+            strategy.engine = self.engine
+        market_data.dispatcher.prepare = self.prepare
+
+    def prepare(self, tickers):
+        tickers = [t for t in tickers if t in self.strategies]
+        if not tickers:
+            return
+        md = self.market_data
+        prices = [md.get_best_prices(t) for t in tickers]
+        self.engine.update([p[0] for p in prices], [p[1] for p in prices],
+                           [md.get_imbalance(t) for t in tickers],
+                           [self.strategies[t].net_position for t in tickers],
+                           [self.engine.index[t] for t in tickers])
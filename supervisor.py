@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+from config import Config
+from client import KalshiClient
+from signing import RequestSigner
+from async_client import AsyncKalshiClient
+from market_data import MarketDataService
+from strategy import MarketMakingStrategy, PortfolioQuoter
+from recorder import FeedRecorder
+from ledger import Ledger
+from metrics import metrics
+from event_log import events
+from market_universe import load_universe
+from shared_books import SharedBooks
+from monitor import print_summary
+
+# Supervisor mode (WORKERS > 1): the top SHARD_MARKETS markets are dealt round-robin to
+# worker processes. Each worker has its own WS connection, signer, HTTP pool and one
+# strategy per market (quoted together in batches, see PortfolioQuoter), and mirrors its books and positions into a shared memory segment
+# that the supervisor (and `python monitor.py <name>`) reads directly. A restarted worker
+# picks its markets' resting orders and positions back up from the segment.
+
+def shard(tickers, workers: int):
+    # Round-robin over the ranking so every worker gets a mix of busy and quiet markets
+    workers = max(1, min(workers, len(tickers)))
+    return [tickers[i::workers] for i in range(workers)]
+
+async def worker_main(config: Config, index: int, tickers, shm_name: str):
+    metrics.enabled = config.METRICS_ENABLED
+    events.configure(config)
+    events.start(f"{config.LOG_PATH}.{index}" if config.LOG_PATH else None)
+    books = SharedBooks.attach(shm_name)
+    signer = RequestSigner.from_config(config)
+    recorder = FeedRecorder(f"{config.RECORD_PATH}.{index}") if config.RECORD_PATH else None
+    ledger = Ledger()
+    ledger.position_listeners.append(books.update_position)
+    market_data = MarketDataService(config, signer=signer, market_tickers=tickers, recorder=recorder,
+                                    ledger=ledger, shared=books)
+    async_client = AsyncKalshiClient(config, signer=signer)
+    strategies = [MarketMakingStrategy(config, async_client, market_data, ticker=t, ledger=ledger) for t in tickers]
+    PortfolioQuoter(config, market_data, strategies) # every pending market quoted in one pass
+    print(f"[worker {index}] trading {', '.join(tickers)}")
+
+    asyncio.create_task(market_data.start())
+    metrics_runner = None
+    if metrics.enabled:
+        asyncio.create_task(metrics.summary_loop(config.METRICS_SUMMARY_SECONDS))
+        if config.METRICS_PORT:
+            metrics_runner = await metrics.serve(config.METRICS_HOST, config.METRICS_PORT + index)
+    try:
+        await asyncio.gather(*(s.run() for s in strategies))
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await async_client.close()
+        signer.close()
+        if recorder is not None:
+            recorder.close()
+        books.close()
+        events.stop()
+
+def run_worker(config: Config, index: int, tickers, shm_name: str):
+    try:
+        asyncio.run(worker_main(config, index, tickers, shm_name))
+    except KeyboardInterrupt:
+        pass
+
+def run_supervisor(config: Config):
+    print("Searching for markets...")
+    universe = load_universe(config, KalshiClient(config))
+    tickers = [m['ticker'] for m in universe.ranking[:config.SHARD_MARKETS]] or [config.TARGET_TICKER]
+    shards = shard(tickers, config.WORKERS)
+    # Rate limits are per account: each worker gets its share
+    config = config.model_copy(update={
+        "RATE_LIMIT_READS_PER_SECOND": config.RATE_LIMIT_READS_PER_SECOND / len(shards),
+        "RATE_LIMIT_WRITES_PER_SECOND": config.RATE_LIMIT_WRITES_PER_SECOND / len(shards),
+    })
+    # With a state file the segment is that file, so a restarted supervisor warm-starts too
+    books = SharedBooks.open_file(config.STATE_PATH, tickers) if config.STATE_PATH else SharedBooks.create(tickers)
+    print(f"{len(tickers)} markets across {len(shards)} workers; shared books: {books.name} "
+          f"(python monitor.py {books.name})")
+
+    # spawn: workers start clean instead of inheriting the supervisor's sockets and threads
+    ctx = multiprocessing.get_context("spawn")
+    procs = [None] * len(shards)
+
+    def launch(i):
+        procs[i] = ctx.Process(target=run_worker, args=(config, i, shards[i], books.name), name=f"worker-{i}")
+        procs[i].start()
+
+    try:
+        for i in range(len(shards)):
+            launch(i)
+        next_report = time.monotonic() + config.MONITOR_SECONDS
+        while True:
+            # Wake on a worker exiting or when the next report is due
+            wait([p.sentinel for p in procs], timeout=max(0.0, next_report - time.monotonic()))
+            for i, p in enumerate(procs):
+                if not p.is_alive():
+                    print(f"Worker {i} exited ({p.exitcode}), restarting")
+                    for t in shards[i]:
+                        books.set_stale(books.slots[t])
+                    time.sleep(1) # don't spin on a worker that dies at startup
+                    launch(i)
+            if time.monotonic() >= next_report:
+                print_summary(books)
+                next_report += config.MONITOR_SECONDS
+    finally:
+        for p in procs:
+            if p is not None and p.is_alive():
+                p.terminate()
+        for p in procs:
+            if p is not None:
+                p.join(5)
+        books.close()
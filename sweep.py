@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import csv
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import parent_process, resource_tracker, shared_memory
+from config import Config
+from recorder import iter_frames
+
+# Strategy parameter sweep over recorded sessions (recorder.py format):
+#   python sweep.py feed1.bin [feed2.bin ...] --spread 1,2,3 --skew 0.25,0.5,1 --alpha 0,2,4
+#   python sweep.py feed.bin --spread 1,4 --skew 0,2 --alpha 0,6 --random 64
+#   python sweep.py feed.bin --behind 0,1,2 --ahead 0,1 --rest 0,50,200
+# Every parameter set is replayed through the backtester (backtest.ReplayEngine) over all
+# sessions on a process pool, one worker per core. The parent reads the recordings once
+# into a shared memory segment; workers map it read-only and decode each session once
+# straight from the segment (no per-worker copy of the raw frames), then reuse the
+# decoded frames for every parameter set they are given.
+
+# Config field -> (flag, type)
+TUNABLES = {
+    "SPREAD_CENTS": ("spread", int),
+    "ORDER_SIZE": ("size", int),
+    "INVENTORY_SKEW_PER_100": ("skew", float),
+    "IMBALANCE_ALPHA": ("alpha", float),
+    "REQUOTE_BAND_BEHIND_CENTS": ("behind", int),
+    "REQUOTE_BAND_AHEAD_CENTS": ("ahead", int),
+    "REQUOTE_MIN_REST_MS": ("rest", float),
+    "REQUOTE_MAX_ORDERS_PER_SECOND": ("ops", float),
+}
+SORT_KEYS = ("pnl", "fill_rate", "inventory_variance", "churn")
+
+def parameter_grid(values):
+    # values: {field: [candidates]} -> every combination
+    fields = list(values)
+    return [dict(zip(fields, combo)) for combo in itertools.product(*(values[f] for f in fields))]
+
+def random_search(values, n: int, seed: int = 1):
+    # n draws, each field uniform between its smallest and largest candidate
+    rng = random.Random(seed)
+    draws = []
+    for _ in range(n):
+        params = {}
+        for field, candidates in values.items():
+            low, high = min(candidates), max(candidates)
+            if TUNABLES[field][1] is int:
+                params[field] = rng.randint(low, high)
+            else:
+                params[field] = round(rng.uniform(low, high), 3)
+        draws.append(params)
+    return draws
+
+def summarize(results):
+    # One row per parameter set across every session
+    frames = sum(r['frames'] for r in results)
+    quotes = sum(r['orders_created'] + r['orders_amended'] for r in results)
+    changes = quotes + sum(r['orders_cancelled'] for r in results)
+    fills = sum(r['fills'] for r in results)
+    return {
+        'pnl': sum(r['pnl_cents'] for r in results) / 100,
+        'fills': fills,
+        'fill_rate': fills / quotes if quotes else 0.0, # fills per order placed or repriced
+        'inventory_variance': sum(r['inventory_variance'] for r in results) / len(results),
+        'churn': changes * 1000 / frames if frames else 0.0, # order changes per 1k book frames
+    }
+
+class SharedRecordings:
+    # Raw recording files back to back in one shared memory segment; `bounds` are the
+    # (start, end) byte offsets of each session
+    def __init__(self, shm, bounds, owner: bool = False):
+        self.shm = shm
+        self.bounds = bounds
+        self.owner = owner
+
+    @classmethod
+    def create(cls, paths):
+        blobs = []
+        for path in paths:
+            with open(path, "rb") as f:
+                blobs.append(f.read())
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(len(b) for b in blobs)))
+        bounds = []
+        offset = 0
+        for blob in blobs:
+            shm.buf[offset:offset + len(blob)] = blob
+            bounds.append((offset, offset + len(blob)))
+            offset += len(blob)
+        return cls(shm, bounds, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, bounds):
+        shm = shared_memory.SharedMemory(name=name)
+        # Pool workers share the parent's resource tracker (see SharedBooks.attach)
+        if parent_process() is None:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, bounds)
+
+    def frames(self, session: int):
+        # Yields (ts_ns, memoryview) of one session, sliced from the segment without
+        # copying. The views pin the mapping: drop them before close()
+        start, end = self.bounds[session]
+        yield from iter_frames(self.shm.buf[start:end], copy=False)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# --- worker side ---
+
+_engines = None # one ReplayEngine per session, decoded once per worker
+_base_config = None
+
+def _init_worker(name: str, bounds, config: Config):
+    global _engines, _base_config
+    from backtest import ReplayEngine
+    recordings = SharedRecordings.attach(name, bounds)
+    try:
+        # Each engine consumes its session's views while decoding, so nothing references
+        # the segment once the messages are built
+        _engines = [ReplayEngine(config, recordings.frames(i)) for i in range(len(bounds))]
+        for engine in _engines:
+            engine.decode()
+    finally:
+        recordings.close()
+    _base_config = config
+
+def evaluate(params):
+    config = _base_config.model_copy(update=params)
+    results = [asyncio.run(engine.run(config=config)) for engine in _engines]
+    return params, summarize(results)
+
+def run_sweep(paths, candidates, config: Config, workers: int = 0, progress: bool = True):
+    # candidates: list of parameter dicts; returns [(params, summary)] in completion order
+    recordings = SharedRecordings.create(paths)
+    rows = []
+    started = time.perf_counter()
+    try:
+        # spawn: workers start clean and see the recordings only through the segment
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=(recordings.shm.name, recordings.bounds, config)) as pool:
+            futures = [pool.submit(evaluate, params) for params in candidates]
+            for future in as_completed(futures):
+                rows.append(future.result())
+                if progress:
+                    print(f"\r{len(rows)}/{len(candidates)} parameter sets "
+                          f"({time.perf_counter() - started:.1f}s)", end="", flush=True)
+    finally:
+        recordings.close()
+    if progress:
+        print()
+    return rows
+
+def rank(rows, key: str = "pnl"):
+    # Best first: highest PnL / fill rate, lowest inventory variance / churn
+    descending = key in ("pnl", "fill_rate")
+    return sorted(rows, key=lambda row: row[1][key], reverse=descending)
+
+def print_table(rows, fields, limit: int = 20):
+    header = "".join(f"{TUNABLES[f][0]:>8s}" for f in fields)
+    print(f"{'rank':>4s}{header}{'pnl $':>12s}{'fills':>8s}{'fill %':>8s}{'inv var':>14s}{'churn/1k':>10s}")
+    for i, (params, s) in enumerate(rows[:limit], 1):
+        values = "".join(f"{params[f]:>8g}" for f in fields)
+        print(f"{i:>4d}{values}{s['pnl']:>12,.2f}{s['fills']:>8d}{100 * s['fill_rate']:>7.1f}%"
+              f"{s['inventory_variance']:>14,.1f}{s['churn']:>10.1f}")
+
+def write_csv(path: str, rows, fields):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + list(SORT_KEYS) + ["fills"])
+        for params, s in rows:
+            writer.writerow([params[f] for f in fields] + [s[k] for k in SORT_KEYS] + [s['fills']])
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy tunables over recorded sessions")
+    parser.add_argument("recordings", nargs="+", help="feed recordings (RECORD_PATH files)")
+    for field, (flag, kind) in TUNABLES.items():
+        parser.add_argument(f"--{flag}", help=f"comma-separated {field} values (default: config)")
+    parser.add_argument("--random", type=int, default=0, help="random draws within each range instead of the grid")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=0, help="pool size (default: one per core)")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="pnl")
+    parser.add_argument("--top", type=int, default=20, help="rows printed")
+    parser.add_argument("--csv", help="write every row to this file")
+    args = parser.parse_args()
+
+    config = Config(API_KEY="sweep")
+    values = {}
+    for field, (flag, kind) in TUNABLES.items():
+        raw = getattr(args, flag)
+        values[field] = [kind(v) for v in raw.split(",")] if raw else [getattr(config, field)]
+    candidates = random_search(values, args.random, args.seed) if args.random else parameter_grid(values)
+    print(f"{len(candidates)} parameter sets x {len(args.recordings)} sessions")
+
+    rows = rank(run_sweep(args.recordings, candidates, config, workers=args.workers), args.sort)
+    fields = list(TUNABLES)
+    print_table(rows, fields, args.top)
+    if args.csv:
+        write_csv(args.csv, rows, fields)
+
+if __name__ == "__main__":
+    main()
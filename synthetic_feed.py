@@ -0,0 +1,109 @@
+import json
+import random
+import time
+from datetime import datetime, timezone
+from orderbook import OrderBook
+
+class SyntheticMarket:
+    # Generates a consistent random-walk Kalshi book as orderbook_snapshot / orderbook_delta
+    # messages in the same shape MarketDataService consumes. The book is never crossed:
+    # YES bids stay below `mid` and NO bids below 100 - mid.
+    def __init__(self, ticker: str, mid: int = 50, depth: int = 10, max_qty: int = 500,
+                 remove_prob: float = 0.3, move_prob: float = 0.02, seed=None, close_ts: int = None):
+        self.ticker = ticker
+        self.close_ts = close_ts or int(time.time()) + 7 * 86400
+        self.depth = depth
+        self.max_qty = max_qty
+        self.remove_prob = remove_prob
+        self.move_prob = move_prob
+        self.rng = random.Random(seed)
+        self.mid = min(max(mid, depth + 2), 98 - depth)
+        self.book = OrderBook()
+        for p in range(self.mid - depth, self.mid):
+            self.book.yes.set(p, self.rng.randint(1, max_qty))
+        for p in range(100 - self.mid - depth, 100 - self.mid):
+            self.book.no.set(p, self.rng.randint(1, max_qty))
+
+    def _top(self, side: str) -> int:
+        # Highest price a bid on `side` may rest at without crossing
+        return self.mid - 1 if side == "yes" else 100 - self.mid - 1
+
+    def snapshot(self):
+        return {
+            "type": "orderbook_snapshot",
+            "msg": {
+                "market_ticker": self.ticker,
+                "yes": [[p, q] for p, q in self.book.yes.items()],
+                "no": [[p, q] for p, q in self.book.no.items()]
+            }
+        }
+
+    def _move(self):
+        # Shift the mid one cent and pull any levels that would now cross
+        step = self.rng.choice((-1, 1))
+        self.mid = min(max(self.mid + step, self.depth + 2), 98 - self.depth)
+        changes = {"yes": [], "no": []}
+        for side in ("yes", "no"):
+            book_side = self.book.side(side)
+            top = self._top(side)
+            while book_side.best > top:
+                changes[side].append([book_side.best, 0])
+                book_side.set(book_side.best, 0)
+            # Refill the new top level so the book keeps its shape
+            if book_side.levels[top] == 0:
+                qty = self.rng.randint(1, self.max_qty)
+                book_side.set(top, qty)
+                changes[side].append([top, qty])
+        return changes
+
+    def next_delta(self):
+        rng = self.rng
+        if rng.random() < self.move_prob:
+            changes = self._move()
+        else:
+            side = "yes" if rng.random() < 0.5 else "no"
+            top = self._top(side)
+            price = rng.randint(max(1, top - self.depth + 1), top)
+            qty = 0 if rng.random() < self.remove_prob else rng.randint(1, self.max_qty)
+            self.book.side(side).set(price, qty)
+            changes = {side: [[price, qty]]}
+        msg = {"market_ticker": self.ticker}
+        msg.update(changes)
+        return {"type": "orderbook_delta", "msg": msg}
+
+    def market_info(self):
+        # /markets entry with the fields scan_markets filters on
+        best_bid, best_ask = self.book.best_prices()
+        return {
+            "ticker": self.ticker,
+            "event_ticker": self.ticker.rsplit("-", 1)[0],
+            "title": f"Synthetic market {self.ticker}",
+            "status": "open",
+            "close_time": datetime.fromtimestamp(self.close_ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "yes_bid": best_bid,
+            "yes_ask": best_ask,
+            "volume": 10000,
+            "open_interest": 10000,
+            "liquidity": 500000
+        }
+
+# Book shapes used by the benchmark suite
+PROFILES = {
+    "thin": dict(depth=3, max_qty=20, remove_prob=0.3, move_prob=0.02),
+    "deep": dict(depth=40, max_qty=5000, remove_prob=0.2, move_prob=0.01),
+    "churn": dict(depth=10, max_qty=500, remove_prob=0.6, move_prob=0.2),
+}
+
+def make_market(profile: str, ticker: str = "SYNTH", seed=None) -> SyntheticMarket:
+    return SyntheticMarket(ticker, seed=seed, **PROFILES[profile])
+
+def generate_frames(profile: str, n: int, ticker: str = "SYNTH", seed: int = 1):
+    # Raw JSON frames: one snapshot followed by n deltas, with sid/seq like the live feed
+    market = make_market(profile, ticker, seed)
+    frames = []
+    seq = 1
+    frames.append(json.dumps({"type": "orderbook_snapshot", "sid": 1, "seq": seq, "msg": market.snapshot()["msg"]}))
+    for _ in range(n):
+        seq += 1
+        frames.append(json.dumps({"type": "orderbook_delta", "sid": 1, "seq": seq, "msg": market.next_delta()["msg"]}))
+    return frames
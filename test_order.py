@@ -5,7 +5,7 @@ from config import load_config
 from client import KalshiClient
 from market_data import MarketDataService
 from strategy import MarketMakingStrategy
-from scan_markets import find_best_market
+from market_universe import load_universe
 
 async def run_live_test():
     print("Starting Live Order Test...")
@@ -17,7 +17,8 @@ async def run_live_test():
         
         # 1. Find Market
         print("Finding active market...")
-        market_info = find_best_market(client)
+        universe = load_universe(config, client)
+        market_info = universe.ranking[0] if universe.ranking else None
         if not market_info:
             print("No active market found.")
             sys.exit(1)
@@ -31,7 +32,7 @@ async def run_live_test():
         strategy = MarketMakingStrategy(config, client, market_data)
         
         # 3. Hook up strategy
-        market_data.add_listener(strategy.on_market_update)
+        market_data.add_listener(strategy.on_market_update, ticker=ticker)
         
         # 4. Start WebSocket in background
         print("Connecting to WebSocket...")
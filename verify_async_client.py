@@ -0,0 +1,54 @@
+import asyncio
+from aiohttp import web
+from async_client import AsyncKalshiClient
+from config import Config
+from mock_exchange import API_PATH, MockExchange
+from signing import RequestSigner
+from synthetic_feed import SyntheticMarket
+from verify_signing import make_pem
+
+
+async def verify_pool():
+    # Mock exchange that records the client port of every request it serves
+    mock = MockExchange([SyntheticMarket("MOCK-A", seed=1)])
+    peers = []
+
+    @web.middleware
+    async def record_peer(request, handler):
+        peers.append(request.transport.get_extra_info("peername")[1])
+        return await handler(request)
+
+    app = mock.app()
+    app.middlewares.append(record_peer)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    config = Config(API_KEY="test", KALSHI_API_URL=f"http://127.0.0.1:{runner.addresses[0][1]}{API_PATH}")
+    signer = RequestSigner("test", make_pem(), workers=2)
+    try:
+        async with AsyncKalshiClient(config, signer=signer, max_connections=4) as client:
+            session = client.session
+            connector = session.connector
+            assert connector.limit == 4
+
+            await asyncio.gather(*(client.get_balance() for _ in range(40)))
+            assert client.session is session and session.connector is connector
+            burst = set(peers)
+            assert 1 <= len(burst) <= 4, f"{len(burst)} connections for a pool of 4"
+
+            # Later requests ride the same keep-alive connections
+            for _ in range(10):
+                await client.get_orders(ticker="MOCK-A")
+            assert set(peers) == burst and len(peers) == 50
+            assert client.session is session and session.connector is connector
+        assert client.session is None and session.closed
+        print(f"[OK] 50 requests share one session and connector over {len(burst)} keep-alive connections")
+    finally:
+        signer.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    print("--- Starting Async Client Verification ---")
+    asyncio.run(verify_pool())
+    print("--- Verification Complete ---")
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from backtest import ReplayEngine, SimulatedExchange, inventory_variance
+from client import OrderNotFound
+from config import Config
+from orderbook import OrderBook
+
+# Hand-built books and feeds with the expected fills, positions and PnL worked out by hand.
+# Strategy tunables that move fair value (imbalance, inventory skew) are zeroed so every
+# quote is mid -/+ SPREAD_CENTS squeezed to the touch.
+FLAT = dict(API_KEY="test", IMBALANCE_ALPHA=0, INVENTORY_SKEW_PER_100=0)
+
+
+def snapshot(yes, no, ticker="T"):
+    return json.dumps({"type": "orderbook_snapshot", "msg": {"market_ticker": ticker, "yes": yes, "no": no}}).encode()
+
+
+def delta(side, price, qty, ticker="T"):
+    return json.dumps({"type": "orderbook_delta", "msg": {"market_ticker": ticker, side: [[price, qty]]}}).encode()
+
+
+def make_exchange(yes, no):
+    book = OrderBook()
+    book.apply_snapshot(yes, no)
+    exchange = SimulatedExchange()
+    exchange.attach_book("T", book)
+    return exchange, book
+
+
+async def verify_matching():
+    exchange, book = make_exchange([[40, 10]], [[50, 10]])
+    bid = (await exchange.create_order("T", "buy", 2, 43, side="yes"))['order']
+    ask = (await exchange.create_order("T", "buy", 3, 53, side="no"))['order']
+    assert bid['status'] == ask['status'] == "resting" and exchange.match("T") == []
+
+    # NO bid at 56 is a YES ask at 44: one cent short of our 43 bid, nothing trades
+    book.apply_levels("no", [[56, 5]])
+    assert exchange.match("T", ts=1) == []
+    # At 57 (YES ask 43) it reaches our bid: filled in full at our limit, the NO side keeps resting
+    book.apply_levels("no", [[57, 1]])
+    fills = exchange.match("T", ts=2)
+    assert [(f['order_id'], f['side'], f['price'], f['count'], f['ts']) for f in fills] == [(bid['order_id'], "yes", 43, 2, 2)]
+    assert exchange.orders[bid['order_id']]['status'] == "executed" and list(exchange.resting["T"]) == [ask['order_id']]
+    assert exchange.match("T", ts=3) == [], "an executed order fills once"
+    print("[OK] resting orders fill in full at their limit once the opposite bid reaches them")
+
+    # No queue model: same-side depth already resting at our price does not delay the fill
+    exchange, book = make_exchange([[40, 10], [43, 500]], [[50, 10]])
+    order = (await exchange.create_order("T", "buy", 2, 43, side="yes"))['order']
+    book.apply_levels("yes", [[43, 900]])
+    assert exchange.match("T") == []
+    book.apply_levels("no", [[57, 1]])
+    assert [f['order_id'] for f in exchange.match("T")] == [order['order_id']]
+    print("[OK] fills ignore queue position behind same-side depth at our price")
+
+    # Crossing on arrival (create or amend) fills immediately, with no frame timestamp
+    exchange, book = make_exchange([[40, 10]], [[50, 10]])
+    taker = (await exchange.create_order("T", "buy", 1, 50, side="yes"))['order']
+    assert taker['status'] == "executed" and exchange.fills[-1]['ts'] is None
+    resting = (await exchange.create_order("T", "buy", 2, 55, side="no"))['order']
+    assert resting['status'] == "resting"
+    amended = await exchange.amend_order(resting['order_id'], "T", "buy", 2, 60, side="no")
+    assert amended['order']['order_id'] == resting['order_id'] and amended['order']['status'] == "executed"
+    assert exchange.fills[-1]['price'] == 60 and exchange.orders_amended == 1
+    for call in (exchange.cancel_order(resting['order_id']), exchange.amend_order(resting['order_id'], "T", "buy", 2, 55, side="no")):
+        try:
+            await call
+            raise AssertionError("a filled order is gone")
+        except OrderNotFound:
+            pass
+    print("[OK] orders crossing on create or amend fill at once; filled orders are not found")
+
+
+async def verify_accounting():
+    exchange, book = make_exchange([[40, 10]], [[50, 10]])
+    seen = []
+    exchange.fill_listeners.append(seen.append)
+    await exchange.create_order("T", "buy", 3, 51, side="yes") # crosses NO 50: +3 YES for 153c
+    await exchange.create_order("T", "buy", 1, 60, side="no") # crosses YES 40: +1 NO for 60c
+    await exchange.create_order("T", "sell", 2, 40, side="yes") # sells into YES 40: -2 YES for +80c
+    assert exchange.positions["T"] == {'yes': 1, 'no': 1} and exchange.net_position("T") == 0
+    assert exchange.cash == -153 - 60 + 80
+    assert [f['post_position'] for f in exchange.fills] == [3, 2, 0] and seen == exchange.fills
+    message = exchange.fill_message(exchange.fills[1])
+    assert (message['side'], message['no_price'], message['yes_price'], message['post_position']) == ("no", 60, 40, 2)
+    # Mark to mid 45: 1 YES at 45 + 1 NO at 55
+    assert exchange.mark_to_market() == -133 + 45 + 55
+    book.apply_levels("no", [[50, 0], [46, 10]]) # ask 54, mid 47
+    assert exchange.mark_to_market() == -133 + 47 + 53
+    assert exchange.requests == 3 and (await exchange.get_positions())['market_positions'] == [{'ticker': "T", 'position': 0}]
+    print("[OK] positions, cash, post_position and mark-to-mid PnL")
+
+    assert inventory_variance([], 4) == 0.0
+    assert inventory_variance([(2, -2)], 5) == (3 * 4) / 5 - (6 / 5) ** 2
+    print("[OK] inventory variance over frames")
+
+
+def verify_replay():
+    # bid 40 / ask 50 -> quotes 43 / 47 (NO 53); YES 48 joins -> 48 / 50 (NO 50); a NO bid at 55
+    # crosses the book, the strategy reprices NO to 52 which takes YES 48 on arrival; once the
+    # book uncrosses it re-places NO at 50 and follows the YES bid back to 40
+    feed = [snapshot([[40, 10]], [[50, 10]]), delta("yes", 48, 10), delta("no", 55, 10), delta("no", 55, 0), delta("yes", 48, 0)]
+    frames = [(i * 1_000_000, raw) for i, raw in enumerate(feed)]
+    result = asyncio.run(ReplayEngine(Config(**FLAT), frames).run())
+    assert [(f['side'], f['price'], f['count'], f['post_position']) for f in result['fill_log']] == [("no", 52, 2, -2)]
+    assert result['final_inventory'] == {"T": -2} and result['max_abs_inventory'] == 2
+    # Opening quotes go out as one batch; the NO re-place and 7 amends are one request each
+    assert result['orders_created'] == 3 and result['orders_amended'] == 7 and result['rest_requests'] == 1 + 1 + 7
+    # Paid 2 x 52c for NO, marked at 100 - mid 45 = 55c each
+    assert result['pnl_cents'] == -104 + 2 * 55 == 6
+    assert result['inventory_variance'] == inventory_variance([(2, -2)], 5)
+    print("[OK] replay: fills on arrival, final position and PnL")
+
+    # With wide requote bands the quotes stay put, so the feed itself trades through the YES bid
+    config = Config(**FLAT, REQUOTE_BAND_BEHIND_CENTS=10, REQUOTE_BAND_AHEAD_CENTS=10)
+    feed = [snapshot([[40, 10]], [[50, 10]]), delta("no", 57, 10), delta("no", 57, 0)]
+    frames = [(i * 1_000_000, raw) for i, raw in enumerate(feed)]
+    result = asyncio.run(ReplayEngine(config, frames).run())
+    assert [(f['side'], f['price'], f['count'], f['ts']) for f in result['fill_log']] == [("yes", 43, 2, 1_000_000)]
+    assert result['final_inventory'] == {"T": 2}
+    # The ledger told the strategy its YES bid filled, so the next frame re-places it
+    assert result['orders_created'] == 3 and result['orders_amended'] == 0 and result['rest_requests'] == 2
+    assert result['pnl_cents'] == -86 + 2 * 45
+    print("[OK] replay: resting quotes filled by the recorded book at the frame's timestamp")
+
+
+if __name__ == "__main__":
+    print("--- Starting Backtest Verification ---")
+    asyncio.run(verify_matching())
+    asyncio.run(verify_accounting())
+    verify_replay()
+    print("--- Verification Complete ---")
@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+from backtest import SimulatedExchange
+from config import Config
+from event_log import EventLog, INFO, WARN, events, read_events
+from market_data import MarketDataService
+from strategy import MarketMakingStrategy
+from synthetic_feed import generate_frames
+
+
+def verify_ring():
+    log = EventLog(capacity=6, level=INFO, sample_every=1) # rounded up to 8 slots
+    assert len(log.slots) == 8
+    log.debug("hidden")
+    for i in range(10):
+        log.info("n", i=i)
+    assert log.head == 8 and log.dropped == 2
+    console = io.StringIO()
+    log.console, log.console_level = console, INFO
+    log.flush()
+    lines = console.getvalue().splitlines()
+    assert [line.split()[-1] for line in lines[:8]] == [f"i={i}" for i in range(8)]
+    assert "log_dropped count=2 total=2" in lines[8] and log.written == 9
+    # Wraps around the same slots once drained
+    for i in range(20):
+        log.info("n", i=i)
+        if i % 5 == 4:
+            log.flush()
+    assert log.dropped == 2 and log.head == log.tail == 28 and not any(log.slots)
+    print("[OK] ring buffer keeps order, drops and counts overflow, wraps after a flush")
+
+
+def verify_sampling():
+    log = EventLog(sample_every=100)
+    for i in range(1000):
+        log.tick("market", bid=i)
+    assert log.head == 10 and [log.slots[s][3]['bid'] for s in range(10)] == list(range(0, 1000, 100))
+    log.level = WARN
+    log.tick("market", bid=0)
+    assert log.head == 10
+    print("[OK] per-tick events keep 1 in LOG_SAMPLE_EVERY")
+
+
+def verify_writer(path):
+    class SlowConsole(io.StringIO):
+        # A terminal that can't keep up must only slow the writer thread
+        def write(self, s):
+            time.sleep(0.2)
+            return super().write(s)
+
+    log = EventLog(capacity=1 << 12, console_level=WARN, flush_seconds=0.01)
+    console = SlowConsole()
+    log.start(path, console=console)
+    time.sleep(0.05)
+    started = time.perf_counter()
+    for i in range(2000):
+        log.info("quote", i=i)
+        if i % 500 == 0:
+            log.warn("gap", i=i)
+    elapsed = time.perf_counter() - started
+    log.stop()
+    assert elapsed < 0.1, f"emitting took {elapsed:.3f}s"
+    records = read_events(path)
+    assert len(records) == 2004 and log.dropped == 0
+    assert [r['i'] for r in records if r['event'] == "quote"] == list(range(2000))
+    assert records[0]['level'] == "INFO" and records[0]['ts'] <= records[-1]['ts']
+    assert [line.split()[2] for line in console.getvalue().splitlines()] == ["gap"] * 4
+    print(f"[OK] 2004 records appended in {elapsed * 1000:.1f}ms while a slow console blocked the writer; "
+          f"all reached the file")
+
+
+async def verify_strategy_quiet():
+    # The trading path logs through the buffer instead of printing
+    config = Config(API_KEY="test", TARGET_TICKER="T")
+    md = MarketDataService(config, market_tickers=["T"])
+    md.dispatcher.autostart = False
+    exchange = SimulatedExchange()
+    exchange.attach_book("T", md.book("T"))
+    strategy = MarketMakingStrategy(config, exchange, md, ticker="T")
+    md.add_listener(strategy.on_market_update, ticker="T")
+    head = events.head
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        for raw in generate_frames("churn", 300, ticker="T"):
+            md._on_frame(raw)
+            await md.dispatcher.flush()
+            await strategy.wait_for_quotes()
+    assert out.getvalue() == "", out.getvalue()[:200]
+    logged = [events.slots[s & events.mask][2] for s in range(head, events.head)]
+    assert "market" in logged and "placed" in logged
+    print(f"[OK] strategy printed nothing; {len(logged)} records buffered "
+          f"({logged.count('market')} sampled market ticks)")
+
+
+if __name__ == "__main__":
+    print("--- Starting Event Log Verification ---")
+    verify_ring()
+    verify_sampling()
+    with tempfile.TemporaryDirectory() as tmp:
+        verify_writer(os.path.join(tmp, "events.log"))
+    asyncio.run(verify_strategy_quiet())
+    print("--- Verification Complete ---")
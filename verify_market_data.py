@@ -0,0 +1,190 @@
+import asyncio
+import json
+from config import Config
+from market_data import MarketDataService
+from synthetic_feed import generate_frames
+from ws_messages import available_backends
+
+
+class FakeSocket:
+    # Captures commands MarketDataService sends on the live connection
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, raw):
+        self.sent.append(json.loads(raw))
+
+
+def frame(msg_type, sid=None, seq=None, **msg):
+    data = {"type": msg_type, "msg": msg}
+    if sid is not None:
+        data.update(sid=sid, seq=seq)
+    return data
+
+
+async def verify_multi_market():
+    print("[Test] Multi-market routing and runtime subscriptions")
+    config = Config(API_KEY="test", TARGET_TICKER="AAA")
+    md = MarketDataService(config, market_tickers=["AAA", "BBB"])
+    md.websocket = FakeSocket()
+
+    calls = {"AAA": 0, "BBB": 0, "all": 0}
+    md.add_listener(lambda: calls.__setitem__("AAA", calls["AAA"] + 1), ticker="AAA")
+    md.add_listener(lambda: calls.__setitem__("BBB", calls["BBB"] + 1), ticker="BBB")
+    md.add_listener(lambda: calls.__setitem__("all", calls["all"] + 1))
+
+    md._handle_message(frame("orderbook_snapshot", market_ticker="AAA", yes=[[40, 10]], no=[[55, 5]]))
+    md._handle_message(frame("orderbook_snapshot", market_ticker="BBB", yes=[[20, 3]], no=[[70, 9]]))
+    md._handle_message(frame("orderbook_delta", market_ticker="BBB", yes=[[21, 4]], no=[]))
+    await asyncio.sleep(0)
+
+    assert md.get_best_prices("AAA") == (40, 45)
+    assert md.get_best_prices("BBB") == (21, 30)
+    assert md.get_best_prices() == (40, 45), "default ticker is the first market"
+    assert calls["AAA"] >= 1 and calls["BBB"] >= 1 and calls["all"] >= 2
+
+    await md.subscribe(["CCC"])
+    cmd = md.websocket.sent[-1]
+    assert cmd["cmd"] == "subscribe" and cmd["params"]["market_tickers"] == ["CCC"]
+    assert md.is_stale("CCC"), "no snapshot yet"
+    md._handle_message({"type": "subscribed", "id": cmd["id"], "msg": {"channel": "orderbook_delta", "sid": 7}})
+    md._handle_message(frame("orderbook_snapshot", sid=7, seq=1, market_ticker="CCC", yes=[[10, 1]], no=[]))
+    assert md.get_best_prices("CCC") == (10, 100) and not md.is_stale("CCC")
+
+    await md.unsubscribe(["CCC"])
+    assert md.websocket.sent[-1] == {"id": cmd["id"] + 1, "cmd": "unsubscribe", "params": {"sids": [7]}}
+    await md.unsubscribe(["BBB"])
+    assert "BBB" not in md.books
+    # Late frames for a removed market are ignored
+    md._handle_message(frame("orderbook_delta", market_ticker="BBB", yes=[[22, 1]], no=[]))
+    await asyncio.sleep(0)
+
+    # Dropped before its subscribe was acked: the ack's sid is unsubscribed, and a
+    # resubscribe in the meantime keeps only its own subscription
+    await md.subscribe(["DDD"])
+    first = md.websocket.sent[-1]
+    await md.unsubscribe(["DDD"])
+    assert md.websocket.sent[-1] is first, "no sid to unsubscribe yet"
+    await md.subscribe(["DDD"])
+    second = md.websocket.sent[-1]
+    md._handle_message({"type": "subscribed", "id": first["id"], "msg": {"channel": "orderbook_delta", "sid": 8}})
+    md._handle_message({"type": "subscribed", "id": second["id"], "msg": {"channel": "orderbook_delta", "sid": 9}})
+    await asyncio.sleep(0)
+    assert md.websocket.sent[-1]["cmd"] == "unsubscribe" and md.websocket.sent[-1]["params"] == {"sids": [8]}
+    assert md.sids["DDD"] == 9
+    md._handle_message(frame("orderbook_snapshot", sid=8, seq=1, market_ticker="DDD", yes=[[30, 1]], no=[]))
+    assert md.is_stale("DDD"), "frames on the dropped subscription are ignored"
+    print("OK")
+
+
+async def verify_conflation():
+    print("[Test] Burst of deltas is conflated into few evaluations on the latest book")
+    config = Config(API_KEY="test", TARGET_TICKER="AAA")
+    md = MarketDataService(config)
+    seen = []
+    running = 0
+
+    async def slow_listener():
+        nonlocal running
+        running += 1
+        assert running == 1, "evaluations must not overlap"
+        seen.append(md.get_best_prices())
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    md.add_listener(slow_listener, ticker="AAA")
+    md._handle_message(frame("orderbook_snapshot", market_ticker="AAA", yes=[[10, 1]], no=[[80, 1]]))
+    for i in range(200):
+        md._handle_message(frame("orderbook_delta", market_ticker="AAA", yes=[[11 + i % 60, 5]], no=[]))
+    await md.dispatcher.drain()
+
+    stats = md.feed_stats()
+    assert stats["messages_received"] == 201
+    assert stats["evaluations_run"] <= 2, stats
+    assert seen[-1] == md.get_best_prices(), "last evaluation must see the latest book"
+    # Requotes after fills or held retries go through the dispatcher but are not messages
+    md.dispatcher.notify("AAA")
+    await md.dispatcher.drain()
+    after = md.feed_stats()
+    assert after["messages_received"] == 201 and after["evaluations_run"] == stats["evaluations_run"] + 1
+    print(f"OK ({stats['messages_received']} messages -> {stats['evaluations_run']} evaluations)")
+
+
+async def verify_gap_resync():
+    print("[Test] A sequence gap marks the book stale and resyncs that market on the live socket")
+    config = Config(API_KEY="test", TARGET_TICKER="AAA")
+    md = MarketDataService(config, market_tickers=["AAA", "BBB"])
+    md.websocket = FakeSocket()
+    for t in ("AAA", "BBB"):
+        await md._subscribe_book(t)
+    for sid, cmd in enumerate(md.websocket.sent, 1):
+        md._handle_message({"type": "subscribed", "id": cmd["id"], "msg": {"channel": "orderbook_delta", "sid": sid}})
+    assert md.sids == {"AAA": 1, "BBB": 2}
+    notified = []
+    md.add_listener(lambda: notified.append(md.is_stale("AAA")), ticker="AAA")
+
+    md._handle_message(frame("orderbook_snapshot", sid=1, seq=1, market_ticker="AAA", yes=[[40, 10]], no=[[55, 5]]))
+    md._handle_message(frame("orderbook_snapshot", sid=2, seq=1, market_ticker="BBB", yes=[[20, 3]], no=[]))
+    md._handle_message(frame("orderbook_delta", sid=1, seq=2, market_ticker="AAA", yes=[[41, 1]], no=[]))
+    md._handle_message(frame("orderbook_delta", sid=2, seq=2, market_ticker="BBB", yes=[[21, 1]], no=[]))
+    await md.dispatcher.drain()
+    assert md.get_best_prices("AAA") == (41, 45) and notified[-1] is False
+
+    md.websocket.sent.clear()
+    md._handle_message(frame("orderbook_delta", sid=1, seq=4, market_ticker="AAA", yes=[[42, 1]], no=[])) # seq 3 lost
+    # Before the resync task has run: the next delta on the gapped sid is not applied either
+    md._handle_message(frame("orderbook_delta", sid=1, seq=5, market_ticker="AAA", yes=[[43, 1]], no=[]))
+    assert "AAA" not in md.sids and md.get_best_prices("AAA") == (41, 45)
+    await md.dispatcher.drain()
+    await asyncio.sleep(0)
+    assert md.is_stale("AAA") and not md.is_stale("BBB")
+    assert notified[-1] is True, "listeners hear about the stale book"
+    assert md.get_best_prices("AAA") == (41, 45), "the frame after a gap is not applied"
+    assert [c["cmd"] for c in md.websocket.sent] == ["unsubscribe", "subscribe"]
+    assert md.websocket.sent[0]["params"] == {"sids": [1]}
+    assert md.websocket.sent[1]["params"]["market_tickers"] == ["AAA"]
+
+    # Old subscription keeps talking until the unsubscribe lands: ignored
+    md._handle_message(frame("orderbook_delta", sid=1, seq=6, market_ticker="AAA", yes=[[43, 1]], no=[]))
+    md._handle_message(frame("orderbook_delta", sid=2, seq=3, market_ticker="BBB", yes=[[22, 1]], no=[]))
+    assert md.get_best_prices("AAA") == (41, 45) and md.get_best_prices("BBB") == (22, 100)
+
+    md._handle_message({"type": "subscribed", "id": md.websocket.sent[1]["id"], "msg": {"channel": "orderbook_delta", "sid": 3}})
+    md._handle_message(frame("orderbook_snapshot", sid=3, seq=1, market_ticker="AAA", yes=[[44, 2]], no=[[50, 1]]))
+    md._handle_message(frame("orderbook_delta", sid=3, seq=2, market_ticker="AAA", yes=[[45, 1]], no=[]))
+    await md.dispatcher.drain()
+    assert not md.is_stale("AAA") and md.get_best_prices("AAA") == (45, 50)
+    assert notified[-1] is False
+    print("OK")
+
+
+async def verify_backends():
+    print("[Test] Every JSON backend (typed messages or the stdlib dict path) builds the same book")
+    frames = generate_frames("churn", 3000, ticker="AAA")
+    del frames[2000] # a gap: the rest of the feed must not be applied
+    books = {}
+    for backend in available_backends():
+        md = MarketDataService(Config(API_KEY="test", TARGET_TICKER="AAA", WS_JSON_BACKEND=backend), market_tickers=["AAA"])
+        md.dispatcher.autostart = False
+        for raw in frames[:1500]:
+            md._on_frame(raw)
+        midway = md.book("AAA").to_dict()
+        for raw in frames[1500:]:
+            md._on_frame(raw)
+        assert md.is_stale("AAA"), backend
+        books[backend] = (midway, md.book("AAA").to_dict())
+    assert all(b == books["json"] for b in books.values()) and books["json"][0] != books["json"][1]
+    print(f"OK ({', '.join(books)})")
+
+
+async def main():
+    print("--- Starting MarketDataService Verification ---")
+    await verify_multi_market()
+    await verify_conflation()
+    await verify_gap_resync()
+    await verify_backends()
+    print("--- Verification Complete ---")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
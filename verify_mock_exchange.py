@@ -0,0 +1,135 @@
+import asyncio
+import json
+import aiohttp
+from aiohttp import web
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from async_client import AsyncKalshiClient
+from client import OrderNotFound
+from config import Config
+from mock_exchange import API_PATH, WS_PATH, MockExchange
+from orderbook import OrderBook
+from signing import RequestSigner
+from synthetic_feed import SyntheticMarket
+
+
+def make_pem():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+
+
+async def start_mock(markets, rate: float = 2000):
+    # Mock on a free local port with its publisher running; returns (mock, runner, config)
+    mock = MockExchange(markets, rate=rate, seed=1)
+    runner = web.AppRunner(mock.app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    port = runner.addresses[0][1]
+    mock.publisher = asyncio.create_task(mock.publish())
+    config = Config(API_KEY="test", KALSHI_API_URL=f"http://127.0.0.1:{port}{API_PATH}",
+                    KALSHI_WS_URL=f"ws://127.0.0.1:{port}{WS_PATH}")
+    return mock, runner, config
+
+
+async def stop_mock(mock, runner):
+    mock.publisher.cancel()
+    await runner.cleanup()
+
+
+async def verify_orders(mock, config):
+    best_bid = mock.markets["MOCK-A"].book.yes.best # static until somebody subscribes
+    signer = RequestSigner("test", make_pem(), workers=1)
+    async with AsyncKalshiClient(config, signer=signer) as client:
+        # Rests well below the touch, so the moving book never reaches it
+        order = (await client.create_order("MOCK-A", "buy", 2, 1, side="yes"))['order']
+        assert order['status'] == "resting" and order['price'] == 1
+        resting = (await client.get_orders(ticker="MOCK-A"))['orders']
+        assert [(o['order_id'], o['yes_price'], o['remaining_count']) for o in resting] == [(order['order_id'], 1, 2)]
+
+        amended = await client.amend_order(order['order_id'], "MOCK-A", "buy", 3, 2, side="yes")
+        assert amended['old_order']['price'] == 1 and amended['order']['order_id'] == order['order_id']
+        assert mock.exchange.orders[order['order_id']]['price'] == 2 and mock.exchange.orders[order['order_id']]['remaining'] == 3
+
+        cancelled = await client.cancel_order(order['order_id'])
+        assert cancelled['reduced_by'] == 3 and (await client.get_orders(ticker="MOCK-A"))['orders'] == []
+        for call in (client.cancel_order(order['order_id']), client.amend_order(order['order_id'], "MOCK-A", "buy", 3, 3)):
+            try:
+                await call
+                raise AssertionError("the order is gone")
+            except OrderNotFound:
+                pass
+        print("[OK] create, amend and cancel round-trip through AsyncKalshiClient; missing orders are OrderNotFound")
+
+        # Buying NO at 100 - best YES bid crosses on arrival and fills at our price
+        taker = (await client.create_order("MOCK-A", "buy", 1, 100 - best_bid, side="no"))['order']
+        assert taker['status'] == "executed"
+        positions = (await client.get_positions())['market_positions']
+        assert positions == [{'ticker': "MOCK-A", 'position': -1}]
+        batch = await client.batch_create_orders([
+            {'ticker': "MOCK-A", 'action': "buy", 'side': "yes", 'count': 1, 'yes_price': 1, 'client_order_id': "a"},
+            {'ticker': "MOCK-A", 'action': "buy", 'side': "no", 'count': 1, 'no_price': 1, 'client_order_id': "b"},
+        ])
+        ids = [o['order']['order_id'] for o in batch['orders']]
+        cancels = await client.batch_cancel_orders(ids)
+        assert [o['order_id'] for o in cancels['orders']] == ids and all('error' not in o for o in cancels['orders'])
+        assert mock.stats()['orders_received'] >= 6
+        print("[OK] crossing orders fill, positions update, batch create and cancel")
+    signer.close()
+
+
+async def verify_stream(mock, config):
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(config.WS_Url) as ws:
+            await ws.send_str(json.dumps({"id": 1, "cmd": "subscribe",
+                                          "params": {"channels": ["orderbook_delta"], "market_tickers": ["MOCK-A"]}}))
+            reply = json.loads((await ws.receive()).data)
+            assert reply["type"] == "subscribed" and reply["id"] == 1
+            sid = reply["msg"]["sid"]
+
+            book = OrderBook()
+            snapshot = json.loads((await ws.receive()).data)
+            assert snapshot["type"] == "orderbook_snapshot" and snapshot["sid"] == sid and snapshot["seq"] == 1
+            assert snapshot["msg"]["market_ticker"] == "MOCK-A"
+            book.apply_snapshot(snapshot["msg"]["yes"], snapshot["msg"]["no"])
+            seq = 1
+            while seq < 200:
+                frame = json.loads((await asyncio.wait_for(ws.receive(), 5)).data)
+                assert frame["type"] == "orderbook_delta" and frame["sid"] == sid
+                assert frame["seq"] == seq + 1, "deltas arrive in sequence with no gaps"
+                assert frame["msg"]["market_ticker"] == "MOCK-A", "only the subscribed market"
+                seq = frame["seq"]
+                for side in ("yes", "no"):
+                    book.apply_levels(side, frame["msg"].get(side, []))
+            assert not book.is_empty()
+            best_bid, best_ask = book.best_prices()
+            assert best_bid < best_ask, "the synthetic book never crosses"
+
+            # Stop the publisher: once the stream is drained, snapshot + deltas rebuild the mock's book
+            mock.publisher.cancel()
+            while True:
+                try:
+                    frame = json.loads((await asyncio.wait_for(ws.receive(), 0.2)).data)
+                except asyncio.TimeoutError:
+                    break
+                assert frame["seq"] == seq + 1
+                seq = frame["seq"]
+                for side in ("yes", "no"):
+                    book.apply_levels(side, frame["msg"].get(side, []))
+            assert book.to_dict() == mock.markets["MOCK-A"].book.to_dict()
+    print(f"[OK] WS snapshot then {seq - 1} sequenced deltas rebuild the exchange's book")
+
+
+async def verify():
+    markets = [SyntheticMarket("MOCK-A", mid=50, seed=1), SyntheticMarket("MOCK-B", mid=30, seed=2)]
+    mock, runner, config = await start_mock(markets)
+    try:
+        await verify_orders(mock, config)
+        await verify_stream(mock, config)
+    finally:
+        await stop_mock(mock, runner)
+
+
+if __name__ == "__main__":
+    print("--- Starting Mock Exchange Verification ---")
+    asyncio.run(verify())
+    print("--- Verification Complete ---")
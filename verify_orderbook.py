@@ -0,0 +1,86 @@
+import random
+from orderbook import OrderBook
+
+
+class DictBook:
+    # Reference implementation: the original dict-of-levels book from MarketDataService
+    def __init__(self):
+        self.orderbook = {"yes": {}, "no": {}}
+
+    def snapshot(self, msg):
+        self.orderbook['yes'] = {item[0]: item[1] for item in msg.get('yes', [])}
+        self.orderbook['no'] = {item[0]: item[1] for item in msg.get('no', [])}
+
+    def delta(self, msg):
+        for side in ('yes', 'no'):
+            for price, qty in msg.get(side, []):
+                if qty == 0:
+                    self.orderbook[side].pop(price, None)
+                else:
+                    self.orderbook[side][price] = qty
+
+    def get_imbalance(self):
+        yes_bids = self.orderbook['yes']
+        no_bids = self.orderbook['no']
+        bid_vol = yes_bids[max(yes_bids)] if yes_bids else 0
+        ask_vol = no_bids[max(no_bids)] if no_bids else 0
+        total = bid_vol + ask_vol
+        if total == 0:
+            return 0.0
+        return (bid_vol - ask_vol) / total
+
+    def get_best_prices(self):
+        yes_bids = self.orderbook['yes']
+        no_bids = self.orderbook['no']
+        best_bid = max(yes_bids) if yes_bids else 0
+        best_no_bid = max(no_bids) if no_bids else 0
+        best_ask = 100 - best_no_bid if best_no_bid > 0 else 100
+        return best_bid, best_ask
+
+    def depth(self, side, levels):
+        prices = sorted(self.orderbook[side], reverse=True)[:levels]
+        return sum(self.orderbook[side][p] for p in prices)
+
+
+def random_levels(rng, n, zero_prob=0.0):
+    levels = []
+    for _ in range(n):
+        qty = 0 if rng.random() < zero_prob else rng.randint(1, 500)
+        levels.append([rng.randint(1, 99), qty])
+    return levels
+
+
+def verify(seed=7, steps=50000):
+    rng = random.Random(seed)
+    ref = DictBook()
+    book = OrderBook()
+
+    snap = {'yes': random_levels(rng, 20), 'no': random_levels(rng, 20)}
+    ref.snapshot(snap)
+    book.apply_snapshot(snap['yes'], snap['no'])
+
+    for step in range(steps):
+        if rng.random() < 0.001:
+            # Occasional fresh snapshot, sometimes empty
+            snap = {'yes': random_levels(rng, rng.randint(0, 30)), 'no': random_levels(rng, rng.randint(0, 30))}
+            ref.snapshot(snap)
+            book.apply_snapshot(snap['yes'], snap['no'])
+        else:
+            msg = {'yes': random_levels(rng, rng.randint(0, 3), 0.5), 'no': random_levels(rng, rng.randint(0, 3), 0.5)}
+            ref.delta(msg)
+            book.apply_levels('yes', msg['yes'])
+            book.apply_levels('no', msg['no'])
+
+        assert book.best_prices() == ref.get_best_prices(), f"best prices diverged at step {step}"
+        assert book.imbalance() == ref.get_imbalance(), f"imbalance diverged at step {step}"
+        assert book.to_dict() == ref.orderbook, f"levels diverged at step {step}"
+        if step % 97 == 0:
+            for side in ('yes', 'no'):
+                for levels in (1, 3, 10):
+                    assert book.cumulative_depth(side, levels) == ref.depth(side, levels)
+
+    print(f"OrderBook matches dict book over {steps} updates")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,100 @@
+import asyncio
+import random
+from unittest.mock import MagicMock
+import numpy as np
+from config import Config
+from market_data import MarketDataService
+from quoting import QuoteEngine, compute_quote, compute_quotes
+from strategy import MarketMakingStrategy, PortfolioQuoter
+
+CONFIG = Config(API_KEY="test")
+PARAMS = dict(skew_per_100=CONFIG.INVENTORY_SKEW_PER_100, alpha=CONFIG.IMBALANCE_ALPHA)
+
+
+def check(bb, ba, imb, pos, spread, **params):
+    params = {**PARAMS, **params}
+    bid, ask, valid = compute_quotes(bb, ba, imb, pos, spread, **params)
+    for i in range(len(bb)):
+        expected = compute_quote(int(bb[i]), int(ba[i]), float(imb[i]), int(pos[i]), spread, **params)
+        got = (int(bid[i]), int(ask[i])) if valid[i] else None
+        assert got == expected, (int(bb[i]), int(ba[i]), float(imb[i]), int(pos[i]), spread, got, expected)
+    return len(bb)
+
+
+def verify_equivalence():
+    checked = 0
+    # Every bid/ask pair (crossed and one-sided books included) at a few signal values
+    bb, ba = np.meshgrid(np.arange(0, 100), np.arange(1, 101), indexing="ij")
+    bb, ba = bb.ravel(), ba.ravel()
+    for imb in (-1.0, -0.37, 0.0, 0.5, 1.0):
+        for pos in (-5000, -150, 0, 40, 1000):
+            for spread in (0, 2, 7):
+                checked += check(bb, ba, np.full(len(bb), imb), np.full(len(bb), pos), spread)
+
+    # Random markets, including alternative skew/alpha parameters
+    rng = random.Random(3)
+    n = 20000
+    bb = np.array([rng.randint(0, 99) for _ in range(n)])
+    ba = np.array([rng.randint(1, 100) for _ in range(n)])
+    imb = np.array([rng.uniform(-1, 1) for _ in range(n)])
+    pos = np.array([rng.randint(-3000, 3000) for _ in range(n)])
+    for spread in (1, 2, 4):
+        checked += check(bb, ba, imb, pos, spread)
+    checked += check(bb, ba, imb, pos, 2, skew_per_100=1.25, alpha=3.0)
+    print(f"[OK] vectorized quotes identical to the scalar path on {checked:,} markets")
+
+
+def verify_engine():
+    engine = QuoteEngine.from_config(CONFIG.model_copy(update={"SPREAD_CENTS": 2}), ["A", "B", "C"])
+    changed = engine.update([40, 0, 60], [45, 100, 62], [0.0, 0.0, 0.0], [0, 0, 0])
+    assert changed.tolist() == [0, 2], "empty book B has nothing to quote"
+    assert engine.quotes() == [("A", 40, 44), ("B", None, None), ("C", 60, 62)]
+    assert engine.update([40, 0, 60], [45, 100, 62], [0.0, 0.0, 0.0], [0, 0, 0]).tolist() == []
+    changed = engine.update([40, 30, 60], [45, 35, 62], [0.0, 0.0, 0.0], [0, 0, 0])
+    assert changed.tolist() == [1] and engine.quotes(changed) == [("B", 30, 34)]
+    assert engine.update([0, 30, 60], [100, 35, 62], [0.0, 0.0, 0.0], [0, 0, 0]).tolist() == [0], "quote pulled"
+    # A subset update leaves the other markets' quotes alone
+    changed = engine.update([41], [45], [0.0], [0], indices=[2])
+    assert changed.tolist() == [2] and engine.quotes() == [("A", None, None), ("B", 30, 34), ("C", 41, 45)]
+    assert engine.quote("C") == (41, 45) and engine.quote("A") is None
+    print("[OK] engine emits only markets whose quotes changed")
+
+
+async def verify_portfolio():
+    # Supervisor worker path: one QuoteEngine pass per batch of dirty markets, each strategy
+    # then requotes from its precomputed targets
+    md = MarketDataService(CONFIG, market_tickers=["A", "B", "C"])
+    client = MagicMock()
+    client.batch_create_orders.return_value = {'orders': [{'order': {'order_id': 'y'}}, {'order': {'order_id': 'n'}}]}
+    strategies = [MarketMakingStrategy(CONFIG, client, md, ticker=t) for t in ("A", "B", "C")]
+    strategies[1].net_position = 300
+    for s in strategies:
+        md.add_listener(s.on_market_update, ticker=s.ticker)
+    quoter = PortfolioQuoter(CONFIG, md, strategies)
+    batches = []
+    md.dispatcher.prepare = lambda tickers: (batches.append(sorted(tickers)), quoter.prepare(tickers))
+
+    for ticker, yes, no in (("A", [[40, 10]], [[52, 30]]), ("B", [[20, 3], [21, 4]], [[70, 9]])):
+        md._handle_message({"type": "orderbook_snapshot", "msg": {"market_ticker": ticker, "yes": yes, "no": no}})
+    md._handle_message({"type": "orderbook_delta", "msg": {"market_ticker": "A", "yes": [[41, 2]]}})
+    await md.dispatcher.drain()
+    for s in strategies:
+        await s.wait_for_quotes()
+
+    assert batches == [["A", "B"]], "every pending market in one pass"
+    for s in strategies[:2]:
+        bid, ask = md.get_best_prices(s.ticker)
+        expected = compute_quote(bid, ask, md.get_imbalance(s.ticker), s.net_position, CONFIG.SPREAD_CENTS, **PARAMS)
+        assert s.engine.quote(s.ticker) == expected
+        assert s.desired == {"yes": expected[0], "no": 100 - expected[1]}, (s.ticker, s.desired, expected)
+    assert strategies[2].desired == {"yes": None, "no": None} and md.dispatcher.evaluations_run == 2
+    assert client.batch_create_orders.call_count == 2
+    print("[OK] worker markets are quoted in one batch with the same targets as the scalar path")
+
+
+if __name__ == "__main__":
+    print("--- Starting Quoting Verification ---")
+    verify_equivalence()
+    verify_engine()
+    asyncio.run(verify_portfolio())
+    print("--- Verification Complete ---")
@@ -0,0 +1,97 @@
+import asyncio
+import random
+from scan_markets import MarketColumns, rank_markets, iter_market_pages, aiter_market_pages
+
+
+def loop_scan(markets):
+    # Reference: the original per-market filter/score loop from find_best_market
+    candidates = []
+    for m in markets:
+        bid = m.get('yes_bid', 0)
+        ask = m.get('yes_ask', 100)
+        vol = m.get('volume', 0)
+        if bid <= 1 or ask >= 99: continue
+        if bid >= ask: continue
+        spread = ask - bid
+        oi = m.get('open_interest', 0)
+        liq = m.get('liquidity', 0)
+        if vol < 1000 or oi < 3000 or liq < 50000: continue
+        if spread > 10: continue
+        candidates.append({
+            'ticker': m['ticker'],
+            'bid': bid,
+            'ask': ask,
+            'spread': spread,
+            'vol': vol,
+            'title': m.get('title')
+        })
+    candidates.sort(key=lambda x: x['spread'], reverse=True)
+    return candidates
+
+
+def random_markets(n, seed=3):
+    rng = random.Random(seed)
+    markets = []
+    for i in range(n):
+        bid = rng.randint(0, 99)
+        m = {
+            'ticker': f"MKT-{i}",
+            'title': f"Market {i}",
+            'yes_bid': bid,
+            'yes_ask': min(100, bid + rng.randint(-2, 20)),
+            'volume': rng.randint(0, 5000),
+            'open_interest': rng.randint(0, 10000),
+            'liquidity': rng.randint(0, 200000)
+        }
+        if rng.random() < 0.05:
+            del m['yes_ask'] # missing fields fall back to defaults
+        markets.append(m)
+    return markets
+
+
+class PagedClient:
+    # Serves a market list through cursor pagination, sync or async
+    def __init__(self, markets):
+        self.markets = markets
+
+    def _page(self, limit, cursor):
+        start = int(cursor or 0)
+        page = self.markets[start:start + limit]
+        nxt = str(start + limit) if start + limit < len(self.markets) else ""
+        return {"markets": page, "cursor": nxt}
+
+    def get_markets(self, limit=100, status="open", cursor=None, **filters):
+        return self._page(limit, cursor)
+
+
+class AsyncPagedClient(PagedClient):
+    async def get_markets(self, limit=100, status="open", cursor=None, **filters):
+        await asyncio.sleep(0)
+        return self._page(limit, cursor)
+
+
+def verify():
+    print("--- Starting Scanner Verification ---")
+    markets = random_markets(20000)
+    expected = loop_scan(markets)
+
+    cols = MarketColumns.from_pages(iter_market_pages(PagedClient(markets), limit=1000))
+    assert len(cols) == len(markets), "pagination must reach every market"
+    ranked = rank_markets(cols, k=len(markets))
+    assert ranked == expected, "vectorized ranking must match the original loop"
+    assert rank_markets(cols, k=5) == expected[:5]
+    print(f"[OK] {len(markets)} markets, {len(expected)} candidates, identical ranking")
+
+    async def scan_async():
+        cols = MarketColumns()
+        # One window: the fake client ignores close-time filters
+        async for page in aiter_market_pages(AsyncPagedClient(markets), limit=1000, windows=[(None, None)]):
+            cols.add_page(page)
+        return rank_markets(cols.finalize(), k=5)
+    assert asyncio.run(scan_async()) == expected[:5]
+    print("[OK] async paginated scan matches")
+    print("--- Verification Complete ---")
+
+
+if __name__ == "__main__":
+    verify()
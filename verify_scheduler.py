@@ -0,0 +1,162 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+from async_client import AsyncKalshiClient
+from config import Config
+from event_log import events
+from scheduler import RequestScheduler, Superseded, TokenBucket, CANCEL, CREATE, READ
+from strategy import MarketMakingStrategy
+
+
+class RateLimited(Exception):
+    status = 429
+
+
+class FakeExchange:
+    # Records what was sent and when; can answer 429 to the first N requests
+    def __init__(self, reject: int = 0):
+        self.sent = []
+        self.reject = reject
+        self.start = time.monotonic()
+
+    async def send(self, name):
+        if self.reject:
+            self.reject -= 1
+            raise RateLimited(name)
+        self.sent.append((name, time.monotonic() - self.start))
+        return name
+
+
+async def verify_priorities():
+    exchange = FakeExchange()
+    scheduler = RequestScheduler(exchange.send, reads_per_second=100, writes_per_second=20)
+    # Burn the write burst, then queue creates, reads and cancels while throttled
+    await asyncio.gather(*(scheduler.submit(CREATE, "write", 1, None, f"burst{i}") for i in range(20)))
+    tasks = [asyncio.create_task(scheduler.submit(CREATE, "write", 1, None, f"create{i}")) for i in range(3)]
+    tasks += [asyncio.create_task(scheduler.submit(READ, "read", 1, None, f"read{i}")) for i in range(2)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(scheduler.submit(CANCEL, "write", 1, None, f"cancel{i}")) for i in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queued"] == {"cancel": 2, "create": 3, "read": 0}, scheduler.stats()
+    await asyncio.gather(*tasks)
+    order = [name for name, _ in exchange.sent[20:]]
+    assert order[:2] == ["read0", "read1"], "reads use their own bucket and are not held up by writes"
+    assert order[2:] == ["cancel0", "cancel1", "create0", "create1", "create2"], order
+    elapsed = exchange.sent[-1][1] - exchange.sent[19][1]
+    assert 0.2 <= elapsed < 0.5, f"5 writes at 20/s after the burst took {elapsed:.3f}s"
+    print("[OK] cancels go before queued creates; writes paced at the write limit, reads unaffected")
+
+
+async def verify_coalescing():
+    exchange = FakeExchange()
+    scheduler = RequestScheduler(exchange.send, reads_per_second=0, writes_per_second=5)
+    await asyncio.gather(*(scheduler.submit(CREATE, "write", 1, None, "burst") for _ in range(5)))
+    key = ("create", "AAA", "yes")
+    first = asyncio.create_task(scheduler.submit(CREATE, "write", 1, key, "yes@40"))
+    other = asyncio.create_task(scheduler.submit(CREATE, "write", 1, ("create", "AAA", "no"), "no@55"))
+    await asyncio.sleep(0)
+    latest = asyncio.create_task(scheduler.submit(CREATE, "write", 1, key, "yes@41"))
+    try:
+        await first
+        raise AssertionError("superseded create must not be sent")
+    except Superseded:
+        pass
+    assert await latest == "yes@41" and await other == "no@55"
+    assert [n for n, _ in exchange.sent if n != "burst"] == ["no@55", "yes@41"]
+    assert scheduler.stats()["coalesced"] == 1 and scheduler.stats()["queued"]["create"] == 0
+    print("[OK] a newer price for the same side replaces the queued create")
+
+
+async def verify_strategy_coalescing():
+    # Through the strategy: a leg still queued for tokens is replaced by the newer target
+    config = Config(API_KEY="test", TARGET_TICKER="T", RATE_LIMIT_WRITES_PER_SECOND=20)
+    client = AsyncKalshiClient(config, signer=object())
+    sent = []
+
+    async def send(method, endpoint, params=None, data=None):
+        sent.append((endpoint.rsplit("/", 1)[-1], data))
+        if endpoint.endswith("/batched"):
+            return {'orders': [{'order': {'order_id': o['side']}} for o in data['orders']]}
+        return {'order': {'order_id': endpoint.split("/")[-2]}}
+
+    client.scheduler.send = send
+    market_data = MagicMock()
+    market_data.is_stale.return_value = False
+    market_data.shared = None
+    market_data.get_imbalance.return_value = 0.0
+    strategy = MarketMakingStrategy(config, client, market_data)
+    head = events.head
+
+    async def reprice(*quotes):
+        # Bucket empty: the first evaluation's legs queue, the later ones replace them
+        client.scheduler.buckets["write"].drain()
+        for best in quotes:
+            market_data.get_best_prices.return_value = best
+            await strategy.on_market_update()
+            await asyncio.sleep(0) # legs submit to the scheduler
+        await strategy.wait_for_quotes()
+
+    def prices(data):
+        return {o['side']: o.get('yes_price', o.get('no_price')) for o in data.get('orders', [data])}
+
+    await reprice((50, 54), (52, 56))
+    assert len(sent) == 1 and sent[0][0] == "batched" and prices(sent[0][1]) == {'yes': 52, 'no': 44}
+    await reprice((48, 52), (47, 51), (46, 50))
+    amends = [prices(d) for n, d in sent[1:]]
+    assert sorted(amends, key=str) == [{'no': 50}, {'yes': 46}], amends
+    assert {s: (o['id'], o['price']) for s, o in strategy.current_pos.items()} == {'yes': ('yes', 46), 'no': ('no', 50)}
+    assert client.scheduler.coalesced == 1 + 2 * 2
+    logged = {events.slots[i & events.mask][2] for i in range(head, events.head)}
+    assert not logged & {"place_failed", "batch_place_failed", "amend_failed"}, logged
+    print("[OK] strategy legs still queued are replaced by the newer target; only the latest prices go out")
+
+
+async def verify_429():
+    exchange = FakeExchange(reject=2)
+    scheduler = RequestScheduler(exchange.send, reads_per_second=50, writes_per_second=50)
+    started = time.monotonic()
+    assert await scheduler.submit(CANCEL, "write", 1, None, "cancel") == "cancel"
+    assert scheduler.rate_limited == 2 and len(exchange.sent) == 1
+    assert time.monotonic() - started >= 0.015, "retries wait for the drained bucket"
+    print("[OK] 429 drains the bucket and retries the request")
+
+    # A keyed request retried after a 429 is still replaced by a newer one for its key
+    exchange = FakeExchange(reject=1)
+    scheduler = RequestScheduler(exchange.send, reads_per_second=0, writes_per_second=20)
+    key = ("amend", "AAA", "yes")
+    first = asyncio.create_task(scheduler.submit(CREATE, "write", 1, key, "yes@40"))
+    await asyncio.sleep(0)
+    assert scheduler.rate_limited == 1 and scheduler.queued[key].args == ("yes@40",)
+    latest = asyncio.create_task(scheduler.submit(CREATE, "write", 1, key, "yes@41"))
+    try:
+        await first
+        raise AssertionError("the stale retry must not be sent")
+    except Superseded:
+        pass
+    assert await latest == "yes@41" and [n for n, _ in exchange.sent] == ["yes@41"]
+    assert scheduler.queued == {} and scheduler.coalesced == 1
+    print("[OK] a 429 retry is superseded by a newer request for the same key")
+
+
+def verify_bucket():
+    bucket = TokenBucket(10)
+    assert bucket.delay(10) == 0
+    bucket.take(10)
+    assert 0.09 < bucket.delay(1) <= 0.1
+    assert bucket.delay(25) <= 1.0, "oversized costs wait for a full bucket, not forever"
+    assert TokenBucket(0).delay(1e9) == 0, "rate 0 is unthrottled"
+    print("[OK] token bucket refill and caps")
+
+
+async def main():
+    print("--- Starting Scheduler Verification ---")
+    verify_bucket()
+    await verify_priorities()
+    await verify_coalescing()
+    await verify_strategy_coalescing()
+    await verify_429()
+    print("--- Verification Complete ---")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
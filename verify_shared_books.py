@@ -0,0 +1,67 @@
+import multiprocessing
+import numpy as np
+from config import Config
+from ledger import Ledger
+from market_data import MarketDataService
+from shared_books import SharedBooks, YES, NO
+from supervisor import shard
+from synthetic_feed import generate_frames
+
+
+def read_in_child(name, queue):
+    # A separate process sees the books without any serialization of the book itself
+    books = SharedBooks.attach(name)
+    levels, best = books.read_book(books.slots["AAA"])
+    bid, ask = books.top_of_book()
+    queue.put((levels.tolist(), best.tolist(), bid.tolist(), ask.tolist(), books.position.tolist(), books.stale.tolist()))
+    books.close()
+
+
+def verify():
+    print("--- Starting Shared Books Verification ---")
+    assert shard(list("abcdefg"), 3) == [["a", "d", "g"], ["b", "e"], ["c", "f"]]
+    assert shard(["a"], 4) == [["a"]]
+    print("[OK] round-robin sharding")
+
+    books = SharedBooks.create(["AAA", "BBB"])
+    try:
+        assert books.stale.tolist() == [1, 1]
+        config = Config(API_KEY="test", TARGET_TICKER="AAA")
+        ledger = Ledger()
+        ledger.position_listeners.append(lambda t, p: books.set_position(books.slots[t], p))
+        md = MarketDataService(config, market_tickers=["AAA"], ledger=ledger, shared=books)
+        md.dispatcher.autostart = False
+        for raw in generate_frames("churn", 5000, ticker="AAA"):
+            md._on_frame(raw)
+        md._handle_message({"type": "fill", "sid": 9, "msg": {"trade_id": "t1", "order_id": "x", "market_ticker": "AAA",
+                                                               "side": "yes", "action": "buy", "count": 3}})
+
+        book = md.book("AAA")
+        assert not book.is_empty()
+        levels, best = books.read_book(books.slots["AAA"])
+        assert levels[YES].tolist() == book.yes.levels and levels[NO].tolist() == book.no.levels
+        assert best.tolist() == [book.yes.best, book.no.best]
+        assert int(books.version[0]) % 2 == 0 and books.version[0] > 0
+        print("[OK] every delta is mirrored into the market's slot")
+
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        p = ctx.Process(target=read_in_child, args=(books.name, queue))
+        p.start()
+        child_levels, child_best, bid, ask, position, stale = queue.get(timeout=30)
+        p.join()
+        assert child_levels == levels.tolist() and child_best == best.tolist()
+        assert (bid[0], ask[0]) == md.get_best_prices("AAA")
+        assert position == [3, 0] and stale == [0, 1], (position, stale)
+        print("[OK] another process reads books, positions and stale flags from the segment")
+
+        md._mark_stale(["AAA"])
+        assert books.stale[0] == 1
+        print("[OK] stale books are flagged for the monitor")
+    finally:
+        books.close()
+    print("--- Verification Complete ---")
+
+
+if __name__ == "__main__":
+    verify()
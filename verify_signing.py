@@ -0,0 +1,50 @@
+import asyncio
+import base64
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from signing import RequestSigner
+
+# Same PSS parameters the exchange checks signatures with
+PSS = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.DIGEST_LENGTH)
+
+
+def make_pem():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+
+
+def check(public_key, headers, method, path):
+    # Signed text is timestamp + method + path without the query string
+    message = (headers['KALSHI-ACCESS-TIMESTAMP'] + method + path.split('?')[0]).encode()
+    public_key.verify(base64.b64decode(headers['KALSHI-ACCESS-SIGNATURE']), message, PSS, hashes.SHA256())
+
+
+async def verify_mode(pem, mode):
+    signer = RequestSigner("key-id", pem, workers=2, mode=mode)
+    public_key = signer.private_key.public_key()
+    try:
+        requests = [("POST", "/trade-api/v2/portfolio/orders"), ("GET", "/trade-api/v2/markets?limit=100"),
+                    ("DELETE", "/trade-api/v2/portfolio/orders/abc")] * 3
+        signed = await asyncio.gather(*(signer.auth_headers_async(m, p) for m, p in requests))
+        for (method, path), headers in zip(requests, signed):
+            assert headers['KALSHI-ACCESS-KEY'] == "key-id"
+            check(public_key, headers, method, path)
+        # A signature is bound to its request: another path must not verify
+        try:
+            check(public_key, signed[0], "POST", "/trade-api/v2/portfolio/orders/batched")
+            raise AssertionError("signature verified for a different path")
+        except InvalidSignature:
+            pass
+        check(public_key, signer.auth_headers("GET", "/trade-api/ws/v2"), "GET", "/trade-api/ws/v2")
+    finally:
+        signer.close()
+    print(f"[OK] {mode} pool: concurrent async signatures verify against the public key")
+
+
+if __name__ == "__main__":
+    print("--- Starting Signing Verification ---")
+    pem = make_pem()
+    asyncio.run(verify_mode(pem, "thread"))
+    asyncio.run(verify_mode(pem, "process"))
+    print("--- Verification Complete ---")
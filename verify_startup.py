@@ -0,0 +1,88 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from config import Config
+from market_data import MarketDataService
+from orderbook import OrderBook
+from shared_books import SharedBooks
+from startup import StartupTimer, watch_first_quote
+from synthetic_feed import generate_frames
+
+
+def verify_lazy_imports():
+    # The modules on the startup critical path must not drag in the deferred dependencies
+    code = "import sys, main, async_client; print(sorted({m.split('.')[0] for m in sys.modules} & {'cryptography', 'requests'}))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+    assert out == "[]", out
+    print("[OK] cryptography and requests are not imported until used")
+
+
+async def verify_timer():
+    timer = StartupTimer()
+    slow = timer.task("slow", asyncio.sleep(0.05))
+    fast = timer.task("fast", asyncio.sleep(0.01))
+    await asyncio.gather(slow, fast)
+    timer.timed("sync", time.sleep, 0.01)
+    timer.mark("first quote")
+    timer.mark("first quote") # first one wins
+    (s0, s1), (f0, f1) = timer.phases["slow"], timer.phases["fast"]
+    assert abs(s0 - f0) < 5 and s1 - s0 >= 50 and f1 - f0 < s1 - s0, "tasks overlap"
+    report = timer.report().splitlines()
+    assert report[0].startswith("Startup: first quote after")
+    assert [line.split()[0] for line in report[1:]] == ["slow", "fast", "sync", "first"]
+    print("[OK] timer records overlapping phases and milestones")
+
+
+async def verify_late_selection(path):
+    config = Config(API_KEY="test", TARGET_TICKER="DEFAULT")
+    md = MarketDataService(config, market_tickers=[])
+    md.dispatcher.autostart = False
+    assert md.market_tickers == [] and md.ticker == "DEFAULT"
+    await md.subscribe(["AAA", "BBB"]) # pre-subscribed candidates, socket not up yet
+    assert md.is_stale("AAA") and md.is_stale("BBB")
+    for raw in generate_frames("churn", 200, ticker="AAA"):
+        md._on_frame(raw)
+    assert not md.is_stale("AAA")
+
+    # Previous run left a book for BBB; AAA is already streaming when the file is attached
+    old = SharedBooks.open_file(path, ["AAA", "BBB"])
+    previous = OrderBook()
+    previous.apply_snapshot([[40, 7]], [[55, 3]])
+    old.write_book(old.slots["BBB"], previous)
+    old.close()
+    books = SharedBooks.open_file(path, ["AAA", "BBB"])
+    md.attach_shared(books)
+    levels, best = books.read_book(books.slots["AAA"])
+    assert levels[0].tolist() == md.book("AAA").yes.levels and books.stale[books.slots["AAA"]] == 0
+    assert md.book("BBB").best_prices() == (40, 45) and md.is_stale("BBB")
+    print("[OK] candidates stream before selection; the state file attaches without clobbering live books")
+
+    class Strategy:
+        ticker = "AAA"
+        quoting = asyncio.Event()
+
+    timer = StartupTimer()
+    watcher = asyncio.create_task(watch_first_quote(timer, md, Strategy, timeout=1))
+    await asyncio.sleep(0.01)
+    assert "first snapshot" in timer.marks, "book was already live"
+    Strategy.quoting.set()
+    await watcher
+    assert "first quote" in timer.marks and not md.ticker_listeners.get("AAA")
+    books.close()
+    print("[OK] first snapshot and first quote are marked, then the watcher detaches")
+
+
+async def main():
+    print("--- Starting Startup Verification ---")
+    verify_lazy_imports()
+    await verify_timer()
+    with tempfile.TemporaryDirectory() as tmp:
+        await verify_late_selection(os.path.join(tmp, "state.bin"))
+    print("--- Verification Complete ---")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import tempfile
+from backtest import SimulatedExchange
+from config import Config
+from ledger import Ledger
+from market_data import MarketDataService
+from shared_books import SharedBooks, YES
+from strategy import MarketMakingStrategy
+from synthetic_feed import generate_frames
+
+
+def session(config, path, exchange, tickers=("AAA",)):
+    # What main.py wires up: state file -> market data, ledger positions and strategy orders
+    books = SharedBooks.open_file(path, tickers)
+    ledger = Ledger()
+    ledger.position_listeners.append(books.update_position)
+    md = MarketDataService(config, market_tickers=list(tickers), ledger=ledger, shared=books)
+    md.dispatcher.autostart = False
+    exchange.attach_book("AAA", md.book("AAA"))
+    strategy = MarketMakingStrategy(config, exchange, md, ticker="AAA", ledger=ledger)
+    md.add_listener(strategy.on_market_update, ticker="AAA")
+    return books, ledger, md, strategy
+
+
+async def feed(md, strategy, frames):
+    for raw in frames:
+        md._on_frame(raw)
+        await md.dispatcher.flush()
+        await strategy.wait_for_quotes()
+
+
+async def verify_warm_start(path):
+    config = Config(API_KEY="test", TARGET_TICKER="AAA")
+    frames = list(generate_frames("churn", 400, ticker="AAA"))
+    exchange = SimulatedExchange()
+
+    books, ledger, md, strategy = session(config, path, exchange)
+    await feed(md, strategy, frames)
+    ledger.on_fill({"trade_id": "t1", "order_id": "x", "market_ticker": "AAA", "side": "yes",
+                    "action": "buy", "count": 7, "post_position": 7})
+    before = {s: dict(o) for s, o in strategy.current_pos.items()}
+    assert before['yes'] and before['no'], before
+    book = md.book("AAA")
+    # Crash: nothing is closed or flushed, the next run maps the same file
+    books2, ledger2, md2, strategy2 = session(config, path, exchange)
+    assert md2.is_stale("AAA") and books2.stale[0] == 1
+    assert md2.book("AAA").yes.levels == book.yes.levels and md2.book("AAA").no.levels == book.no.levels
+    assert strategy2.current_pos == before, strategy2.current_pos
+    assert strategy2.net_position == 7 and ledger2.position("AAA") == 7
+    print("[OK] book, resting orders and position come back from the state file")
+
+    # While we were down: the NO order filled and a duplicate YES order was left resting
+    exchange._cancel(before['no']['id'])
+    stray = exchange._place("AAA", "buy", 2, 5, "yes")['order']['order_id']
+    await strategy2.warm_start()
+    assert strategy2.current_pos['yes'] == before['yes'] and strategy2.current_pos['no'] is None
+    assert exchange.orders[stray]['status'] == "canceled"
+    assert ledger2.is_resting(before['yes']['id'])
+    assert books2.read_orders(0) == {'yes': before['yes'], 'no': None}
+    print("[OK] warm start keeps live orders, drops gone ones and cancels strays")
+
+    created = exchange.orders_created
+    await feed(md2, strategy2, frames[:50])
+    assert not md2.is_stale("AAA")
+    assert exchange.orders_created == created + 1, "only the missing NO leg is placed; YES is amended in place"
+    assert len(exchange.resting["AAA"]) == 2
+    print("[OK] quoting resumes on the first snapshot without double-quoting")
+    books.close()
+    books2.close()
+
+
+def verify_layout_changes(path):
+    books = SharedBooks.open_file(path, ["AAA"])
+    books.version[0] += 1 # writer died mid-write
+    books.set_order(0, YES, "ord-1", 41, "c-1")
+    books.set_position(0, -3)
+    books.close()
+    books = SharedBooks.open_file(path, ["AAA"])
+    assert books.version[0] % 2 == 0
+    books.read_book(0)
+    books.close()
+
+    books = SharedBooks.open_file(path, ["BBB", "AAA"])
+    assert books.slots == {"BBB": 0, "AAA": 1}
+    assert books.read_orders(1)['yes'] == {'id': "ord-1", 'price': 41, 'client_order_id': "c-1"}
+    assert int(books.position[1]) == -3 and int(books.position[0]) == 0
+    assert books.read_orders(0) == {'yes': None, 'no': None}
+    assert books.stale.tolist() == [1, 1]
+    books.close()
+    assert not os.path.exists(f"{path}.tmp")
+
+    reader = SharedBooks.attach(path) # monitor.py <state file>
+    assert int(reader.position[1]) == -3
+    reader.close()
+
+    with open(path, "wb") as f:
+        f.write(b"not a state file")
+    books = SharedBooks.open_file(path, ["AAA"])
+    assert books.read_orders(0) == {'yes': None, 'no': None}
+    books.close()
+    print("[OK] torn writes, changed market sets and foreign files are handled")
+
+
+if __name__ == "__main__":
+    print("--- Starting State File Verification ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(verify_warm_start(os.path.join(tmp, "state.bin")))
+        verify_layout_changes(os.path.join(tmp, "layout.bin"))
+    print("--- Verification Complete ---")
@@ -1,8 +1,126 @@
 import asyncio
 from unittest.mock import MagicMock
+from client import OrderNotFound
 from config import Config
 from strategy import MarketMakingStrategy
 
+def make_strategy(best=(50, 54)):
+    config = Config(API_KEY="test", PRIVATE_KEY_PATH="test", TARGET_TICKER="TEST-MARKET")
+    client = MagicMock()
+    client.batch_create_orders.return_value = {
+        'orders': [{'order': {'order_id': 'y1'}}, {'order': {'order_id': 'n1'}}]
+    }
+    client.create_order.return_value = {'order': {'order_id': 'new'}}
+    client.amend_order.side_effect = lambda oid, *a, **k: {'order': {'order_id': oid}}
+    client.cancel_order.return_value = {}
+    market_data = MagicMock()
+    market_data.is_stale.return_value = False
+    market_data.shared = None
+    market_data.get_best_prices.return_value = best
+    market_data.get_imbalance.return_value = 0.0
+    return MarketMakingStrategy(config, client, market_data), client, market_data
+
+async def quote(strategy):
+    await strategy.on_market_update()
+    await strategy.wait_for_quotes()
+
+def order_prices(call_args):
+    return {o['side']: o.get('yes_price', o.get('no_price')) for o in call_args[0][0]}
+
+class SlowClient:
+    # Async exchange stand-in: every call takes one fixed round trip
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.calls = []
+        self.n = 0
+
+    async def _round_trip(self, *call):
+        self.calls.append(call)
+        await asyncio.sleep(self.rtt)
+
+    async def create_order(self, ticker, action, count, price, side="yes"):
+        await self._round_trip("create", side, price)
+        self.n += 1
+        return {'order': {'order_id': f"o{self.n}"}}
+
+    async def batch_create_orders(self, orders):
+        await self._round_trip("batch", *(o['side'] for o in orders))
+        self.n += 2
+        return {'orders': [{'order': {'order_id': f"o{self.n - 1}"}}, {'order': {'order_id': f"o{self.n}"}}]}
+
+    async def amend_order(self, order_id, ticker, action, count, price, side="yes", client_order_id=None):
+        await self._round_trip("amend", side, price)
+        return {'order': {'order_id': order_id}}
+
+async def test_concurrent_legs():
+    print("\n[Test 5] Concurrent legs and in-flight tracking...")
+    rtt = 0.05
+    strategy, _, market_data = make_strategy()
+    client = strategy.client = SlowClient(rtt)
+
+    # While the batched create is in flight, a new target must not launch a second create
+    await strategy.on_market_update()
+    await asyncio.sleep(rtt / 2)
+    market_data.get_best_prices.return_value = (52, 56)
+    await strategy.on_market_update()
+    await asyncio.sleep(0)
+    assert client.calls == [("batch", "yes", "no")]
+    # ...and is applied once the leg is back (one follow-up amend per side, to the latest target)
+    await strategy.wait_for_quotes()
+    assert sorted(client.calls[1:]) == [("amend", "no", 44), ("amend", "yes", 52)]
+    assert {s: o['price'] for s, o in strategy.current_pos.items()} == {'yes': 52, 'no': 44}
+
+    # Both resting and both mispriced: the two amends overlap, about one round trip in total
+    for leg in strategy.leg_latency.values():
+        leg.clear()
+    market_data.get_best_prices.return_value = (48, 52)
+    started = asyncio.get_running_loop().time()
+    await quote(strategy)
+    elapsed = asyncio.get_running_loop().time() - started
+    assert rtt <= elapsed < 1.5 * rtt, f"{elapsed:.3f}s for two legs"
+    report = strategy.latency_report()
+    assert set(report) == {'first', 'second'} and report['first']['count'] == report['second']['count'] == 1
+    assert report['second']['p50_ms'] < 1.5 * rtt * 1000
+    print(f"Two legs in {elapsed * 1000:.0f}ms (RTT {rtt * 1000:.0f}ms); no duplicate create; mid-flight target re-applied: OK")
+
+async def test_requote_paths():
+    print("\n[Test 4] Batch, amend and amend fallback...")
+    # Both sides empty: one batched create, no single creates
+    strategy, client, market_data = make_strategy()
+    await quote(strategy)
+    assert client.batch_create_orders.call_count == 1 and not client.create_order.called
+    assert order_prices(client.batch_create_orders.call_args) == {'yes': 50, 'no': 46}
+    assert strategy.current_pos['yes']['id'] == 'y1' and strategy.current_pos['no']['id'] == 'n1'
+
+    # Resting at a stale price: each side amended in place, same ids, nothing cancelled or created
+    market_data.get_best_prices.return_value = (55, 59)
+    await quote(strategy)
+    assert client.amend_order.call_count == 2
+    assert not client.cancel_order.called and not client.create_order.called and client.batch_create_orders.call_count == 1
+    assert {s: (o['id'], o['price']) for s, o in strategy.current_pos.items()} == {'yes': ('y1', 55), 'no': ('n1', 41)}
+
+    # Exchange says the order is gone: fall back to a fresh create for that side
+    client.amend_order.side_effect = OrderNotFound("order n1 not found")
+    market_data.get_best_prices.return_value = (55, 57) # only the NO target moves, 41 -> 43
+    await quote(strategy)
+    assert client.amend_order.call_args[0][0] == 'n1' and not client.cancel_order.called
+    assert client.create_order.call_count == 1 and client.create_order.call_args[1]['side'] == 'no'
+    assert strategy.current_pos['no'] == {'price': 43, 'id': 'new', 'client_order_id': None}
+    assert strategy.current_pos['yes']['id'] == 'y1'
+
+    # Any other failure may have left the order live (or amended): keep it, place nothing
+    client.amend_order.side_effect = TimeoutError("amend timed out")
+    client.create_order.reset_mock()
+    resting = dict(strategy.current_pos)
+    market_data.get_best_prices.return_value = (50, 54)
+    await quote(strategy)
+    assert not client.create_order.called and client.batch_create_orders.call_count == 1
+    assert strategy.current_pos == resting
+    client.amend_order.side_effect = lambda oid, *a, **k: {'order': {'order_id': oid}}
+    await quote(strategy) # next evaluation retries the amend on the same orders
+    assert {s: (o['id'], o['price']) for s, o in strategy.current_pos.items()} == {'yes': ('y1', 50), 'no': ('new', 46)}
+    print("Batch when empty, amend when resting, re-place only when the order is gone: OK")
+
 async def test_strategy():
     print("--- Starting Strategy Verification ---")
     
@@ -15,8 +133,13 @@ async def test_strategy():
         'market_positions': [{'ticker': 'TEST-MARKET', 'position': 500}]
     }
     client.create_order.return_value = {'order': {'order_id': '123'}}
+    client.batch_create_orders.return_value = {
+        'orders': [{'order': {'order_id': '123'}}, {'order': {'order_id': '124'}}]
+    }
     
     market_data = MagicMock()
+    market_data.is_stale.return_value = False
+    market_data.shared = None # no state file
     market_data.add_listener = MagicMock()
     # Mock Market: 50 Bid, 54 Ask. Mid = 52.
     market_data.get_best_prices.return_value = (50, 54)
@@ -52,15 +175,30 @@ async def test_strategy():
     print(f"Quotes: 49 / 53")
     
     await strategy.on_market_update()
+    await strategy.wait_for_quotes()
     
     # 5. Verify Orders
-    # Check if create_order was called with 49 and 53 (actually NO order at 100-53=47)
+    # Both legs are placed in one batched create: YES bid (squeezed up to the 50 best bid) and NO @ 100-53=47
     
     print("\n[Result] Client Calls:")
-    for call in client.create_order.call_args_list:
-        args = call[1] # kwargs
-        print(f"Order: {args.get('side')} {args.get('action')} @ {args.get('price')}")
-        
+    for call in client.batch_create_orders.call_args_list:
+        for order in call[0][0]:
+            price = order.get('yes_price', order.get('no_price'))
+            print(f"Order: {order['side']} {order['action']} @ {price}")
+    print(f"REST calls: {strategy.rest_calls}")
+
+    # 6. Stale book (sequence gap / disconnect): resting quotes are pulled, nothing is placed
+    print("\n[Test 3] Book goes stale...")
+    market_data.is_stale.return_value = True
+    client.batch_create_orders.reset_mock()
+    await strategy.on_market_update()
+    await strategy.wait_for_quotes()
+    assert strategy.current_pos['yes'] is None and strategy.current_pos['no'] is None
+    assert not client.batch_create_orders.called
+    print(f"Quotes pulled, REST calls: {strategy.rest_calls}")
+
+    await test_requote_paths()
+    await test_concurrent_legs()
     print("--- Verification Complete ---")
 
 if __name__ == "__main__":
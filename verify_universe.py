@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+from market_universe import MarketUniverse, spread_bucket
+from scan_markets import MarketColumns, rank_markets
+from verify_scan import random_markets
+
+
+class UpdatingClient:
+    # Paged /markets that honours status and min_updated_ts, with a per-market update clock
+    def __init__(self, markets):
+        self.markets = {m['ticker']: dict(m, status="open", event_ticker=f"EV{i % 50}-X", updated_ts=0)
+                        for i, m in enumerate(markets)}
+        self.clock = 1000
+        self.served = 0
+
+    def touch(self, ticker, **fields):
+        self.clock += 1
+        self.markets[ticker].update(fields, updated_ts=self.clock)
+
+    def get_markets(self, limit=100, status="open", cursor=None, min_updated_ts=None, **filters):
+        rows = [m for m in self.markets.values()
+                if (status is None or m['status'] == status)
+                and (min_updated_ts is None or m['updated_ts'] >= min_updated_ts)]
+        start = int(cursor or 0)
+        page = rows[start:start + limit]
+        self.served += len(page)
+        nxt = str(start + limit) if start + limit < len(rows) else ""
+        return {"markets": page, "cursor": nxt}
+
+
+class AsyncUpdatingClient(UpdatingClient):
+    async def get_markets(self, *args, **kwargs):
+        await asyncio.sleep(0)
+        return super().get_markets(*args, **kwargs)
+
+
+def check_indexes(universe):
+    tickers = set(universe.markets)
+    assert set().union(*universe.by_event.values()) == tickers
+    assert set().union(*universe.by_series.values()) == tickers
+    assert set().union(*universe.by_spread.values()) == tickers
+    assert sorted(t for _, t in universe._liquidity) == sorted(tickers)
+    for bucket, members in universe.by_spread.items():
+        for t in members:
+            m = universe.markets[t]
+            assert spread_bucket(m.get('yes_ask', 100) - m.get('yes_bid', 0)) == bucket
+
+
+def verify():
+    print("--- Starting Market Universe Verification ---")
+    client = UpdatingClient(random_markets(5000))
+    universe = MarketUniverse(ttl=3600)
+    universe.full_sync(client)
+    assert len(universe.markets) == 5000
+    check_indexes(universe)
+    assert universe.top(10) == rank_markets(MarketColumns.from_pages([client.markets.values()]), 10)
+    print("[OK] full sync matches a direct scan")
+
+    # Two markets move, one settles; sync time is pushed back so the fake clock is "after" it
+    universe.synced_at = 1000 + 60
+    first = universe.top(1)[0]['ticker']
+    client.touch(first, yes_bid=5, yes_ask=95)
+    client.touch("MKT-7", yes_bid=40, yes_ask=42, volume=9000, open_interest=9000, liquidity=900000)
+    client.touch("MKT-8", status="settled")
+    client.served = 0
+    universe.incremental_sync(client)
+    assert client.served == 3, f"incremental sync re-fetched {client.served} markets"
+    assert "MKT-8" not in universe.markets and universe.markets["MKT-7"]['yes_ask'] == 42
+    check_indexes(universe)
+    fresh = [m for m in client.markets.values() if m['status'] == "open"]
+    # Updated markets move to the end of the cache, so compare rankings ignoring tie order
+    by_rank = lambda ms: sorted(ms, key=lambda m: (-m['spread'], m['ticker']))
+    assert by_rank(universe.top(10000)) == by_rank(rank_markets(MarketColumns.from_pages([fresh]), 10000))
+    assert first not in {m['ticker'] for m in universe.top(10)}
+    print("[OK] incremental sync applies updates and removals")
+
+    liquid = universe.most_liquid(5)
+    assert [m['liquidity'] for m in liquid] == sorted((m['liquidity'] for m in fresh), reverse=True)[:5]
+    assert all(m['event_ticker'] == "EV3-X" for m in universe.in_event("EV3-X"))
+    assert len(universe.in_series("EV3")) == len(universe.in_event("EV3-X"))
+    print("[OK] event/series/liquidity indexes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        universe.path = os.path.join(tmp, "universe.json")
+        universe.save()
+        cached = MarketUniverse.load(universe.path)
+        assert cached.markets == universe.markets and cached.is_fresh()
+        assert cached.top(10) == universe.top(10)
+        cached.full_synced_at -= 7200
+        assert not cached.is_fresh(), "cache past its TTL must trigger a full scan"
+    print("[OK] disk cache round trip and TTL")
+
+    async def run_async():
+        aclient = AsyncUpdatingClient(random_markets(3000, seed=9))
+        u = MarketUniverse()
+        await u.refresh_async(aclient) # cold: full scan
+        assert len(u.markets) == 3000
+        u.synced_at = 1000 + 60
+        aclient.touch("MKT-1", status="closed")
+        aclient.served = 0
+        await u.refresh_async(aclient) # warm: incremental
+        assert aclient.served == 1 and "MKT-1" not in u.markets
+        check_indexes(u)
+    asyncio.run(run_async())
+    print("[OK] async full and incremental refresh")
+    print("--- Verification Complete ---")
+
+
+if __name__ == "__main__":
+    verify()
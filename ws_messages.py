@@ -0,0 +1,177 @@
+import json
+from typing import Any, ClassVar, Union
+
+# Typed schemas for the WS messages on the hot path and a decoder that uses the fastest
+# JSON library installed: msgspec (decodes straight into struct twins of the classes below),
+# then orjson, then the stdlib. Every backend produces the same attribute-style messages:
+#   BookMessage   orderbook_snapshot / orderbook_delta: .msg.market_ticker, .msg.yes, .msg.no
+#   Subscribed    .msg.channel, .msg.sid
+#   ErrorMessage  .msg.code, .msg.msg
+#   RawMessage    anything else (fills, positions, acks) with .msg as a plain dict
+# All of them carry .type, .sid and .seq so handlers can be looked up by type.
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BOOK_TYPES = frozenset(("orderbook_snapshot", "orderbook_delta"))
+
+class RawMessage:
+    __slots__ = ("type", "sid", "seq", "id", "msg")
+
+    def __init__(self, data: dict):
+        self.type = data.get("type")
+        self.sid = data.get("sid")
+        self.seq = data.get("seq")
+        self.id = data.get("id")
+        self.msg = data.get("msg") or {}
+
+class BookBody:
+    __slots__ = ("market_ticker", "yes", "no")
+
+    def __init__(self, market_ticker: str = "", yes=None, no=None):
+        self.market_ticker = market_ticker
+        self.yes = yes or []
+        self.no = no or []
+
+class _Typed:
+    __slots__ = ("type", "sid", "seq", "id", "msg")
+
+    def __init__(self, type_: str, data: dict, msg):
+        self.type = type_
+        self.sid = data.get("sid")
+        self.seq = data.get("seq")
+        self.id = data.get("id")
+        self.msg = msg
+
+class BookMessage(_Typed):
+    __slots__ = ()
+
+class SubscribedBody:
+    __slots__ = ("channel", "sid")
+
+    def __init__(self, channel: str = "", sid=None):
+        self.channel = channel
+        self.sid = sid
+
+class Subscribed(_Typed):
+    __slots__ = ()
+
+class ErrorBody:
+    __slots__ = ("code", "msg")
+
+    def __init__(self, code=None, msg: str = ""):
+        self.code = code
+        self.msg = msg
+
+class ErrorMessage(_Typed):
+    __slots__ = ()
+
+_EMPTY = {}
+
+def _book_from_dict(data):
+    msg = data.get("msg") or _EMPTY
+    return BookMessage(data["type"], data, BookBody(msg.get("market_ticker", ""), msg.get("yes"), msg.get("no")))
+
+def _subscribed_from_dict(data):
+    msg = data.get("msg") or _EMPTY
+    return Subscribed("subscribed", data, SubscribedBody(msg.get("channel", ""), msg.get("sid")))
+
+def _error_from_dict(data):
+    msg = data.get("msg") or _EMPTY
+    return ErrorMessage("error", data, ErrorBody(msg.get("code"), msg.get("msg", "")))
+
+if msgspec is not None:
+    # The same schemas as msgspec structs (same attribute names), so msgspec can decode
+    # frames straight into them without an intermediate dict
+    class BookBodyStruct(msgspec.Struct):
+        market_ticker: str = ""
+        yes: list = []
+        no: list = []
+
+    class _BookStruct(msgspec.Struct):
+        msg: BookBodyStruct
+        sid: Union[int, None] = None
+        seq: Union[int, None] = None
+        id: Union[int, None] = None
+
+    class BookSnapshotStruct(_BookStruct, tag_field="type", tag="orderbook_snapshot"):
+        type: ClassVar[str] = "orderbook_snapshot"
+
+    class BookDeltaStruct(_BookStruct, tag_field="type", tag="orderbook_delta"):
+        type: ClassVar[str] = "orderbook_delta"
+
+    class SubscribedBodyStruct(msgspec.Struct):
+        channel: str = ""
+        sid: Union[int, None] = None
+
+    class SubscribedStruct(msgspec.Struct, tag_field="type", tag="subscribed"):
+        type: ClassVar[str] = "subscribed"
+        msg: SubscribedBodyStruct
+        id: Union[int, None] = None
+        sid: Union[int, None] = None
+        seq: Union[int, None] = None
+
+    class ErrorBodyStruct(msgspec.Struct):
+        code: Any = None
+        msg: str = ""
+
+    class ErrorStruct(msgspec.Struct, tag_field="type", tag="error"):
+        type: ClassVar[str] = "error"
+        msg: ErrorBodyStruct = msgspec.field(default_factory=ErrorBodyStruct)
+        id: Union[int, None] = None
+        sid: Union[int, None] = None
+        seq: Union[int, None] = None
+
+    _TYPED = Union[BookSnapshotStruct, BookDeltaStruct, SubscribedStruct, ErrorStruct]
+
+_FROM_DICT = {
+    "orderbook_snapshot": _book_from_dict,
+    "orderbook_delta": _book_from_dict,
+    "subscribed": _subscribed_from_dict,
+    "error": _error_from_dict,
+}
+
+def from_dict(data: dict):
+    # Typed message from an already-decoded dict (tests, replays of decoded data)
+    factory = _FROM_DICT.get(data.get("type"))
+    return factory(data) if factory is not None else RawMessage(data)
+
+def _json_loads(frame):
+    # The stdlib parser does not take buffers (frames sliced from shared memory)
+    return json.loads(frame.tobytes() if isinstance(frame, memoryview) else frame)
+
+def available_backends():
+    return [name for name, mod in (("msgspec", msgspec), ("orjson", orjson), ("json", json)) if mod is not None]
+
+class MessageDecoder:
+    # decoder.decode(frame) -> typed message; frame may be str, bytes or a memoryview
+    def __init__(self, backend: str = None):
+        self.backend = backend or available_backends()[0]
+        if self.backend not in available_backends():
+            raise ValueError(f"JSON backend {self.backend!r} is not installed")
+        if self.backend == "msgspec":
+            self._typed = msgspec.json.Decoder(_TYPED)
+            self._generic = msgspec.json.Decoder()
+            self.decode = self._decode_msgspec
+        else:
+            self._loads = orjson.loads if self.backend == "orjson" else _json_loads
+            self.decode = self._decode_dict
+
+    def _decode_msgspec(self, frame):
+        try:
+            return self._typed.decode(frame)
+        except msgspec.ValidationError:
+            # Message types without a schema (fills, positions, acks) stay untyped
+            return RawMessage(self._generic.decode(frame))
+
+    def _decode_dict(self, frame):
+        data = self._loads(frame)
+        factory = _FROM_DICT.get(data.get("type"))
+        return factory(data) if factory is not None else RawMessage(data)